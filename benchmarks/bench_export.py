@@ -0,0 +1,162 @@
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from psycopg import sql
+
+from bench_utils import REPO_ROOT
+
+# Peak memory of the /export CSV writer at growing row counts. The schema
+# named by --schema is filled with synthetic tenders up to each size, then
+# every export runs in a fresh child process so its peak RSS is measured on
+# its own. --baseline also runs the fetchall() equivalent for comparison.
+#
+#   python benchmarks/bench_export.py --db-url postgresql://localhost/bench --sizes 1000,10000,100000,1000000
+#
+# The schema is dropped and recreated; point --db-url at a scratch database.
+
+SEED_BATCH = 50_000
+
+
+def peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+async def seed(conn, start, stop):
+    # Synthetic rows shaped like scraped ones; ids are zero-padded so they sort.
+    await conn.execute("""
+        INSERT INTO tenders1 (id, title, url, bid_closing_date, bid_opening_date, published_on, published_date)
+        SELECT 'bx' || lpad(i::text, 9, '0'),
+               'Supply and delivery of equipment lot ' || i,
+               'https://tender.example/tenders/bx' || i,
+               'Nov 03, 2026 (10:00 AM)', 'Nov 05, 2026 (10:30 AM)', 'Oct 17, 2026',
+               current_date - (i %% 30)
+        FROM generate_series(%s, %s - 1) AS i
+    """, (start, stop))
+    await conn.execute("""
+        INSERT INTO tender_details (tender_id, title, description, filed_under, company, metadata_json)
+        SELECT 'bx' || lpad(i::text, 9, '0'),
+               'Supply and delivery of equipment lot ' || i,
+               repeat('Bidders must submit a sealed offer. ', 8),
+               'IT Equipment, Office Furniture',
+               'Ministry ' || (i %% 50),
+               jsonb_build_object('region', 'Region ' || (i %% 11), 'bidding_type', 'Open')
+        FROM generate_series(%s, %s - 1) AS i
+    """, (start, stop))
+
+
+async def run_child(args):
+    from db import close_pool, open_pool
+    from export import _export_query, write_export
+
+    await open_pool(args.db_url, max_size=1, connect_kwargs={"options": f"-c search_path={args.schema}"})
+    try:
+        before_kb = peak_rss_kb()
+        started = time.perf_counter()
+        with tempfile.TemporaryFile() as file:
+            if args.mode == "stream":
+                rows = await write_export(file, days=0, compress=args.gzip)
+            else:
+                from db import connection
+
+                query, params = _export_query()
+                async with connection() as conn:
+                    cur = await conn.execute(query, params)
+                    result = await cur.fetchall()
+                rows = len(result)
+            size = file.tell()
+        elapsed = time.perf_counter() - started
+    finally:
+        await close_pool()
+    print(json.dumps({
+        "mode": args.mode,
+        "rows": rows,
+        "bytes": size,
+        "wall_seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed) if elapsed else None,
+        "baseline_rss_kb": before_kb,
+        "peak_rss_kb": peak_rss_kb(),
+        "peak_rss_delta_kb": peak_rss_kb() - before_kb
+    }))
+
+
+def measure(args, mode):
+    output = subprocess.check_output([
+        sys.executable, os.path.abspath(__file__), "--child",
+        "--db-url", args.db_url, "--schema", args.schema, "--mode", mode,
+        *(["--gzip"] if args.gzip else [])
+    ], cwd=REPO_ROOT, text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+async def main(args):
+    os.environ["DB_URL"] = args.db_url
+    os.environ.setdefault("DB_SSLMODE", "disable")
+    if args.child:
+        await run_child(args)
+        return
+    from db import close_pool, connection, open_pool
+    from scraper_lib import init_db
+
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    await open_pool(args.db_url, max_size=1, connect_kwargs={"options": f"-c search_path={args.schema}"})
+    runs = []
+    try:
+        async with connection() as conn:
+            await conn.execute(sql.SQL("DROP SCHEMA IF EXISTS {} CASCADE").format(sql.Identifier(args.schema)))
+            await conn.execute(sql.SQL("CREATE SCHEMA {}").format(sql.Identifier(args.schema)))
+        await init_db()
+        seeded = 0
+        for size in sizes:
+            while seeded < size:
+                batch_end = min(size, seeded + SEED_BATCH)
+                async with connection() as conn:
+                    await seed(conn, seeded, batch_end)
+                seeded = batch_end
+            async with connection() as conn:
+                await conn.execute("ANALYZE")
+            runs.append(measure(args, "stream"))
+            if args.baseline:
+                runs.append(measure(args, "fetchall"))
+            print(json.dumps(runs[-1]), file=sys.stderr)
+        if not args.keep:
+            async with connection() as conn:
+                await conn.execute(sql.SQL("DROP SCHEMA {} CASCADE").format(sql.Identifier(args.schema)))
+    finally:
+        await close_pool()
+
+    print(json.dumps({
+        "benchmark": "export",
+        "config": {"sizes": sizes, "gzip": args.gzip, "baseline": args.baseline},
+        "runs": runs
+    }, indent=2))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure peak RSS of the streaming CSV export.")
+    parser.add_argument(
+        "--db-url",
+        default=os.environ.get("BENCH_DB_URL"),
+        help="Scratch Postgres database (default: $BENCH_DB_URL)."
+    )
+    parser.add_argument("--schema", default="export_bench", help="Schema recreated for the run.")
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000", help="Comma-separated row counts.")
+    parser.add_argument("--gzip", action="store_true", help="Compress the CSV.")
+    parser.add_argument("--baseline", action="store_true", help="Also measure fetchall() at every size.")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded schema afterwards.")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", choices=("stream", "fetchall"), default="stream", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if not args.db_url:
+        raise SystemExit("Pass --db-url or set BENCH_DB_URL to a scratch Postgres database.")
+    return args
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,118 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from bench_utils import REPO_ROOT, PeakRssSampler, process_tree_rss_kb
+
+from fetchers import PlaywrightFetcher
+from scraper_lib import TenderFetcher
+
+# Compares the plain-HTTP fast path (HTML and embedded JSON) with the headless
+# browser path against the offline fixture site. Prints one JSON document.
+# Bytes are measured from finished responses; when both browser profiles run,
+# their transfer per page is compared.
+
+PATHS = {
+    # name: (fixture server mode, TenderFetcher mode, lean browser profile)
+    "http-html": ("ssr", "http", True),
+    "http-json": ("next", "http", True),
+    "browser": ("ssr", "browser", True),
+    "browser-full": ("ssr", "browser", False),
+    "auto-fallback": ("spa", "auto", True)
+}
+
+
+async def start_server(mode, per_page):
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, os.path.join(REPO_ROOT, "benchmarks", "fixture_server.py"),
+        "--port", "0", "--mode", mode, "--per-page", str(per_page),
+        stdout=asyncio.subprocess.PIPE
+    )
+    line = (await process.stdout.readline()).decode().strip()
+    if not line.startswith("READY "):
+        process.kill()
+        raise RuntimeError(f"Fixture server failed to start: {line!r}")
+    return process, line.split(" ", 1)[1]
+
+
+async def run_path(name, pages, details, per_page):
+    server_mode, fetch_mode, lean = PATHS[name]
+    process, base_url = await start_server(server_mode, per_page)
+    site_root = base_url.split("/tenders/")[0]
+    baseline_kb = process_tree_rss_kb(exclude={process.pid})
+    fetched = 0
+    try:
+        async with PeakRssSampler(exclude={process.pid}) as sampler:
+            started = time.perf_counter()
+            browser = PlaywrightFetcher(lean=lean) if fetch_mode != "http" else None
+            async with TenderFetcher(mode=fetch_mode, browser=browser) as fetcher:
+                tender_urls = []
+                for page_num in range(1, pages + 1):
+                    tenders = await fetcher.get_listing(base_url.format(page_num))
+                    tender_urls.extend(site_root + "/tenders/" + t["id"] for t in tenders)
+                    fetched += 1
+                for url in tender_urls[:details]:
+                    await fetcher.get_detail(url)
+                    fetched += 1
+                stats = dict(fetcher.stats)
+                if browser is not None:
+                    stats["browser"] = dict(browser.stats, bytes_fetched=browser.bytes_fetched)
+                if fetcher.http is not None:
+                    stats["http_bytes_fetched"] = fetcher.http.bytes_fetched
+            elapsed = time.perf_counter() - started
+    finally:
+        process.kill()
+        await process.wait()
+    bytes_fetched = stats.get("browser", {}).get("bytes_fetched", 0) + stats.get("http_bytes_fetched", 0)
+    return {
+        "path": name,
+        "pages_fetched": fetched,
+        "wall_seconds": round(elapsed, 3),
+        "pages_per_second": round(fetched / elapsed, 2) if elapsed else None,
+        "bytes_fetched": bytes_fetched,
+        "bytes_per_page": round(bytes_fetched / fetched) if fetched else None,
+        "baseline_rss_kb": baseline_kb,
+        "peak_rss_kb": sampler.peak_kb,
+        "peak_rss_delta_kb": sampler.peak_kb - baseline_kb,
+        "fetch_stats": stats
+    }
+
+
+def lean_transfer(results):
+    # Measured transfer of the lean browser profile against the full one.
+    by_path = {result["path"]: result for result in results if "error" not in result}
+    lean, full = by_path.get("browser"), by_path.get("browser-full")
+    if not lean or not full or not full["bytes_per_page"]:
+        return None
+    return {
+        "lean_bytes_per_page": lean["bytes_per_page"],
+        "full_bytes_per_page": full["bytes_per_page"],
+        "reduction": round(1 - lean["bytes_per_page"] / full["bytes_per_page"], 3)
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark HTTP vs browser fetch paths offline.")
+    parser.add_argument("--pages", type=int, default=5, help="Listing pages per path.")
+    parser.add_argument("--details", type=int, default=40, help="Detail pages per path.")
+    parser.add_argument("--per-page", type=int, default=20)
+    parser.add_argument("--paths", nargs="+", choices=sorted(PATHS), default=sorted(PATHS))
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    results = []
+    for name in args.paths:
+        try:
+            results.append(await run_path(name, args.pages, args.details, args.per_page))
+        except Exception as exc:
+            results.append({"path": name, "error": f"{type(exc).__name__}: {exc}"})
+    print(json.dumps({"benchmark": "fetchers", "results": results, "lean_transfer": lean_transfer(results)}, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
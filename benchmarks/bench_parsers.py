@@ -0,0 +1,80 @@
+import argparse
+import glob
+import json
+import os
+import time
+import tracemalloc
+
+from bench_utils import REPO_ROOT
+
+from extractors import EXTRACTOR_BACKENDS, lxml_html, parse_detail_html, parse_listing_html
+
+# Parse time and allocations per page for each extraction backend, over the
+# saved HTML under benchmarks/fixtures (listing_*.html / detail_*.html).
+
+FIXTURE_DIR = os.path.join(REPO_ROOT, "benchmarks", "fixtures")
+SITE_ROOT = "https://tender.2merkato.com"
+
+
+def _parser_for(path):
+    name = os.path.basename(path)
+    if name.startswith("listing"):
+        return lambda html_content, backend: parse_listing_html(html_content, SITE_ROOT, backend)
+    if name.startswith("detail"):
+        return parse_detail_html
+    return None
+
+
+def bench_fixture(path, backend, iterations):
+    parse = _parser_for(path)
+    with open(path, "r", encoding="utf-8") as file:
+        html_content = file.read()
+    parse(html_content, backend)
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        result = parse(html_content, backend)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    parse(html_content, backend)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, {
+        "fixture": os.path.basename(path),
+        "backend": backend,
+        "bytes": len(html_content.encode("utf-8")),
+        "iterations": iterations,
+        "ms_per_page": round(elapsed / iterations * 1000, 3),
+        "pages_per_second": round(iterations / elapsed, 1),
+        "peak_alloc_kb": round(peak / 1024, 1)
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark HTML extraction backends on saved fixtures.")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--fixtures", default=FIXTURE_DIR, help="Directory of listing_*/detail_* HTML files.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    backends = [name for name in EXTRACTOR_BACKENDS if name != "lxml" or lxml_html is not None]
+    results = []
+    for path in sorted(glob.glob(os.path.join(args.fixtures, "*.html"))):
+        if _parser_for(path) is None:
+            continue
+        reference = None
+        for backend in backends:
+            output, stats = bench_fixture(path, backend, args.iterations)
+            if reference is None:
+                reference = output
+            stats["matches_" + backends[0]] = output == reference
+            results.append(stats)
+    print(json.dumps({"benchmark": "parsers", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import aiohttp
+from psycopg import AsyncCursor, sql
+
+from bench_utils import REPO_ROOT, PeakRssSampler, process_tree_rss_kb
+
+# End-to-end scrape_pages run against the offline fixture site and a local
+# Postgres. Each repeat starts from an empty schema, so results from
+# different commits are comparable. Prints one JSON document.
+#
+#   python benchmarks/bench_scrape.py --db-url postgresql://localhost/bench --pages 5 --tenders 100
+#
+# The schema named by --schema is dropped and recreated; point --db-url at a
+# scratch database, never at production.
+
+
+class CountingCursor(AsyncCursor):
+    # execute() is one round trip. executemany() is pipelined by psycopg, so it
+    # counts as one round trip but len(params) statements.
+    round_trips = 0
+    statements = 0
+
+    async def execute(self, query, params=None, **kwargs):
+        CountingCursor.round_trips += 1
+        CountingCursor.statements += 1
+        return await super().execute(query, params, **kwargs)
+
+    async def executemany(self, query, params_seq, **kwargs):
+        params_seq = list(params_seq)
+        CountingCursor.round_trips += 1
+        CountingCursor.statements += len(params_seq)
+        return await super().executemany(query, params_seq, **kwargs)
+
+    @classmethod
+    def reset(cls):
+        cls.round_trips = 0
+        cls.statements = 0
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def start_server(args, per_page):
+    port = free_port()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, os.path.join(REPO_ROOT, "benchmarks", "fixture_server.py"),
+        "--port", str(port),
+        "--mode", args.mode,
+        "--per-page", str(per_page),
+        "--pages", str(args.pages),
+        "--latency-ms", str(args.latency_ms),
+        "--jitter-ms", str(args.jitter_ms),
+        "--failure-rate", str(args.failure_rate),
+        stdout=asyncio.subprocess.PIPE
+    )
+    line = (await process.stdout.readline()).decode().strip()
+    if not line.startswith("READY "):
+        process.kill()
+        raise RuntimeError(f"Fixture server failed to start: {line!r}")
+    return process, line.split(" ", 1)[1]
+
+
+async def reset_schema(conn, schema):
+    await conn.execute(sql.SQL("DROP SCHEMA IF EXISTS {} CASCADE").format(sql.Identifier(schema)))
+    await conn.execute(sql.SQL("CREATE SCHEMA {}").format(sql.Identifier(schema)))
+
+
+async def server_request(base_url, method, path):
+    url = base_url.split("/tenders/")[0] + path
+    async with aiohttp.ClientSession() as session:
+        async with session.request(method, url) as response:
+            return await response.json()
+
+
+async def run_once(args, server_pid, base_url):
+    from db import connection
+    from metrics import get_last_run
+    from scraper_lib import scrape_pages
+
+    async with connection() as conn:
+        await reset_schema(conn, args.schema)
+    await server_request(base_url, "POST", "/_reset")
+    CountingCursor.reset()
+    baseline_kb = process_tree_rss_kb(exclude={server_pid})
+    async with PeakRssSampler(exclude={server_pid}) as sampler:
+        started = time.perf_counter()
+        tenders_saved = await scrape_pages(
+            args.pages,
+            scrape_details=not args.no_details,
+            detail_concurrency=args.detail_concurrency,
+            politeness_delay=args.politeness_delay,
+            fetch_mode="http" if args.mode != "spa" else "auto",
+            notify=False
+        )
+        elapsed = time.perf_counter() - started
+    served = await server_request(base_url, "GET", "/_stats")
+    run_metrics = get_last_run() or {}
+    return {
+        "wall_seconds": round(elapsed, 3),
+        "tenders_saved": tenders_saved,
+        "details_saved": run_metrics.get("counters", {}).get("details_saved", 0),
+        "tenders_per_second": round(tenders_saved / elapsed, 2) if elapsed else None,
+        "baseline_rss_kb": baseline_kb,
+        "peak_rss_kb": sampler.peak_kb,
+        "peak_rss_delta_kb": sampler.peak_kb - baseline_kb,
+        "db_round_trips": CountingCursor.round_trips,
+        "db_statements": CountingCursor.statements,
+        "server_requests": served["requests"],
+        "server_failures": served["failures"],
+        "stages": run_metrics.get("stages", {}),
+        "counters": run_metrics.get("counters", {})
+    }
+
+
+def aggregate(runs):
+    keys = ("wall_seconds", "tenders_per_second", "peak_rss_kb", "db_round_trips", "db_statements")
+    return {
+        key: statistics.median(run[key] for run in runs if run[key] is not None)
+        for key in keys
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark scrape_pages end to end against offline stand-ins.")
+    parser.add_argument(
+        "--db-url",
+        default=os.environ.get("BENCH_DB_URL"),
+        help="Scratch Postgres database (default: $BENCH_DB_URL)."
+    )
+    parser.add_argument("--schema", default="scrape_bench", help="Schema recreated for every repeat.")
+    parser.add_argument("--pages", type=int, default=5, help="Listing pages to scrape (N).")
+    parser.add_argument("--tenders", type=int, default=100, help="Tenders spread across those pages (M).")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--mode", choices=("ssr", "next", "spa"), default="ssr", help="Fixture page flavour.")
+    parser.add_argument("--no-details", action="store_true")
+    parser.add_argument("--detail-concurrency", type=int, default=4)
+    parser.add_argument("--politeness-delay", type=float, default=0.0)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--failure-rate", type=float, default=0.02)
+    parser.add_argument("--output", help="Also write the JSON document to this file.")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    if not args.db_url:
+        raise SystemExit("Pass --db-url or set BENCH_DB_URL to a scratch Postgres database.")
+    per_page = max(1, -(-args.tenders // args.pages))
+    process, base_url = await start_server(args, per_page)
+
+    # scraper_lib reads its configuration at import time.
+    os.environ["SCRAPER_BASE_URL"] = base_url
+    os.environ["DB_URL"] = args.db_url
+    os.environ.setdefault("DB_SSLMODE", "disable")
+    from db import close_pool, open_pool
+
+    runs = []
+    try:
+        await open_pool(
+            args.db_url,
+            max_size=args.detail_concurrency + 2,
+            connect_kwargs={
+                "cursor_factory": CountingCursor,
+                "options": f"-c search_path={args.schema}"
+            }
+        )
+        for _ in range(args.repeat):
+            runs.append(await run_once(args, process.pid, base_url))
+    finally:
+        await close_pool()
+        process.kill()
+        await process.wait()
+
+    result = {
+        "benchmark": "scrape",
+        "revision": git_revision(),
+        "config": {
+            "pages": args.pages,
+            "per_page": per_page,
+            "tenders": per_page * args.pages,
+            "mode": args.mode,
+            "details": not args.no_details,
+            "detail_concurrency": args.detail_concurrency,
+            "politeness_delay": args.politeness_delay,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "failure_rate": args.failure_rate,
+            "repeat": args.repeat
+        },
+        "median": aggregate(runs),
+        "runs": runs
+    }
+    document = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(document + "\n")
+    print(document)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
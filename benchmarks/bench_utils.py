@@ -0,0 +1,97 @@
+import asyncio
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+def _read_status_kb(pid, field):
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="utf-8") as file:
+            for line in file:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        pass
+    return 0
+
+
+def _children(pid):
+    children = []
+    try:
+        entries = os.listdir("/proc")
+    except FileNotFoundError:
+        return children
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r", encoding="utf-8") as file:
+                fields = file.read().rsplit(")", 1)[1].split()
+        except (FileNotFoundError, ProcessLookupError, PermissionError, IndexError):
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return children
+
+
+def process_tree_rss_kb(pid=None, exclude=()):
+    # Resident memory of a process plus all its descendants (e.g. Chromium).
+    # Linux only; returns 0 where /proc is unavailable.
+    pid = pid or os.getpid()
+    total = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        if current in exclude:
+            continue
+        total += _read_status_kb(current, "VmRSS")
+        stack.extend(_children(current))
+    return total
+
+
+class PeakRssSampler:
+    def __init__(self, interval=0.05, exclude=()):
+        self.interval = interval
+        self.exclude = set(exclude)
+        self.peak_kb = 0
+        self._task = None
+
+    async def _run(self):
+        while True:
+            self.peak_kb = max(self.peak_kb, process_tree_rss_kb(exclude=self.exclude))
+            await asyncio.sleep(self.interval)
+
+    async def __aenter__(self):
+        self.peak_kb = process_tree_rss_kb(exclude=self.exclude)
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self.peak_kb = max(self.peak_kb, process_tree_rss_kb(exclude=self.exclude))
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Stopwatch:
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed = time.perf_counter() - self.started
@@ -0,0 +1,336 @@
+import argparse
+import asyncio
+import html
+import json
+import os
+import random
+from datetime import date, timedelta
+
+from aiohttp import web
+
+# Offline stand-in for tender.2merkato.com. Pages reproduce the markup the
+# scraper's selectors expect, wrapped in enough layout noise to be realistic.
+#
+# Modes:
+#   ssr  - data rendered in the HTML (HTTP fast path works)
+#   next - data only in a __NEXT_DATA__ JSON payload
+#   spa  - empty shell filled in by JavaScript (needs the browser fallback)
+#
+# Listing and detail responses can be delayed (--latency-ms, --jitter-ms) and
+# made to fail with a 503 (--failure-rate). Failures are decided per path and
+# attempt number, so the same requests fail on every run and retries succeed.
+
+MODES = ("ssr", "next", "spa")
+
+WORDS = (
+    "supply delivery construction road water building maintenance office furniture "
+    "vehicle medical equipment consultancy printing cleaning security services rehabilitation "
+    "electrical installation software network training uniform fuel laboratory chemicals"
+).split()
+COMPANIES = (
+    "Ethiopian Roads Authority", "Addis Ababa Water and Sewerage", "Commercial Bank of Ethiopia",
+    "Ethiopian Electric Utility", "Ministry of Health", "Oromia Bureau of Finance"
+)
+REGIONS = ("Addis Ababa", "Oromia", "Amhara", "Tigray", "Sidama", "Somali")
+CATEGORIES = (
+    "Construction and Water Works", "Road Construction", "Office Furniture", "Vehicles",
+    "Medical Equipment", "IT Equipment", "Consultancy", "Printing and Stationery"
+)
+# Static assets a real page pulls in; the lean browser profile should block
+# all of them. Third-party ones are served from "localhost" while the site
+# itself is addressed as 127.0.0.1, so they count as a different host.
+ASSETS = {
+    "app.css": ("text/css", 60_000),
+    "font.woff2": ("font/woff2", 45_000),
+    "banner.jpg": ("image/jpeg", 120_000),
+    "logo.png": ("image/png", 15_000),
+    "analytics.js": ("application/javascript", 80_000)
+}
+LAYOUT_HEAD = (
+    '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>{title}</title>'
+    '<link rel="stylesheet" href="/static/app.css">'
+    '<link rel="preload" as="font" type="font/woff2" crossorigin href="/static/font.woff2">'
+    '<script src="{third_party}/static/analytics.js" async></script></head>'
+    '<body><div id="__next"><header class="flex items-center justify-between px-6 py-4 bg-white shadow">'
+    '<a class="text-2xl font-bold text-blue-700" href="/">2merkato</a><nav class="hidden md:flex gap-x-6">'
+    + "".join(f'<a class="text-sm text-gray-600 hover:text-blue-600" href="/{w}">{w.title()}</a>' for w in WORDS[:8])
+    + '</nav><img src="/static/logo.png" alt=""></header><img class="w-full" src="/static/banner.jpg" alt="">'
+)
+LAYOUT_FOOT = (
+    '<footer class="mt-12 border-t py-8 text-center text-xs text-gray-500">'
+    + "".join(f'<p class="inline-block px-2">{w.title()} tenders</p>' for w in WORDS[:10])
+    + "</footer></div>{payload}</body></html>"
+)
+
+
+def _rng(seed):
+    return random.Random(seed)
+
+
+def tender_id_for(page_num, index, per_page):
+    return f"fx{(page_num - 1) * per_page + index + 1:07d}"
+
+
+def tender_record(tender_id, today=None):
+    rng = _rng(tender_id)
+    today = today or date.today()
+    number = int(tender_id[2:])
+    published = today - timedelta(days=number // 25)
+    closing = published + timedelta(days=rng.randint(10, 30))
+    opening = closing + timedelta(days=rng.randint(0, 2))
+    return {
+        "id": tender_id,
+        "title": " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 9))).capitalize(),
+        "company": rng.choice(COMPANIES),
+        "region": rng.choice(REGIONS),
+        "bidding_type": rng.choice(("Open", "Restricted", "National Competitive")),
+        "categories": rng.sample(CATEGORIES, rng.randint(1, 3)),
+        "published_on": published.strftime("%b %d, %Y"),
+        "bid_closing_date": closing.strftime("%b %d, %Y") + " (10:00 AM)",
+        "bid_opening_date": opening.strftime("%b %d, %Y") + " (10:30 AM)",
+        "bid_document_price": f"ETB {rng.randint(1, 20) * 100}.00",
+        "bid_bond": f"ETB {rng.randint(10, 500) * 1000:,}.00",
+        "description": [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(15, 40))).capitalize() + "."
+            for _ in range(rng.randint(3, 8))
+        ]
+    }
+
+
+def _info_row(label, value, row_class="flex gap-x-4 gap-y-0 p-2 flex-wrap"):
+    return (
+        f'<div class="{row_class}"><div class="font-medium">{html.escape(label)}</div>'
+        f'<div class="text-gray-700">{html.escape(value)}</div></div>'
+    )
+
+
+def render_listing_items(records):
+    parts = []
+    for record in records:
+        parts.append(
+            '<div class="rounded-md border border-gray-200 bg-white p-4 mb-4 shadow-sm">'
+            '<div class="flex items-start justify-between">'
+            '<h3 class="font-medium text-lg tracking-wide leading-6">'
+            f'<a href="/tenders/{record["id"]}">{html.escape(record["title"])}</a></h3>'
+            '<span class="rounded bg-green-100 px-2 text-xs text-green-800">Free</span></div>'
+            '<div class="mt-2 grid grid-cols-1 md:grid-cols-3">'
+            + _info_row("Bid Closing Date", record["bid_closing_date"], "flex gap-x-4 text-sm")
+            + _info_row("Bid Opening Date", record["bid_opening_date"], "flex gap-x-4 text-sm")
+            + _info_row("Published On", record["published_on"], "flex gap-x-4 text-sm")
+            + "</div></div>"
+        )
+    return "".join(parts)
+
+
+def render_detail_body(record):
+    rows = [
+        ("Bid Closing Date:", record["bid_closing_date"]),
+        ("Bid Opening Date:", record["bid_opening_date"]),
+        ("Published On:", record["published_on"]),
+        ("Bid Document Price:", record["bid_document_price"]),
+        ("Bid Bond:", record["bid_bond"]),
+        ("Region:", record["region"]),
+        ("Bidding:", record["bidding_type"]),
+        ("Source:", "Addis Zemen"),
+        ("Language:", "English")
+    ]
+    tree = "".join(
+        '<div class="ant-tree-treenode"><span class="ant-tree-switcher"></span>'
+        f'<span class="ant-tree-title"><a href="/categories/{i}">{html.escape(name)}</a></span></div>'
+        for i, name in enumerate(record["categories"])
+    )
+    return (
+        '<main class="container mx-auto px-4"><div class="rounded-md bg-white p-6 shadow">'
+        f'<h1 class="text-xl font-semibold">{html.escape(record["title"])}</h1>'
+        '<h3 class="text-lg font-medium m-0 underline text-blue-600">'
+        f'<a href="/companies/1">{html.escape(record["company"])}</a></h3>'
+        '<div class="mt-4 divide-y">' + "".join(_info_row(label, value) for label, value in rows) + "</div>"
+        '<div class="mt-4"><h4 class="font-medium">Filed under</h4>'
+        f'<div class="ant-tree"><div class="ant-tree-list">{tree}</div></div></div>'
+        '<article class="prose mt-6">'
+        + "".join(f"<p>{html.escape(paragraph)}</p>" for paragraph in record["description"])
+        + "</article></div></main>"
+    )
+
+
+def _page(title, body, mode, next_props, third_party=""):
+    if mode == "spa":
+        script = f"<script>document.getElementById('app').innerHTML = {json.dumps(body)};</script>"
+        body, payload = '<div id="app"></div>', script
+    elif mode == "next":
+        payload = (
+            '<script id="__NEXT_DATA__" type="application/json">'
+            + json.dumps({"props": {"pageProps": next_props}, "page": "/tenders"})
+            + "</script>"
+        )
+        body = '<div id="app"></div>'
+    else:
+        payload = ""
+    head = LAYOUT_HEAD.format(title=html.escape(title), third_party=third_party)
+    return head + body + LAYOUT_FOOT.format(payload=payload)
+
+
+def render_listing_page(page_num, per_page=20, mode="ssr", third_party=""):
+    records = [tender_record(tender_id_for(page_num, i, per_page)) for i in range(per_page)]
+    body = '<main class="container mx-auto px-4"><div class="flex flex-col">' + render_listing_items(records) + "</div></main>"
+    next_props = {"tenders": [
+        {
+            "slug": r["id"],
+            "title": r["title"],
+            "bidClosingDate": r["bid_closing_date"],
+            "bidOpeningDate": r["bid_opening_date"],
+            "publishedOn": r["published_on"]
+        }
+        for r in records
+    ]}
+    return _page(f"Free tenders - page {page_num}", body, mode, next_props, third_party)
+
+
+def render_detail_page(tender_id, mode="ssr", third_party=""):
+    record = tender_record(tender_id)
+    next_props = {"seo": {
+        "title": f"{record['title']} | Tenders",
+        "description": "Find the latest tenders, bids and procurement notices.",
+        "canonical": f"/tenders/{tender_id}"
+    }, "tender": {
+        "slug": tender_id,
+        "title": record["title"],
+        "description": "".join(f"<p>{html.escape(p)}</p>" for p in record["description"]),
+        "company": {"name": record["company"]},
+        "categories": [{"name": name} for name in record["categories"]],
+        "bidClosingDate": record["bid_closing_date"],
+        "bidOpeningDate": record["bid_opening_date"],
+        "publishedOn": record["published_on"],
+        "bidDocumentPrice": record["bid_document_price"],
+        "bidBond": record["bid_bond"],
+        "region": record["region"],
+        "biddingType": record["bidding_type"]
+    }}
+    return _page(record["title"], render_detail_body(record), mode, next_props, third_party)
+
+
+def should_fail(path, attempt, failure_rate):
+    return failure_rate > 0 and _rng(f"{path}#{attempt}").random() < failure_rate
+
+
+def build_app(mode="ssr", per_page=20, pages=50, latency_ms=0, jitter_ms=0, failure_rate=0.0):
+    attempts = {}
+    stats = {"requests": 0, "failures": 0}
+
+    def third_party(request):
+        return f"http://localhost:{request.url.port}"
+
+    @web.middleware
+    async def inject_faults(request, handler):
+        if request.path.startswith(("/static/", "/_")):
+            return await handler(request)
+        path = request.path_qs
+        attempt = attempts[path] = attempts.get(path, 0) + 1
+        stats["requests"] += 1
+        delay = latency_ms + (_rng(f"{path}@{attempt}").uniform(0, jitter_ms) if jitter_ms else 0)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        if should_fail(path, attempt, failure_rate):
+            stats["failures"] += 1
+            raise web.HTTPServiceUnavailable()
+        return await handler(request)
+
+    async def server_stats(request):
+        return web.json_response(stats)
+
+    async def reset(request):
+        # Replays the same failure sequence, e.g. between benchmark repeats.
+        attempts.clear()
+        stats.update(requests=0, failures=0)
+        return web.json_response(stats)
+
+    async def listing(request):
+        try:
+            page_num = int(request.query.get("page", "1"))
+        except ValueError:
+            page_num = 1
+        if page_num > pages:
+            return web.Response(text=_page("No tenders", "<main></main>", "ssr", {}), content_type="text/html")
+        page = render_listing_page(page_num, per_page, mode, third_party(request))
+        return web.Response(text=page, content_type="text/html")
+
+    async def detail(request):
+        page = render_detail_page(request.match_info["tender_id"], mode, third_party(request))
+        return web.Response(text=page, content_type="text/html")
+
+    async def asset(request):
+        name = request.match_info["name"]
+        if name not in ASSETS:
+            raise web.HTTPNotFound()
+        content_type, size = ASSETS[name]
+        return web.Response(body=b"/" * size, content_type=content_type)
+
+    app = web.Application(middlewares=[inject_faults])
+    app.router.add_get("/_stats", server_stats)
+    app.router.add_post("/_reset", reset)
+    app.router.add_get("/tenders/free", listing)
+    app.router.add_get("/tenders/{tender_id}", detail)
+    app.router.add_get("/static/{name}", asset)
+    return app
+
+
+async def start_fixture_server(host="127.0.0.1", port=0, **app_options):
+    runner = web.AppRunner(build_app(**app_options), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}/tenders/free?page={{}}"
+
+
+def dump_fixtures(directory, mode="ssr"):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "listing_page.html"), "w", encoding="utf-8") as file:
+        file.write(render_listing_page(1, mode=mode))
+    with open(os.path.join(directory, "detail_page.html"), "w", encoding="utf-8") as file:
+        file.write(render_detail_page(tender_id_for(1, 0, 20), mode=mode))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve offline tender listing/detail fixtures.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="Port to bind (0 picks a free one).")
+    parser.add_argument("--mode", choices=MODES, default="ssr")
+    parser.add_argument("--per-page", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=50, help="Listing pages before the site runs out.")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Delay added to every page response.")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Extra random delay, up to this much.")
+    parser.add_argument(
+        "--failure-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of page requests answered with 503 (deterministic per path and attempt)."
+    )
+    parser.add_argument("--dump", metavar="DIR", help="Write sample listing/detail pages to DIR and exit.")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    if args.dump:
+        dump_fixtures(args.dump, mode=args.mode)
+        return
+    runner, base_url = await start_fixture_server(
+        args.host,
+        args.port,
+        mode=args.mode,
+        per_page=args.per_page,
+        pages=args.pages,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate
+    )
+    print(f"READY {base_url}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,322 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+from psycopg import sql
+from telegram import Update
+from telegram.request import BaseRequest
+
+from bench_export import seed
+from bench_scrape import CountingCursor, git_revision
+from replay_updates import percentiles
+
+# Drives the bot's registered handlers with synthetic updates from N simulated
+# chats, against a seeded local Postgres schema and a stub Bot API that
+# records every call (and can answer sends with 429s). Each level in --chats
+# starts from cold caches and reports handler latency percentiles, DB round
+# trips per update and messages sent per update. Prints one JSON document.
+#
+#   python benchmarks/load_test.py --db-url postgresql://localhost/bench --chats 1,10,50,100
+#
+# The schema named by --schema is dropped and recreated; point --db-url at a
+# scratch database. Nothing is sent to Telegram.
+
+SEND_ENDPOINTS = {"sendMessage", "editMessageText", "sendDocument"}
+BOT_USER = {
+    "id": 1, "is_bot": True, "first_name": "Load", "username": "load_test_bot",
+    "can_join_groups": True, "can_read_all_group_messages": False, "supports_inline_queries": False
+}
+# Relative weights of what simulated users do.
+ACTIONS = {
+    "range_today": 35,
+    "range_week": 10,
+    "range_page": 10,
+    "details": 30,
+    "status": 10,
+    "start": 5
+}
+
+
+class StubBotApi(BaseRequest):
+    # Stands in for the HTTP transport to api.telegram.org. flood_rate of the
+    # sends are answered with 429 / retry_after, like Telegram's flood control.
+    def __init__(self, latency=0.0, flood_rate=0.0, retry_after=1, seed=0):
+        self.latency = latency
+        self.flood_rate = flood_rate
+        self.retry_after = retry_after
+        self.calls = Counter()
+        self.floods = 0
+        self._random = random.Random(seed)
+        self._message_ids = itertools.count(1000)
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    @property
+    def read_timeout(self):
+        return 5.0
+
+    def reset(self):
+        self.calls.clear()
+        self.floods = 0
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None, write_timeout=None,
+                         connect_timeout=None, pool_timeout=None):
+        endpoint = url.rsplit("/", 1)[-1]
+        params = request_data.parameters if request_data is not None else {}
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if endpoint in SEND_ENDPOINTS and self._random.random() < self.flood_rate:
+            self.floods += 1
+            return 429, json.dumps({
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after}
+            }).encode()
+        self.calls[endpoint] += 1
+        if endpoint == "getMe":
+            result = BOT_USER
+        elif endpoint in SEND_ENDPOINTS:
+            result = {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": params.get("chat_id", 0), "type": "private"},
+                "text": str(params.get("text", ""))[:100]
+            }
+        else:
+            result = True
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+
+def command_update(update_id, chat_id, text):
+    user = {"id": chat_id, "is_bot": False, "first_name": "Load"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": user,
+            "text": text,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        }
+    }
+
+
+def callback_update(update_id, chat_id, data):
+    user = {"id": chat_id, "is_bot": False, "first_name": "Load"}
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": user,
+            "chat_instance": str(chat_id),
+            "data": data,
+            "message": {
+                "message_id": 1,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": BOT_USER,
+                "text": "menu"
+            }
+        }
+    }
+
+
+def next_action(rng, update_id, chat_id, tender_ids):
+    kind = rng.choices(list(ACTIONS), weights=list(ACTIONS.values()))[0]
+    if kind == "range_today":
+        return kind, callback_update(update_id, chat_id, "range:1")
+    if kind == "range_week":
+        return kind, callback_update(update_id, chat_id, "range:7")
+    if kind == "range_page":
+        return kind, callback_update(update_id, chat_id, f"range:7:{rng.randint(1, 5)}")
+    if kind == "details":
+        # Skewed towards the newest tenders, like taps on a shared digest.
+        index = min(len(tender_ids) - 1, int(rng.expovariate(1 / 20)))
+        return kind, callback_update(update_id, chat_id, f"details:{tender_ids[index]}")
+    if kind == "status":
+        return kind, command_update(update_id, chat_id, "/status")
+    return kind, command_update(update_id, chat_id, "/start")
+
+
+async def simulate_chat(app, chat_id, args, rng, update_ids, tender_ids, samples):
+    await asyncio.sleep(rng.uniform(0, args.think_ms / 1000))
+    for _ in range(args.actions):
+        kind, payload = next_action(rng, next(update_ids), chat_id, tender_ids)
+        update = Update.de_json(payload, app.bot)
+        started = time.perf_counter()
+        await app.process_update(update)
+        samples.append((kind, time.perf_counter() - started))
+        await asyncio.sleep(rng.uniform(0.5, 1.5) * args.think_ms / 1000)
+
+
+def reset_bot_state(app, bot):
+    # Every level starts cold, so levels are comparable.
+    app.bot_data["tender_cache"] = bot.LRUCache(bot.CACHE_MAX_ENTRIES, bot.CACHE_TTL_SECONDS)
+    app.bot_data["details_cache"] = bot.LRUCache(bot.CACHE_MAX_ENTRIES, bot.CACHE_TTL_SECONDS)
+    app.bot_data["flights"] = bot.SingleFlight(bot.COALESCE_TTL_SECONDS, bot.CACHE_MAX_ENTRIES)
+    app.bot_data["request_throttle"] = bot.RequestThrottle(bot.CHAT_REQUEST_RATE, bot.CHAT_REQUEST_BURST)
+
+
+async def run_level(app, bot, stub, chats, level, args, tender_ids, errors):
+    reset_bot_state(app, bot)
+    stub.reset()
+    errors.clear()
+    CountingCursor.reset()
+    limiter_before = dict(app.bot.rate_limiter.stats)
+    samples = []
+    rng = random.Random(args.seed + level)
+    update_ids = itertools.count(1_000_000 * (level + 1))
+    first_chat = 500_000_000 + 100_000 * level
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        simulate_chat(app, first_chat + index, args, random.Random(rng.random()), update_ids, tender_ids, samples)
+        for index in range(chats)
+    ))
+    wall = time.perf_counter() - started
+    updates = len(samples)
+    sends = sum(stub.calls[endpoint] for endpoint in SEND_ENDPOINTS)
+    by_kind = {}
+    for kind, latency in samples:
+        by_kind.setdefault(kind, []).append(latency)
+    return {
+        "chats": chats,
+        "updates": updates,
+        "wall_seconds": round(wall, 3),
+        "updates_per_second": round(updates / wall, 2) if wall else None,
+        "latency_ms": percentiles([latency for _, latency in samples]),
+        "latency_ms_by_action": {kind: percentiles(values) for kind, values in sorted(by_kind.items())},
+        "db_queries_per_update": round(CountingCursor.round_trips / updates, 3) if updates else None,
+        "messages_per_update": round(sends / updates, 3) if updates else None,
+        "bot_api_calls": dict(stub.calls),
+        "flood_429s": stub.floods,
+        # Sends held back by the outgoing per-chat/global limits and 429 retries.
+        "rate_limiter": {key: value - limiter_before[key] for key, value in app.bot.rate_limiter.stats.items()},
+        "throttled": app.bot_data["request_throttle"].throttled,
+        "coalescing": app.bot_data["flights"].stats(),
+        "handler_errors": len(errors)
+    }
+
+
+async def main(args):
+    os.environ["DB_URL"] = args.db_url
+    os.environ.setdefault("DB_SSLMODE", "disable")
+    os.environ.setdefault("TELEGRAM_TOKEN", "123456:load-test")
+    os.environ["REPLICA_PATH"] = args.replica or "off"
+    # bot reads its configuration at import time.
+    import bot
+    from db import close_pool, connection, open_pool
+    from scraper_lib import init_db, rerender_stored_messages
+
+    await open_pool(
+        args.db_url,
+        max_size=args.pool_size,
+        connect_kwargs={"cursor_factory": CountingCursor, "options": f"-c search_path={args.schema}"}
+    )
+    async with connection() as conn:
+        await conn.execute(sql.SQL("DROP SCHEMA IF EXISTS {} CASCADE").format(sql.Identifier(args.schema)))
+        await conn.execute(sql.SQL("CREATE SCHEMA {}").format(sql.Identifier(args.schema)))
+    await init_db()
+    async with connection() as conn:
+        await seed(conn, 0, args.tenders)
+        await conn.execute("""
+            INSERT INTO scrape_status (run_at, pages_scraped, tenders_saved)
+            VALUES (now() AT TIME ZONE 'utc', 1, %s)
+        """, (args.tenders,))
+    await rerender_stored_messages()
+    async with connection() as conn:
+        await conn.execute("ANALYZE")
+        cur = await conn.execute("SELECT id FROM tenders1 ORDER BY published_date DESC, id LIMIT 500")
+        tender_ids = [row[0] for row in await cur.fetchall()]
+
+    stub = StubBotApi(args.api_latency_ms / 1000, args.flood_rate, args.retry_after, args.seed)
+    app = bot.build_application(request=stub)
+    errors = []
+
+    async def count_error(update, context):
+        errors.append(repr(context.error))
+
+    app.add_error_handler(count_error)
+    levels = []
+    try:
+        # No app.start(): the job queue (cache refresh, notification delivery)
+        # stays off so it doesn't add queries to the measured window.
+        await app.initialize()
+        await app.post_init(app)
+        if app.bot_data.get("replica") is not None:
+            await app.bot_data["replica"].sync()
+        for level, chats in enumerate(int(value) for value in args.chats.split(",")):
+            result = await run_level(app, bot, stub, chats, level, args, tender_ids, errors)
+            print(json.dumps({key: result[key] for key in ("chats", "updates", "latency_ms")}), file=sys.stderr)
+            levels.append(result)
+    finally:
+        await app.post_shutdown(app)
+        await app.shutdown()
+        await close_pool()
+
+    if not args.keep:
+        await open_pool(args.db_url, max_size=1)
+        async with connection() as conn:
+            await conn.execute(sql.SQL("DROP SCHEMA {} CASCADE").format(sql.Identifier(args.schema)))
+        await close_pool()
+
+    document = json.dumps({
+        "benchmark": "load_test",
+        "revision": git_revision(),
+        "config": {
+            "tenders": args.tenders,
+            "actions_per_chat": args.actions,
+            "think_ms": args.think_ms,
+            "api_latency_ms": args.api_latency_ms,
+            "flood_rate": args.flood_rate,
+            "replica": bool(args.replica),
+            "pool_size": args.pool_size,
+            "action_weights": ACTIONS
+        },
+        "levels": levels
+    }, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(document + "\n")
+    print(document)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load-test the bot's handlers against a stub Bot API.")
+    parser.add_argument(
+        "--db-url",
+        default=os.environ.get("BENCH_DB_URL"),
+        help="Scratch Postgres database (default: $BENCH_DB_URL)."
+    )
+    parser.add_argument("--schema", default="load_test", help="Schema recreated for the run.")
+    parser.add_argument("--tenders", type=int, default=5000, help="Synthetic tenders to seed.")
+    parser.add_argument("--chats", default="1,10,50,100", help="Comma-separated simulated chat counts.")
+    parser.add_argument("--actions", type=int, default=20, help="Updates each simulated chat sends.")
+    parser.add_argument("--think-ms", type=float, default=1000, help="Mean pause between a chat's updates.")
+    parser.add_argument("--api-latency-ms", type=float, default=30, help="Stub Bot API response time.")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="Share of sends answered with a 429.")
+    parser.add_argument("--retry-after", type=int, default=1, help="retry_after of the emulated 429s.")
+    parser.add_argument("--replica", help="Serve reads from a local replica at this path (default: off).")
+    parser.add_argument("--pool-size", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded schema afterwards.")
+    parser.add_argument("--output", help="Also write the JSON document to this file.")
+    args = parser.parse_args()
+    if not args.db_url:
+        raise SystemExit("Pass --db-url or set BENCH_DB_URL to a scratch Postgres database.")
+    return args
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,133 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import statistics
+import time
+
+import aiohttp
+
+from bench_utils import REPO_ROOT
+from metrics import percentile
+
+# POSTs recorded Telegram Update payloads to a bot running in webhook mode
+# (BOT_MODE=webhook) and reports the HTTP acknowledgement latency seen here
+# alongside the processing latency the server reports on /healthz.
+#
+#   BOT_MODE=webhook WEBHOOK_SECRET=s3cret python bot.py
+#   python benchmarks/replay_updates.py --url http://127.0.0.1:8443/telegram --secret s3cret --repeat 50
+#
+# Every replayed copy gets a fresh update_id, and each pass over the file
+# comes from its own chat (--chats caps how many), so the per-chat send limit
+# doesn't dominate. Handlers really run and reply to those chat ids; use a
+# test token or a stubbed Bot API.
+
+DEFAULT_UPDATES = os.path.join(REPO_ROOT, "benchmarks", "fixtures", "updates.jsonl")
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def load_updates(path):
+    with open(path, "r", encoding="utf-8") as file:
+        text = file.read().strip()
+    if text.startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def with_chat(payload, chat_id):
+    # Points the user and chat objects of a recorded update at chat_id.
+    if isinstance(payload, list):
+        return [with_chat(item, chat_id) for item in payload]
+    if not isinstance(payload, dict):
+        return payload
+    result = {}
+    for key, value in payload.items():
+        if key in ("chat", "from") and isinstance(value, dict) and not value.get("is_bot"):
+            value = dict(value, id=chat_id)
+        result[key] = with_chat(value, chat_id)
+    return result
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    return {
+        "p50": round(percentile(values, 0.5) * 1000, 2),
+        "p95": round(percentile(values, 0.95) * 1000, 2),
+        "p99": round(percentile(values, 0.99) * 1000, 2),
+        "mean": round(statistics.fmean(values) * 1000, 2)
+    }
+
+
+async def wait_until_idle(session, health_url, expected, timeout=60.0):
+    # Polls /healthz until the server has processed everything it accepted.
+    deadline = time.monotonic() + timeout
+    while True:
+        async with session.get(health_url) as response:
+            stats = await response.json()
+        if stats["processed"] >= expected or time.monotonic() > deadline:
+            return stats
+        await asyncio.sleep(0.1)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Replay recorded updates against the bot's webhook server.")
+    parser.add_argument("--url", default="http://127.0.0.1:8443/telegram", help="Webhook endpoint.")
+    parser.add_argument("--secret", default=os.environ.get("WEBHOOK_SECRET"), help="Default: $WEBHOOK_SECRET.")
+    parser.add_argument("--updates", default=DEFAULT_UPDATES, help="JSON lines (or a JSON array) of Update payloads.")
+    parser.add_argument("--repeat", type=int, default=10, help="Times to replay the whole file.")
+    parser.add_argument("--concurrency", type=int, default=8, help="POSTs in flight at once.")
+    parser.add_argument("--chats", type=int, default=100, help="Distinct chat ids the passes rotate through.")
+    parser.add_argument("--first-chat-id", type=int, default=900_000_000)
+    parser.add_argument("--first-update-id", type=int, default=1_000_000)
+    args = parser.parse_args()
+    if not args.secret:
+        raise SystemExit("Pass --secret or set WEBHOOK_SECRET.")
+
+    payloads = load_updates(args.updates)
+    update_ids = itertools.count(args.first_update_id)
+    jobs = [
+        dict(with_chat(payload, args.first_chat_id + repeat % max(1, args.chats)), update_id=next(update_ids))
+        for repeat in range(args.repeat)
+        for payload in payloads
+    ]
+    health_url = args.url.split("/", 3)
+    health_url = "/".join(health_url[:3]) + "/healthz"
+
+    latencies = []
+    statuses = {}
+    semaphore = asyncio.Semaphore(max(1, args.concurrency))
+
+    async with aiohttp.ClientSession(headers={SECRET_HEADER: args.secret}) as session:
+        async with session.get(health_url) as response:
+            before = await response.json()
+
+        async def post(payload):
+            async with semaphore:
+                started = time.perf_counter()
+                async with session.post(args.url, json=payload) as response:
+                    await response.read()
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(post(payload) for payload in jobs))
+        sent_seconds = time.perf_counter() - started
+        after = await wait_until_idle(session, health_url, before["processed"] + statuses.get(200, 0))
+        total_seconds = time.perf_counter() - started
+
+    print(json.dumps({
+        "benchmark": "webhook_replay",
+        "updates": len(jobs),
+        "statuses": statuses,
+        "send_seconds": round(sent_seconds, 3),
+        "drain_seconds": round(total_seconds, 3),
+        "updates_per_second": round(len(jobs) / total_seconds, 2) if total_seconds else None,
+        "ack_latency_ms": percentiles(latencies),
+        "server": after
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,219 +1,487 @@
+import asyncio
 import html
 import json
 import logging
-import re
+import time
 from datetime import datetime, timedelta
 
-import psycopg
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ApplicationBuilder, CommandHandler, CallbackContext, CallbackQueryHandler
-from config_loader import get_required_config
+from psycopg import sql
+from telegram import InputFile, Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest, Forbidden, TelegramError
+from telegram.ext import (
+    ApplicationBuilder,
+    ApplicationHandlerStop,
+    CallbackContext,
+    CallbackQueryHandler,
+    CommandHandler,
+    TypeHandler
+)
+from cache import DetailRecord, LRUCache, SingleFlight, TenderRecord
+from config_loader import get_optional_config, get_required_config
+from db import SEARCH_CONFIG, close_pool, connection, open_pool
+from export import export_to_tempfile
+from formatting import DETAILS_UNAVAILABLE, RENDERER_VERSION, render_tender_details, render_tender_summary, truncate
+from rate_limiter import RequestThrottle, TelegramRateLimiter
+from replica import close_replica, get_replica, open_replica
+from retention import decompress_description
+from subscriptions import (
+    MAX_SUBSCRIPTIONS_PER_CHAT,
+    add_subscription,
+    claim_notifications,
+    list_subscriptions,
+    mark_sent,
+    parse_subscription,
+    release_claim,
+    release_stale_claims,
+    remove_chat,
+    remove_subscription
+)
 
 # ---------- CONFIG ----------
 CONFIG = get_required_config(["DB_URL", "TELEGRAM_TOKEN"])
 DB_URL = CONFIG["DB_URL"]
 TELEGRAM_TOKEN = CONFIG["TELEGRAM_TOKEN"]
 
+CACHE_MAX_ENTRIES = get_optional_config("CACHE_MAX_ENTRIES", 2000, int)
+CACHE_TTL_SECONDS = get_optional_config("CACHE_TTL_SECONDS", 600.0, float)
+CACHE_REFRESH_SECONDS = get_optional_config("CACHE_REFRESH_SECONDS", 60.0, float)
+# Identical concurrent reads (date digests, details, /status) share one query;
+# results are reused for COALESCE_TTL_SECONDS or until a new scrape lands.
+COALESCE_TTL_SECONDS = get_optional_config("COALESCE_TTL_SECONDS", 30.0, float)
+# Handler calls allowed per user per chat: a sustained rate plus a burst.
+CHAT_REQUEST_RATE = get_optional_config("CHAT_REQUEST_RATE", 1.0, float)
+CHAT_REQUEST_BURST = get_optional_config("CHAT_REQUEST_BURST", 5, int)
+NOTIFY_INTERVAL_SECONDS = get_optional_config("NOTIFY_INTERVAL_SECONDS", 30.0, float)
+NOTIFY_BATCH_LIMIT = get_optional_config("NOTIFY_BATCH_LIMIT", 200, int)
+# Claims older than this are closed unsent; keep it well above a batch's send time.
+NOTIFY_CLAIM_TIMEOUT_SECONDS = get_optional_config("NOTIFY_CLAIM_TIMEOUT_SECONDS", 600.0, float)
+# "polling" (default) or "webhook". Webhook mode serves updates on an embedded
+# aiohttp server and needs WEBHOOK_SECRET; WEBHOOK_URL is the public base URL
+# to register with Telegram (leave unset to POST updates to it directly).
+BOT_MODE = get_optional_config("BOT_MODE", "polling")
+WEBHOOK_URL = get_optional_config("WEBHOOK_URL")
+WEBHOOK_LISTEN = get_optional_config("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = get_optional_config("WEBHOOK_PORT", 8443, int)
+WEBHOOK_PATH = get_optional_config("WEBHOOK_PATH", "/telegram")
+WEBHOOK_CONCURRENCY = get_optional_config("WEBHOOK_CONCURRENCY", 16, int)
+EXPORT_CONCURRENCY = get_optional_config("EXPORT_CONCURRENCY", 2, int)
+# Local SQLite copy that answers listing/detail/status reads; "off" disables it.
+REPLICA_PATH = get_optional_config("REPLICA_PATH", "data/replica.sqlite3")
+if REPLICA_PATH.lower() == "off":
+    REPLICA_PATH = None
+
+PAGE_SIZE = 10
+METRICS_BASELINE_RUNS = 10
+# Only the newest matches are ranked so common words stay cheap on large tables.
+SEARCH_MAX_RESULTS = 500
+MAX_SAVED_SEARCHES = 20
+RANGE_LABELS = {1: "today", 2: "in the last two days", 7: "in the last week"}
+# /filter option lists: the most used values per field, reloaded after a TTL.
+FILTER_OPTION_LIMIT = 24
+FILTER_OPTIONS_TTL_SECONDS = 600.0
+CLOSING_WINDOWS = (3, 7, 14, 30)
+# Telegram rejects bot uploads above 50 MB.
+EXPORT_MAX_BYTES = 50 * 1024 * 1024
+EXPORT_DEFAULT_DAYS = 7
+
 # ---------- LOGGING ----------
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     level=logging.INFO
 )
 
-def _truncate(text, max_len=1800):
-    if text and len(text) > max_len:
-        return text[: max_len - 3].rstrip() + "..."
-    return text
-
-def _normalize_date_text(value):
-    if not value:
-        return ""
-    cleaned = value.replace(",", " ")
-    cleaned = cleaned.replace("(", " ").replace(")", " ")
-    cleaned = re.sub(r"(\d+)(st|nd|rd|th)", r"\1", cleaned, flags=re.IGNORECASE)
-    cleaned = re.sub(r"\s+", " ", cleaned).strip()
-    return cleaned
+async def get_last_scrape_status():
+    replica = get_replica()
+    if replica is not None:
+        return replica.last_scrape_status()
+    async with connection() as conn:
+        cur = await conn.execute(
+            "SELECT run_at, pages_scraped, tenders_saved FROM scrape_status ORDER BY run_at DESC LIMIT 1;"
+        )
+        return await cur.fetchone()
 
+async def get_recent_run_metrics(limit=METRICS_BASELINE_RUNS + 1):
+    # Newest first: the last run followed by the runs used as its baseline.
+    replica = get_replica()
+    if replica is not None:
+        return [_safe_json_loads(row[0]) for row in replica.recent_run_metrics(limit)]
+    async with connection() as conn:
+        cur = await conn.execute("""
+            SELECT m.metrics_json
+            FROM scrape_metrics m
+            JOIN scrape_status s ON s.id = m.scrape_status_id
+            ORDER BY s.run_at DESC
+            LIMIT %s;
+        """, (limit,))
+        rows = await cur.fetchall()
+    return [_safe_json_loads(row[0]) for row in rows]
 
-def _extract_date_candidate(value):
-    cleaned = _normalize_date_text(value)
-    if not cleaned:
-        return ""
-    patterns = [
-        r"(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2}\s+\d{4}",
-        r"(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2}\s+\d{4}",
-        r"\d{1,2}\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{4}",
-        r"\d{1,2}\s+(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4}",
-        r"\d{4}-\d{2}-\d{2}",
-        r"\d{1,2}/\d{1,2}/\d{4}"
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, cleaned)
-        if match:
-            return match.group(0)
-    return cleaned
-
-def _parse_date(value):
-    cleaned = _extract_date_candidate(value)
-    if not cleaned:
-        return None
-    lowered = cleaned.lower()
-    if lowered == "today":
-        return datetime.utcnow().date()
-    if lowered == "yesterday":
-        return datetime.utcnow().date() - timedelta(days=1)
-    formats = [
-        "%b %d %Y",
-        "%B %d %Y",
-        "%d %b %Y",
-        "%d %B %Y",
-        "%Y-%m-%d",
-        "%d/%m/%Y"
-    ]
-    for fmt in formats:
-        try:
-            return datetime.strptime(cleaned, fmt).date()
-        except ValueError:
-            continue
-    return None
-
-def get_last_scrape_status():
-    conn = psycopg.connect(DB_URL, sslmode="require")
-    cur = conn.cursor()
-    cur.execute("SELECT run_at, pages_scraped, tenders_saved FROM scrape_status ORDER BY run_at DESC LIMIT 1;")
-    row = cur.fetchone()
-    cur.close()
-    conn.close()
-    return row
-
-def get_tenders_since(days_count):
+async def get_tenders_page(days_count, page=0, page_size=PAGE_SIZE):
     cutoff_date = datetime.utcnow().date() - timedelta(days=max(days_count - 1, 0))
-    conn = psycopg.connect(DB_URL, sslmode="require")
-    cur = conn.cursor()
-    cur.execute("SELECT id, title, bid_closing_date, bid_opening_date, published_on, url FROM tenders1;")
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-
-    results = []
-    for row in rows:
-        published_on = row[4]
-        published_date = _parse_date(published_on)
-        if published_date and published_date >= cutoff_date:
-            results.append({
-                "id": row[0],
-                "title": row[1],
-                "bid_closing_date": row[2],
-                "bid_opening_date": row[3],
-                "published_on": published_on,
-                "url": row[5]
-            })
-    return results
+    replica = get_replica()
+    if replica is not None:
+        rows, total = replica.tenders_page(cutoff_date, RENDERER_VERSION, page, page_size)
+        return [TenderRecord(*row[:7]) for row in rows], total
+    async with connection() as conn:
+        cur = await conn.execute("""
+            SELECT id, title, bid_closing_date, bid_opening_date, published_on, url,
+                   CASE WHEN renderer_version = %s THEN summary_html END,
+                   count(*) OVER ()
+            FROM tenders1
+            WHERE published_date >= %s
+            ORDER BY published_date DESC, id
+            LIMIT %s OFFSET %s;
+        """, (RENDERER_VERSION, cutoff_date, page_size, page * page_size))
+        rows = await cur.fetchall()
+        if not rows and page > 0:
+            cur = await conn.execute("SELECT count(*) FROM tenders1 WHERE published_date >= %s;", (cutoff_date,))
+            total = (await cur.fetchone())[0]
+            return [], total
+
+    tenders = [TenderRecord(*row[:7]) for row in rows]
+    return tenders, (rows[0][7] if rows else 0)
+
+
+async def search_tenders(terms, page=0, page_size=PAGE_SIZE):
+    async with connection() as conn:
+        cur = await conn.execute("""
+            WITH matches AS (
+                SELECT * FROM (
+                    SELECT id, title, bid_closing_date, bid_opening_date, published_on, url,
+                           summary_html, renderer_version, published_date, search_vector
+                    FROM tenders1
+                    WHERE search_vector @@ websearch_to_tsquery(%(config)s, %(terms)s)
+                    UNION ALL
+                    SELECT id, title, bid_closing_date, bid_opening_date, published_on, url,
+                           summary_html, renderer_version, published_date, search_vector
+                    FROM tenders_archive
+                    WHERE search_vector @@ websearch_to_tsquery(%(config)s, %(terms)s)
+                ) AS live_and_archived
+                ORDER BY published_date DESC, id
+                LIMIT %(max_results)s
+            )
+            SELECT id, title, bid_closing_date, bid_opening_date, published_on, url,
+                   CASE WHEN renderer_version = %(version)s THEN summary_html END,
+                   count(*) OVER ()
+            FROM matches
+            ORDER BY ts_rank_cd(search_vector, websearch_to_tsquery(%(config)s, %(terms)s)) DESC,
+                     published_date DESC, id
+            LIMIT %(limit)s OFFSET %(offset)s;
+        """, {
+            "config": SEARCH_CONFIG,
+            "terms": terms,
+            "max_results": SEARCH_MAX_RESULTS,
+            "version": RENDERER_VERSION,
+            "limit": page_size,
+            "offset": page * page_size
+        })
+        rows = await cur.fetchall()
+        if not rows and page > 0:
+            cur = await conn.execute("""
+                SELECT count(*) FROM (
+                    SELECT 1 FROM tenders1
+                    WHERE search_vector @@ websearch_to_tsquery(%(config)s, %(terms)s)
+                    UNION ALL
+                    SELECT 1 FROM tenders_archive
+                    WHERE search_vector @@ websearch_to_tsquery(%(config)s, %(terms)s)
+                    LIMIT %(max_results)s
+                ) AS matches;
+            """, {"config": SEARCH_CONFIG, "terms": terms, "max_results": SEARCH_MAX_RESULTS})
+            total = (await cur.fetchone())[0]
+            return [], total
+    tenders = [TenderRecord(*row[:7]) for row in rows]
+    return tenders, (rows[0][7] if rows else 0)
+
+
+def _filter_conditions(filters):
+    # Every clause maps onto an index: the metadata GIN index (jsonb_path_ops)
+    # for region and bidding type, tender_categories for the category and
+    # idx_tenders1_closing_date for the closing window.
+    conditions, params = [], []
+    metadata = {key: filters[key] for key in ("region", "bidding_type") if filters.get(key)}
+    if metadata:
+        conditions.append(sql.SQL("d.metadata_json @> %s::jsonb"))
+        params.append(json.dumps(metadata))
+    if filters.get("category_id"):
+        conditions.append(sql.SQL(
+            "EXISTS (SELECT 1 FROM tender_categories tc WHERE tc.tender_id = t.id AND tc.category_id = %s)"
+        ))
+        params.append(filters["category_id"])
+    if filters.get("closing_days"):
+        today = datetime.utcnow().date()
+        conditions.append(sql.SQL("t.closing_date BETWEEN %s AND %s"))
+        params.extend((today, today + timedelta(days=filters["closing_days"])))
+    join = sql.SQL("JOIN tender_details d ON d.tender_id = t.id") if metadata else sql.SQL("")
+    where = sql.SQL(" AND ").join(conditions) if conditions else sql.SQL("TRUE")
+    return join, where, params
+
+
+async def filter_tenders(filters, page=0, page_size=PAGE_SIZE):
+    # Structured filters always run on Postgres; the replica has no JSONB or
+    # category tables.
+    join, where, params = _filter_conditions(filters)
+    async with connection() as conn:
+        cur = await conn.execute(sql.SQL("""
+            SELECT t.id, t.title, t.bid_closing_date, t.bid_opening_date, t.published_on, t.url,
+                   CASE WHEN t.renderer_version = %s THEN t.summary_html END,
+                   count(*) OVER ()
+            FROM tenders1 t
+            {join}
+            WHERE {where}
+            ORDER BY t.published_date DESC, t.id
+            LIMIT %s OFFSET %s;
+        """).format(join=join, where=where), (RENDERER_VERSION, *params, page_size, page * page_size))
+        rows = await cur.fetchall()
+        if not rows and page > 0:
+            cur = await conn.execute(
+                sql.SQL("SELECT count(*) FROM tenders1 t {join} WHERE {where};").format(join=join, where=where),
+                params
+            )
+            total = (await cur.fetchone())[0]
+            return [], total
+    tenders = [TenderRecord(*row[:7]) for row in rows]
+    return tenders, (rows[0][7] if rows else 0)
+
+
+async def get_filter_options():
+    async with connection() as conn:
+        options = {}
+        for field in ("region", "bidding_type"):
+            cur = await conn.execute("""
+                SELECT metadata_json->>%s AS value
+                FROM tender_details
+                WHERE metadata_json ? %s
+                GROUP BY value
+                ORDER BY count(*) DESC, value
+                LIMIT %s;
+            """, (field, field, FILTER_OPTION_LIMIT))
+            options[field] = [(row[0], row[0]) for row in await cur.fetchall()]
+        cur = await conn.execute("""
+            SELECT c.id, c.name
+            FROM categories c
+            JOIN tender_categories tc ON tc.category_id = c.id
+            GROUP BY c.id, c.name
+            ORDER BY count(*) DESC, c.name
+            LIMIT %s;
+        """, (FILTER_OPTION_LIMIT,))
+        options["category_id"] = [(row[0], row[1]) for row in await cur.fetchall()]
+    options["closing_days"] = [(days, f"next {days} days") for days in CLOSING_WINDOWS]
+    return options
+
+
+async def load_filter_options(bot_data):
+    cached = bot_data.get("filter_options")
+    if cached is not None and time.monotonic() - cached[0] < FILTER_OPTIONS_TTL_SECONDS:
+        return cached[1]
+    options = await get_filter_options()
+    bot_data["filter_options"] = (time.monotonic(), options)
+    return options
 
 
 def _safe_json_loads(value):
     if not value:
         return {}
+    if isinstance(value, dict):
+        return value
     try:
         return json.loads(value)
     except json.JSONDecodeError:
         return {}
 
 
-def get_tender_by_id(tender_id):
-    conn = psycopg.connect(DB_URL, sslmode="require")
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT id, title, bid_closing_date, bid_opening_date, published_on, url FROM tenders1 WHERE id = %s;",
-        (tender_id,)
-    )
-    row = cur.fetchone()
-    cur.close()
-    conn.close()
+async def _fetch_one(query, params):
+    async with connection() as conn:
+        cur = await conn.execute(query, params)
+        return await cur.fetchone()
+
+
+async def _fetch_archived(query, params):
+    # Most archive lookups are misses (details not scraped yet), so an
+    # unreachable Postgres shouldn't fail a read the replica answered.
+    try:
+        return await _fetch_one(query, params)
+    except Exception as exc:
+        logging.warning("Archive lookup failed: %s", exc)
+        return None
+
+
+async def get_tender_by_id(tender_id):
+    # Tenders moved out by retention (reachable from /search) are looked up
+    # in the archive when they aren't live.
+    replica = get_replica()
+    if replica is not None:
+        row = replica.tender_by_id(tender_id)
+    else:
+        row = await _fetch_one(
+            "SELECT id, title, bid_closing_date, bid_opening_date, published_on, url FROM tenders1 WHERE id = %s;",
+            (tender_id,)
+        )
+    if not row:
+        row = await _fetch_archived("""
+            SELECT id, title, bid_closing_date, bid_opening_date, published_on, url
+            FROM tenders_archive
+            WHERE id = %s;
+        """, (tender_id,))
     if not row:
         return None
-    return {
-        "id": row[0],
-        "title": row[1],
-        "bid_closing_date": row[2],
-        "bid_opening_date": row[3],
-        "published_on": row[4],
-        "url": row[5]
-    }
-
-
-def get_tender_details(tender_id):
-    conn = psycopg.connect(DB_URL, sslmode="require")
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT title, description, filed_under, company, metadata_json, extra_fields_json
-        FROM tender_details
-        WHERE tender_id = %s;
-    """, (tender_id,))
-    row = cur.fetchone()
-    cur.close()
-    conn.close()
+    return TenderRecord(*row)
+
+
+async def get_tender_details(tender_id):
+    replica = get_replica()
+    if replica is not None:
+        row = replica.tender_details(tender_id)
+    else:
+        row = await _fetch_one("""
+            SELECT title, description, filed_under, company, metadata_json, extra_fields_json
+            FROM tender_details
+            WHERE tender_id = %s;
+        """, (tender_id,))
+    if not row:
+        row = await _fetch_archived("""
+            SELECT title, description, filed_under, company, metadata_json, extra_fields_json, description_compressed
+            FROM tender_details_archive
+            WHERE tender_id = %s;
+        """, (tender_id,))
+        if row:
+            row = (row[0], decompress_description(row[1], row[6]), *row[2:6])
     if not row:
         return None
-    return {
-        "title": row[0],
-        "description": row[1],
-        "filed_under": row[2],
-        "company": row[3],
-        "metadata": _safe_json_loads(row[4]),
-        "extra_fields": _safe_json_loads(row[5])
-    }
-
-
-def format_tender_details(tender, details):
-    if not details:
-        return (
-            "ℹ️ Details are not available yet.\n"
-            "Please try again later after the scheduled scraper runs."
+    return DetailRecord(
+        title=row[0],
+        description=row[1],
+        filed_under=row[2],
+        company=row[3],
+        metadata=_safe_json_loads(row[4]),
+        extra_fields=_safe_json_loads(row[5])
+    )
+
+
+async def get_detail_message(tender_id):
+    # Pre-rendered at scrape time; None means no details row exists yet.
+    replica = get_replica()
+    if replica is not None:
+        row = replica.detail_message(tender_id)
+    else:
+        row = await _fetch_one(
+            "SELECT message_html, renderer_version FROM tender_details WHERE tender_id = %s;",
+            (tender_id,)
         )
-    title = details.get("title") or tender.get("title") or "Tender Details"
-    title_html = html.escape(title)
-    closing = html.escape(tender.get("bid_closing_date") or "N/A")
-    opening = html.escape(tender.get("bid_opening_date") or "N/A")
-    filed_under = html.escape(details.get("filed_under") or "N/A")
-    company = html.escape(details.get("company") or "N/A")
-    metadata = details.get("metadata") or {}
-    extra_fields = details.get("extra_fields") or {}
-    description = html.escape(details.get("description") or "No description available.")
-
-    lines = [
-        f"📌 <b>{title_html}</b>",
-        f"🗓 <b>Closing</b>: {closing}",
-        f"🗓 <b>Opening</b>: {opening}",
-        f"🏢 <b>Company</b>: {company}",
-        f"🗂 <b>Filed under</b>: {filed_under}"
-    ]
+    if not row:
+        row = await _fetch_archived(
+            "SELECT message_html, renderer_version FROM tender_details_archive WHERE tender_id = %s;",
+            (tender_id,)
+        )
+    if not row:
+        return None
+    message_html, renderer_version = row
+    return message_html if renderer_version == RENDERER_VERSION else ""
+
+
+async def get_tenders_updated_since(watermark):
+    # Ids whose listing or details row changed after the watermark.
+    async with connection() as conn:
+        if watermark is None:
+            cur = await conn.execute("""
+                SELECT max(updated_at)
+                FROM (
+                    SELECT max(updated_at) AS updated_at FROM tenders1
+                    UNION ALL
+                    SELECT max(updated_at) FROM tender_details
+                ) latest;
+            """)
+            return [], (await cur.fetchone())[0]
+        cur = await conn.execute("""
+            SELECT id, updated_at FROM tenders1 WHERE updated_at > %s
+            UNION ALL
+            SELECT tender_id, updated_at FROM tender_details WHERE updated_at > %s
+            ORDER BY updated_at;
+        """, (watermark, watermark))
+        rows = await cur.fetchall()
+    if not rows:
+        return [], watermark
+    return list(dict.fromkeys(row[0] for row in rows)), rows[-1][1]
+
 
-    def add_field(label, key):
-        value = metadata.get(key)
-        if value:
-            lines.append(f"{label}: {html.escape(value)}")
-
-    add_field("📅 <b>Published</b>", "published_on")
-    add_field("🗓 <b>Posted</b>", "posted")
-    add_field("💵 <b>Bid document price</b>", "bid_document_price")
-    add_field("💰 <b>Bid bond</b>", "bid_bond")
-    add_field("📍 <b>Region</b>", "region")
-    add_field("🧾 <b>Bidding</b>", "bidding_type")
-
-    for label in sorted(extra_fields.keys()):
-        value = extra_fields[label]
-        if value:
-            lines.append(f"• <b>{html.escape(label)}</b>: {html.escape(value)}")
-
-    message = "\n".join(lines) + "\n\n" + _truncate(description, 1800)
-    if len(message) > 4000:
-        message = "\n".join(lines) + "\n\n" + _truncate(description, 1200)
-    if len(message) > 4000:
-        trimmed_lines = [line for line in lines if not line.startswith("• ")]
-        message = "\n".join(trimmed_lines) + "\n\n" + _truncate(description, 1200)
+def load_tenders_page(bot_data, days_count, page):
+    # The date is part of the key so a digest doesn't outlive midnight (UTC).
+    key = ("range", days_count, page, datetime.utcnow().date())
+    return bot_data["flights"].do(key, lambda: get_tenders_page(days_count, page))
+
+
+async def load_tender(bot_data, tender_id):
+    tender_cache = bot_data["tender_cache"]
+    tender = tender_cache.get(tender_id)
+    if tender is None:
+        tender = await bot_data["flights"].do(("tender", tender_id), lambda: get_tender_by_id(tender_id))
+        if tender is not None:
+            tender_cache.set(tender_id, tender)
+    return tender
+
+
+async def load_detail_message(bot_data, tender):
+    # The "not available yet" reply is cached too; invalidation drops it once
+    # the details are scraped.
+    details_cache = bot_data["details_cache"]
+    message = details_cache.get(tender.id)
+    if message is None:
+        message = await bot_data["flights"].do(("detail", tender.id), lambda: get_detail_message(tender.id))
+        if message is None:
+            message = DETAILS_UNAVAILABLE
+        elif not message:
+            # Stored by an older renderer and not migrated yet.
+            message = render_tender_details(tender, await get_tender_details(tender.id))
+        details_cache.set(tender.id, message)
     return message
 
+
+def format_tender_summary(tender, number):
+    summary = tender.get("summary_html") or render_tender_summary(tender)
+    return f"<b>{number}.</b> {summary}"
+
+
+def detail_keyboard(tenders, first_number=1):
+    detail_buttons = [
+        InlineKeyboardButton(f"🔍 {number}", callback_data=f"details:{tender['id']}")
+        for number, tender in enumerate(tenders, start=first_number)
+    ]
+    return [detail_buttons[i:i + 5] for i in range(0, len(detail_buttons), 5)]
+
+
+def build_digest(header, tenders, page, total, nav_prefix, page_size=PAGE_SIZE):
+    page_count = max(1, -(-total // page_size))
+    first_number = page * page_size + 1
+    lines = [f"{header}\n<i>Page {page + 1} of {page_count} · {total} tenders</i>"]
+    lines.extend(
+        format_tender_summary(tender, number)
+        for number, tender in enumerate(tenders, start=first_number)
+    )
+    text = "\n\n".join(lines)
+
+    keyboard = detail_keyboard(tenders, first_number)
+    nav_row = []
+    if page > 0:
+        nav_row.append(InlineKeyboardButton("◀️ Prev", callback_data=f"{nav_prefix}:{page - 1}"))
+    if page_count > 1:
+        nav_row.append(InlineKeyboardButton(f"{page + 1}/{page_count}", callback_data="noop"))
+    if page + 1 < page_count:
+        nav_row.append(InlineKeyboardButton("Next ▶️", callback_data=f"{nav_prefix}:{page + 1}"))
+    if nav_row:
+        keyboard.append(nav_row)
+    return text, InlineKeyboardMarkup(keyboard)
+
+
+async def show_digest(query, text, reply_markup, edit):
+    if not edit:
+        await query.message.reply_text(text, parse_mode="HTML", reply_markup=reply_markup)
+        return
+    try:
+        await query.edit_message_text(text, parse_mode="HTML", reply_markup=reply_markup)
+    except BadRequest as exc:
+        # Double-tapping a nav button re-renders the same page.
+        if "not modified" not in str(exc).lower():
+            raise
+
 # ---------- TELEGRAM HANDLERS ----------
 async def start(update: Update, context: CallbackContext):
     chat_id = update.effective_chat.id
@@ -221,7 +489,10 @@ async def start(update: Update, context: CallbackContext):
         "👋 <b>Welcome to Chereta 4 Us!</b>\n\n"
         "🤖 I’m a Telegram bot that scrapes the most current freely available "
         "tender info from <b>2merkato.com</b>.\n\n"
-        "👇 Choose how recent you want the tenders:"
+        "🔔 Use /subscribe &lt;words&gt; to get new matching tenders as they are posted.\n\n"
+        "🧰 Use /filter to narrow tenders by region, bidding type, category or closing date.\n\n"
+        "📄 Use /export [days] [words] to download matching tenders as a CSV file.\n\n"
+        "👇 Choose how recent you want the tenders, or look one up with /search &lt;words&gt;:"
     )
     keyboard = [
         [InlineKeyboardButton("🆕 Tenders Posted Today", callback_data="range:1")],
@@ -238,19 +509,17 @@ async def handle_details(update: Update, context: CallbackContext):
         return
 
     tender_id = query.data.split(":", 1)[1]
-    tender_cache = context.bot_data.get("tender_cache", {})
     try:
-        tender = tender_cache.get(tender_id) or get_tender_by_id(tender_id)
+        tender = await load_tender(context.bot_data, tender_id)
         if not tender:
             await query.message.reply_text("Tender not found.")
             return
-        details = get_tender_details(tender_id)
+        message = await load_detail_message(context.bot_data, tender)
     except Exception as exc:
         logging.error("DB query failed: %s", exc)
         await query.message.reply_text("Database is not ready yet. Please try later.")
         return
 
-    message = format_tender_details(tender, details)
     await query.message.reply_text(message, parse_mode="HTML")
 
 async def handle_range(update: Update, context: CallbackContext):
@@ -259,41 +528,443 @@ async def handle_range(update: Update, context: CallbackContext):
     if not query.data or not query.data.startswith("range:"):
         return
 
+    # "range:<days>" opens a new digest; "range:<days>:<page>" pages it in place.
+    parts = query.data.split(":")
     try:
-        days_count = int(query.data.split(":", 1)[1])
-    except ValueError:
+        days_count = int(parts[1])
+        page = max(int(parts[2]), 0) if len(parts) > 2 else 0
+    except (IndexError, ValueError):
         await query.message.reply_text("Invalid selection.")
         return
+    edit = len(parts) > 2
 
-    await query.message.reply_text("🔎 Fetching tenders from the database...")
     try:
-        tenders = get_tenders_since(days_count)
+        tenders, total = await load_tenders_page(context.bot_data, days_count, page)
+        if total and not tenders:
+            # Past the last page (results shrank since the digest was sent).
+            page = (total - 1) // PAGE_SIZE
+            tenders, total = await load_tenders_page(context.bot_data, days_count, page)
     except Exception as exc:
         logging.error("DB query failed: %s", exc)
         await query.message.reply_text("Database is not ready yet. Please try later.")
         return
-    if not tenders:
+    if not total:
         await query.message.reply_text("No tenders found for that period.")
         return
 
-    tender_cache = context.bot_data.setdefault("tender_cache", {})
+    tender_cache = context.bot_data["tender_cache"]
     for tender in tenders:
-        tender_cache[tender["id"]] = tender
+        tender_cache.set(tender.id, tender)
+
+    label = RANGE_LABELS.get(days_count, f"in the last {days_count} days")
+    text, reply_markup = build_digest(f"📋 <b>Tenders posted {label}</b>", tenders, page, total, f"range:{days_count}")
+    await show_digest(query, text, reply_markup, edit)
+
+SUBSCRIPTION_ICONS = {"keyword": "🔤", "category": "🗂", "region": "📍"}
+
+async def handle_subscribe(update: Update, context: CallbackContext):
+    parsed = parse_subscription(" ".join(context.args))
+    if parsed is None:
+        await update.message.reply_text(
+            "Usage:\n"
+            "/subscribe road construction\n"
+            "/subscribe category: Medical Equipment\n"
+            "/subscribe region: Oromia"
+        )
+        return
+    kind, value, normalized = parsed
+    try:
+        subscription_id = await add_subscription(update.effective_chat.id, kind, value, normalized)
+    except Exception as exc:
+        logging.error("DB query failed: %s", exc)
+        await update.message.reply_text("Database is not ready yet. Please try later.")
+        return
+    if subscription_id is None:
+        text = f"You already have {MAX_SUBSCRIPTIONS_PER_CHAT} subscriptions. Remove one with /subscriptions first."
+    elif not subscription_id:
+        text = "You are already subscribed to that."
+    else:
         text = (
-            f"📌 <b>{html.escape(tender['title'])}</b>\n"
-            f"🗓 <b>Closing</b>: {html.escape(tender.get('bid_closing_date') or 'N/A')}\n"
-            f"🗓 <b>Opening</b>: {html.escape(tender.get('bid_opening_date') or 'N/A')}\n"
-            f"📅 <b>Published</b>: {html.escape(tender.get('published_on') or 'N/A')}"
+            f"🔔 Subscribed to {kind} <b>{html.escape(value)}</b>.\n"
+            "New matching tenders will be sent here after each scrape."
+        )
+    await update.message.reply_text(text, parse_mode="HTML")
+
+def build_subscription_list(subscriptions):
+    if not subscriptions:
+        return "You have no subscriptions. Add one with /subscribe &lt;words&gt;.", None
+    lines = ["🔔 <b>Your subscriptions</b>"]
+    buttons = []
+    for number, (subscription_id, kind, value) in enumerate(subscriptions, start=1):
+        lines.append(f"{number}. {SUBSCRIPTION_ICONS.get(kind, '')} {kind}: {html.escape(value)}")
+        buttons.append(InlineKeyboardButton(f"❌ {number}", callback_data=f"unsub:{subscription_id}"))
+    keyboard = [buttons[i:i + 5] for i in range(0, len(buttons), 5)]
+    return "\n".join(lines), InlineKeyboardMarkup(keyboard)
+
+async def handle_subscriptions(update: Update, context: CallbackContext):
+    try:
+        subscriptions = await list_subscriptions(update.effective_chat.id)
+    except Exception as exc:
+        logging.error("DB query failed: %s", exc)
+        await update.message.reply_text("Database is not ready yet. Please try later.")
+        return
+    text, reply_markup = build_subscription_list(subscriptions)
+    await update.message.reply_text(text, parse_mode="HTML", reply_markup=reply_markup)
+
+async def handle_unsubscribe(update: Update, context: CallbackContext):
+    query = update.callback_query
+    await query.answer()
+    try:
+        subscription_id = int(query.data.split(":", 1)[1])
+    except (IndexError, ValueError):
+        return
+    chat_id = update.effective_chat.id
+    try:
+        await remove_subscription(chat_id, subscription_id)
+        subscriptions = await list_subscriptions(chat_id)
+    except Exception as exc:
+        logging.error("DB query failed: %s", exc)
+        await query.message.reply_text("Database is not ready yet. Please try later.")
+        return
+    text, reply_markup = build_subscription_list(subscriptions)
+    await show_digest(query, text, reply_markup, edit=True)
+
+def build_notification(tenders):
+    lines = ["🔔 <b>New tenders matching your subscriptions</b>"]
+    for number, tender in enumerate(tenders, start=1):
+        lines.append(
+            format_tender_summary(tender, number)
+            + f"\n<i>Matched: {html.escape(tender.get('matched') or '')}</i>"
         )
-        keyboard = [
-            [InlineKeyboardButton("View Details", callback_data=f"details:{tender['id']}")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await query.message.reply_text(text=text, parse_mode="HTML", reply_markup=reply_markup)
+    return "\n\n".join(lines), InlineKeyboardMarkup(detail_keyboard(tenders))
+
+async def send_notifications(bot, chat_id, tenders):
+    # Each chunk is marked sent only after Telegram accepted it; the rate
+    # limiter paces chats against each other.
+    for start in range(0, len(tenders), PAGE_SIZE):
+        chunk = tenders[start:start + PAGE_SIZE]
+        tender_ids = [tender["id"] for tender in chunk]
+        text, reply_markup = build_notification(chunk)
+        try:
+            await bot.send_message(chat_id=chat_id, text=text, parse_mode="HTML", reply_markup=reply_markup)
+        except Forbidden:
+            # The user blocked the bot or left the group.
+            logging.info("Chat %s is unreachable; removing its subscriptions", chat_id)
+            await remove_chat(chat_id)
+            await mark_sent(chat_id, [tender["id"] for tender in tenders[start:]])
+            return
+        except TelegramError as exc:
+            logging.warning("Notification to %s failed: %s", chat_id, exc)
+            await release_claim(chat_id, tender_ids)
+            continue
+        await mark_sent(chat_id, tender_ids)
+
+async def deliver_notifications(context: CallbackContext):
+    try:
+        await release_stale_claims(NOTIFY_CLAIM_TIMEOUT_SECONDS)
+        batches = await claim_notifications(NOTIFY_BATCH_LIMIT)
+    except Exception as exc:
+        logging.warning("Notification delivery skipped: %s", exc)
+        return
+    if not batches:
+        return
+    results = await asyncio.gather(
+        *(send_notifications(context.bot, chat_id, tenders) for chat_id, tenders in batches.items()),
+        return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logging.warning("Notification batch failed: %s", result)
+    logging.info("Delivered notifications to %s chats", len(batches))
+
+def _stage(summary, stage, key="total"):
+    return summary.get("stages", {}).get(stage, {}).get(key, 0.0)
+
+def _counter(summary, *names):
+    return sum(summary.get("counters", {}).get(name, 0) for name in names)
+
+RUN_BREAKDOWN = (
+    ("⏱ Wall", lambda m: m.get("wall_seconds", 0.0), "{:.1f}s"),
+    ("🌐 Listing p95", lambda m: _stage(m, "listing_fetch", "p95"), "{:.2f}s"),
+    ("🔍 Detail p95", lambda m: _stage(m, "detail_fetch", "p95"), "{:.2f}s"),
+    ("🚀 Browser launch", lambda m: _stage(m, "browser_launch"), "{:.1f}s"),
+    ("🧩 Parsing", lambda m: _stage(m, "parse"), "{:.2f}s"),
+    ("💾 DB writes", lambda m: _stage(m, "db_listing_write") + _stage(m, "db_detail_write"), "{:.2f}s"),
+    ("🔁 Retries", lambda m: _counter(m, "listing_retries"), "{:.0f}"),
+    ("⌛ Timeouts", lambda m: _counter(m, "navigation_timeouts", "selector_timeouts"), "{:.0f}"),
+    ("❗ Failed details", lambda m: _counter(m, "detail_failures"), "{:.0f}"),
+    ("📦 Fetched", lambda m: _counter(m, "bytes_fetched") / 1_000_000, "{:.1f} MB"),
+    ("🗄 Archived", lambda m: _counter(m, "tenders_archived"), "{:.0f}")
+)
+
+def format_run_breakdown(runs):
+    # The last run against the mean of up to METRICS_BASELINE_RUNS before it.
+    if not runs:
+        return ""
+    latest, previous = runs[0], runs[1:]
+    lines = ["⚙️ <b>Last run breakdown</b>" + (f" (vs. avg of {len(previous)})" if previous else "")]
+    for label, value_of, fmt in RUN_BREAKDOWN:
+        value = value_of(latest)
+        line = f"{label}: {fmt.format(value)}"
+        if previous:
+            baseline = sum(value_of(run) for run in previous) / len(previous)
+            line += f" ({fmt.format(baseline)})"
+            if value > 1.5 * baseline and value - baseline > 0.5:
+                line += " ⚠️"
+        lines.append(line)
+    return "\n".join(lines)
+
+def format_replica_status(replica):
+    if replica is None:
+        return ""
+    synced = replica.last_synced()
+    age = f"{int(time.time() - synced)}s ago" if synced else "never"
+    text = (
+        "🗄 <b>Local replica</b>\n"
+        f"Synced {age} · {replica.count('tenders1')} tenders · {replica.count('tender_details')} details"
+    )
+    if replica.last_error:
+        text += f"\n⚠️ Last sync failed: {html.escape(truncate(replica.last_error, 200))}"
+    return text
+
+FILTER_FIELDS = (
+    ("region", "📍 Region"),
+    ("bidding_type", "🏷 Bidding type"),
+    ("category_id", "🗂 Category"),
+    ("closing_days", "⏳ Closing")
+)
+
+def build_filter_menu(filters):
+    labels = filters.get("labels", {})
+    lines = ["🧰 <b>Filter tenders</b>"]
+    keyboard = []
+    for field, label in FILTER_FIELDS:
+        value = labels.get(field) or "any"
+        lines.append(f"{label}: <b>{html.escape(str(value))}</b>")
+        button_text = f"{label}: {truncate(str(value), 30)}"
+        keyboard.append([InlineKeyboardButton(button_text, callback_data=f"flt:pick:{field}")])
+    keyboard.append([
+        InlineKeyboardButton("🔎 Show results", callback_data="flt:show:0"),
+        InlineKeyboardButton("♻️ Reset", callback_data="flt:reset")
+    ])
+    return "\n".join(lines), InlineKeyboardMarkup(keyboard)
+
+def build_filter_choices(field, choices):
+    label = dict(FILTER_FIELDS)[field]
+    buttons = [InlineKeyboardButton("Any", callback_data=f"flt:set:{field}:-1")]
+    buttons.extend(
+        InlineKeyboardButton(truncate(str(name), 30), callback_data=f"flt:set:{field}:{index}")
+        for index, (_, name) in enumerate(choices)
+    )
+    keyboard = [buttons[i:i + 2] for i in range(0, len(buttons), 2)]
+    keyboard.append([InlineKeyboardButton("◀️ Back", callback_data="flt:menu")])
+    return f"{label}: choose a value", InlineKeyboardMarkup(keyboard)
+
+async def render_filter_page(context, filters, page):
+    tenders, total = await filter_tenders(filters, page)
+    if total and not tenders:
+        page = (total - 1) // PAGE_SIZE
+        tenders, total = await filter_tenders(filters, page)
+    if not total:
+        return None, None
+
+    tender_cache = context.bot_data["tender_cache"]
+    for tender in tenders:
+        tender_cache.set(tender.id, tender)
+
+    active = [html.escape(str(value)) for value in filters.get("labels", {}).values() if value]
+    header = "🧰 <b>Filtered tenders</b>" + (f" ({', '.join(active)})" if active else "")
+    text, reply_markup = build_digest(header, tenders, page, total, "flt:show")
+    keyboard = [*reply_markup.inline_keyboard, [InlineKeyboardButton("🧰 Edit filters", callback_data="flt:menu")]]
+    return text, InlineKeyboardMarkup(keyboard)
+
+async def handle_filter(update: Update, context: CallbackContext):
+    text, reply_markup = build_filter_menu(context.chat_data.setdefault("filter", {}))
+    await update.message.reply_text(text, parse_mode="HTML", reply_markup=reply_markup)
+
+async def handle_filter_callback(update: Update, context: CallbackContext):
+    query = update.callback_query
+    await query.answer()
+    parts = (query.data or "").split(":")
+    action = parts[1] if len(parts) > 1 else ""
+    filters = context.chat_data.setdefault("filter", {})
+    try:
+        if action == "pick" and len(parts) == 3 and parts[2] in dict(FILTER_FIELDS):
+            # Buttons carry an index; the values they point at stay in
+            # chat_data so a reloaded option list can't shift them.
+            field = parts[2]
+            choices = (await load_filter_options(context.bot_data))[field]
+            context.chat_data.setdefault("filter_choices", {})[field] = choices
+            text, reply_markup = build_filter_choices(field, choices)
+        elif action == "set" and len(parts) == 4:
+            field, index = parts[2], int(parts[3])
+            choices = context.chat_data.get("filter_choices", {}).get(field, [])
+            labels = filters.setdefault("labels", {})
+            if 0 <= index < len(choices):
+                filters[field], labels[field] = choices[index]
+            else:
+                filters.pop(field, None)
+                labels.pop(field, None)
+            text, reply_markup = build_filter_menu(filters)
+        elif action == "reset":
+            filters.clear()
+            text, reply_markup = build_filter_menu(filters)
+        elif action == "show" and len(parts) == 3:
+            text, reply_markup = await render_filter_page(context, filters, max(int(parts[2]), 0))
+            if text is None:
+                await query.message.reply_text("No tenders match these filters.")
+                return
+        else:
+            text, reply_markup = build_filter_menu(filters)
+    except ValueError:
+        return
+    except Exception as exc:
+        logging.error("DB query failed: %s", exc)
+        await query.message.reply_text("Database is not ready yet. Please try later.")
+        return
+    await show_digest(query, text, reply_markup, edit=True)
+
+def format_cache_stats(label, cache):
+    stats = cache.stats()
+    return (
+        f"{label}: {stats['entries']}/{stats['max_entries']} entries, "
+        f"{stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate']:.0%}), "
+        f"{stats['evictions']} evicted, {stats['invalidations']} invalidated"
+    )
+
+def format_coalescing_stats(flights, throttle):
+    stats = flights.stats()
+    return (
+        f"Coalescing: {stats['calls']} queries, {stats['shared']} shared in flight, "
+        f"{stats['cached']} reused; {throttle.throttled} taps throttled"
+    )
+
+def save_search(chat_data, terms):
+    # Callback data is capped at 64 bytes, so buttons carry a short token
+    # and the terms stay in chat_data.
+    searches = chat_data.setdefault("searches", {})
+    token = str(chat_data.get("search_seq", 0) + 1)
+    chat_data["search_seq"] = int(token)
+    searches[token] = terms
+    while len(searches) > MAX_SAVED_SEARCHES:
+        searches.pop(next(iter(searches)))
+    return token
+
+async def render_search_page(context, token, terms, page):
+    tenders, total = await search_tenders(terms, page)
+    if total and not tenders:
+        page = (total - 1) // PAGE_SIZE
+        tenders, total = await search_tenders(terms, page)
+    if not total:
+        return None, None
+
+    tender_cache = context.bot_data["tender_cache"]
+    for tender in tenders:
+        tender_cache.set(tender.id, tender)
+
+    shown = f"{total}+" if total >= SEARCH_MAX_RESULTS else str(total)
+    header = f"🔎 <b>Results for “{html.escape(terms)}”</b> ({shown})"
+    return build_digest(header, tenders, page, total, f"search:{token}")
+
+async def handle_search(update: Update, context: CallbackContext):
+    terms = " ".join(context.args).strip()
+    if not terms:
+        await update.message.reply_text(
+            "Usage: /search <words>\nExample: /search road construction -maintenance"
+        )
+        return
+    token = save_search(context.chat_data, terms)
+    try:
+        text, reply_markup = await render_search_page(context, token, terms, 0)
+    except Exception as exc:
+        logging.error("DB query failed: %s", exc)
+        await update.message.reply_text("Database is not ready yet. Please try later.")
+        return
+    if text is None:
+        await update.message.reply_text("No tenders match your search.")
+        return
+    await update.message.reply_text(text, parse_mode="HTML", reply_markup=reply_markup)
+
+async def handle_search_page(update: Update, context: CallbackContext):
+    query = update.callback_query
+    await query.answer()
+    parts = (query.data or "").split(":")
+    try:
+        token, page = parts[1], max(int(parts[2]), 0)
+    except (IndexError, ValueError):
+        return
+    terms = context.chat_data.get("searches", {}).get(token)
+    if terms is None:
+        await query.message.reply_text("This search has expired. Please run /search again.")
+        return
+    try:
+        text, reply_markup = await render_search_page(context, token, terms, page)
+    except Exception as exc:
+        logging.error("DB query failed: %s", exc)
+        await query.message.reply_text("Database is not ready yet. Please try later.")
+        return
+    if text is None:
+        await query.message.reply_text("No tenders match your search.")
+        return
+    await show_digest(query, text, reply_markup, edit=True)
+
+def parse_export_args(args):
+    # /export [days] [words...] [gzip]; 0 days exports every stored tender.
+    args = list(args)
+    compress = bool(args) and args[-1].lower() == "gzip"
+    if compress:
+        args.pop()
+    days = int(args.pop(0)) if args and args[0].isdigit() else None
+    terms = " ".join(args).strip() or None
+    if days is None and terms is None:
+        days = EXPORT_DEFAULT_DAYS
+    return days, terms, compress
+
+def export_filename(days, terms, compress):
+    parts = ["tenders", datetime.utcnow().strftime("%Y%m%d")]
+    if days:
+        parts.append(f"{days}d")
+    if terms:
+        parts.append("search")
+    return "_".join(parts) + (".csv.gz" if compress else ".csv")
+
+async def handle_export(update: Update, context: CallbackContext):
+    days, terms, compress = parse_export_args(context.args)
+    # Each export holds a pooled connection and a temp file until the upload
+    # finishes, so only a few run at once.
+    semaphore = context.bot_data["export_semaphore"]
+    if semaphore.locked():
+        await update.message.reply_text("Other exports are running. Please try again in a minute.")
+        return
+    async with semaphore:
+        try:
+            file, rows, size = await export_to_tempfile(days, terms, compress)
+        except Exception as exc:
+            logging.error("Export failed: %s", exc)
+            await update.message.reply_text("Database is not ready yet. Please try later.")
+            return
+        with file:
+            if not rows:
+                await update.message.reply_text("No tenders match that export.")
+                return
+            if size > EXPORT_MAX_BYTES:
+                await update.message.reply_text(
+                    f"That export is {size / 1024 / 1024:.0f} MB, over Telegram's 50 MB limit. "
+                    "Narrow the range or search, or add gzip at the end."
+                )
+                return
+            # read_file_handle=False streams the upload from disk instead of
+            # reading the whole file into memory first.
+            document = InputFile(file, filename=export_filename(days, terms, compress), read_file_handle=False)
+            await update.message.reply_document(document, caption=f"📄 {rows} tenders")
+
+async def handle_noop(update: Update, context: CallbackContext):
+    await update.callback_query.answer()
 
 async def handle_status(update: Update, context: CallbackContext):
+    flights = context.bot_data["flights"]
     try:
-        status = get_last_scrape_status()
+        status = await flights.do(("status",), get_last_scrape_status)
     except Exception as exc:
         logging.error("DB query failed: %s", exc)
         await update.message.reply_text("Database is not ready yet. Please try later.")
@@ -302,22 +973,131 @@ async def handle_status(update: Update, context: CallbackContext):
         await update.message.reply_text("No scraping runs recorded yet.")
         return
     run_at, pages_scraped, tenders_saved = status
+    try:
+        breakdown = format_run_breakdown(await flights.do(("run_metrics",), get_recent_run_metrics))
+    except Exception as exc:
+        logging.warning("Run metrics unavailable: %s", exc)
+        breakdown = ""
     text = (
         "📊 <b>Scrape Status</b>\n"
         f"🕒 <b>Last run</b>: {run_at}\n"
         f"📄 <b>Pages scraped</b>: {pages_scraped}\n"
-        f"✅ <b>New tenders saved</b>: {tenders_saved}"
+        f"✅ <b>New tenders saved</b>: {tenders_saved}\n\n"
+        + (breakdown + "\n\n" if breakdown else "")
+        + "🧠 <b>Cache</b>\n"
+        + format_cache_stats("Tenders", context.bot_data["tender_cache"]) + "\n"
+        + format_cache_stats("Details", context.bot_data["details_cache"]) + "\n"
+        + format_coalescing_stats(flights, context.bot_data["request_throttle"])
     )
+    replica_status = format_replica_status(context.bot_data.get("replica"))
+    if replica_status:
+        text += "\n\n" + replica_status
     await update.message.reply_text(text, parse_mode="HTML")
 
-# ---------- MAIN ----------
-if __name__ == "__main__":
-    app = ApplicationBuilder().token(TELEGRAM_TOKEN).build()
+async def throttle_requests(update: Update, context: CallbackContext):
+    # Runs before every other handler (group -1).
+    chat, user = update.effective_chat, update.effective_user
+    if chat is None:
+        return
+    if context.bot_data["request_throttle"].allow((chat.id, user.id if user else None)):
+        return
+    if update.callback_query:
+        await update.callback_query.answer("Too many taps. Give it a second.")
+    raise ApplicationHandlerStop
+
+# ---------- LIFECYCLE ----------
+async def refresh_caches(context: CallbackContext):
+    # Pull new rows into the replica, then drop cached tenders and details the
+    # scraper has rewritten since the last check. A failed sync keeps serving
+    # the last copy.
+    replica = context.bot_data.get("replica")
+    try:
+        if replica is not None:
+            changed_ids = await replica.sync()
+        else:
+            watermark = context.bot_data.get("updated_watermark")
+            changed_ids, watermark = await get_tenders_updated_since(watermark)
+            context.bot_data["updated_watermark"] = watermark
+    except Exception as exc:
+        logging.warning("Cache refresh failed: %s", exc)
+        return
+    tender_cache = context.bot_data["tender_cache"]
+    details_cache = context.bot_data["details_cache"]
+    flights = context.bot_data["flights"]
+    for tender_id in changed_ids:
+        tender_cache.invalidate(tender_id)
+        details_cache.invalidate(tender_id)
+        # Otherwise the next tap would refill the caches from a kept result.
+        flights.forget(("detail", tender_id))
+        flights.forget(("tender", tender_id))
+    # A new scrape_status row means new data: drop every coalesced result.
+    try:
+        status = await get_last_scrape_status()
+    except Exception as exc:
+        logging.warning("Scrape status check failed: %s", exc)
+        return
+    flights.set_generation(status[0] if status else None)
+
+async def on_startup(app):
+    app.bot_data["tender_cache"] = LRUCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+    app.bot_data["details_cache"] = LRUCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+    app.bot_data["export_semaphore"] = asyncio.Semaphore(max(1, EXPORT_CONCURRENCY))
+    app.bot_data["flights"] = SingleFlight(COALESCE_TTL_SECONDS, CACHE_MAX_ENTRIES)
+    app.bot_data["request_throttle"] = RequestThrottle(CHAT_REQUEST_RATE, CHAT_REQUEST_BURST)
+    # Don't block startup on a cold database; handlers report it instead.
+    await open_pool(DB_URL, wait=False)
+    app.bot_data["replica"] = open_replica(REPLICA_PATH)
+    app.job_queue.run_repeating(refresh_caches, interval=CACHE_REFRESH_SECONDS, first=1)
+    app.job_queue.run_repeating(deliver_notifications, interval=NOTIFY_INTERVAL_SECONDS, first=5)
 
+async def on_shutdown(app):
+    await close_pool()
+    close_replica()
+
+def build_application(request=None):
+    # request replaces the HTTP transport to the Bot API (benchmarks pass a stub).
+    builder = (
+        ApplicationBuilder()
+        .token(TELEGRAM_TOKEN)
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+        .rate_limiter(TelegramRateLimiter())
+    )
+    if request is not None:
+        builder = builder.request(request)
+    app = builder.build()
+
+    app.add_handler(TypeHandler(Update, throttle_requests), group=-1)
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("status", handle_status))
+    app.add_handler(CommandHandler("search", handle_search))
+    app.add_handler(CommandHandler("subscribe", handle_subscribe))
+    app.add_handler(CommandHandler("subscriptions", handle_subscriptions))
+    app.add_handler(CommandHandler("filter", handle_filter))
+    app.add_handler(CommandHandler("export", handle_export))
     app.add_handler(CallbackQueryHandler(handle_range, pattern=r"^range:"))
     app.add_handler(CallbackQueryHandler(handle_details, pattern=r"^details:"))
+    app.add_handler(CallbackQueryHandler(handle_search_page, pattern=r"^search:"))
+    app.add_handler(CallbackQueryHandler(handle_unsubscribe, pattern=r"^unsub:"))
+    app.add_handler(CallbackQueryHandler(handle_filter_callback, pattern=r"^flt:"))
+    app.add_handler(CallbackQueryHandler(handle_noop, pattern=r"^noop$"))
+    return app
 
+# ---------- MAIN ----------
+if __name__ == "__main__":
+    app = build_application()
     print("🤖 Bot is running...")
-    app.run_polling()
+    if BOT_MODE == "webhook":
+        from webhook_server import serve_webhook
+
+        asyncio.run(serve_webhook(
+            app,
+            listen=WEBHOOK_LISTEN,
+            port=WEBHOOK_PORT,
+            path=WEBHOOK_PATH,
+            secret_token=get_required_config(["WEBHOOK_SECRET"])["WEBHOOK_SECRET"],
+            webhook_url=WEBHOOK_URL,
+            concurrency=WEBHOOK_CONCURRENCY
+        ))
+    else:
+        app.run_polling()
@@ -0,0 +1,178 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class LRUCache:
+    # Bounded mapping with per-entry TTL. The least recently used entry is
+    # evicted once max_entries is reached; expired entries count as misses.
+    def __init__(self, max_entries=2000, ttl=600.0):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self.get(key, MISSING, count=False) is not MISSING
+
+    def get(self, key, default=None, count=True):
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                if count:
+                    self.hits += 1
+                return value
+            del self._entries[key]
+            self.expirations += 1
+        if count:
+            self.misses += 1
+        return default
+
+    def set(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key):
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
+
+
+class SingleFlight:
+    # Concurrent calls with the same key share one in-flight call and its
+    # result. Results are also kept for ttl seconds, but only within the
+    # generation they were computed in: set_generation() with a new value
+    # (the latest scrape's run_at) drops them all at once, forget() one key.
+    def __init__(self, ttl=30.0, max_entries=500):
+        self.generation = None
+        self.calls = 0
+        self.shared = 0
+        self.cached = 0
+        self._results = LRUCache(max_entries, ttl)
+        self._in_flight = {}
+
+    def set_generation(self, generation):
+        if generation != self.generation:
+            self.generation = generation
+            self._results.clear()
+
+    def forget(self, key):
+        # Drops the key's kept result, and stops a call still in flight from
+        # keeping its (possibly older) result; the next call queries afresh.
+        self._results.invalidate(key)
+        self._in_flight.pop(key, None)
+
+    async def do(self, key, fn):
+        result = self._results.get(key, MISSING)
+        if result is not MISSING:
+            self.cached += 1
+            return result
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.shared += 1
+            # A waiter that gets cancelled must not cancel the shared call.
+            return await asyncio.shield(future)
+
+        generation = self.generation
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        self.calls += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark it retrieved; callers without company would otherwise log
+            # "exception was never retrieved".
+            future.exception()
+            raise
+        finally:
+            current = self._in_flight.get(key) is future
+            if current:
+                del self._in_flight[key]
+        future.set_result(result)
+        if current and generation == self.generation:
+            self._results.set(key, result)
+        return result
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "cached": self.cached,
+            "in_flight": len(self._in_flight),
+            "generation": self.generation
+        }
+
+
+class _Record:
+    __slots__ = ()
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.__slots__}
+
+
+class TenderRecord(_Record):
+    __slots__ = ("id", "title", "bid_closing_date", "bid_opening_date", "published_on", "url", "summary_html")
+
+    def __init__(self, id, title, bid_closing_date, bid_opening_date, published_on, url, summary_html=None):
+        self.id = id
+        self.title = title
+        self.bid_closing_date = bid_closing_date
+        self.bid_opening_date = bid_opening_date
+        self.published_on = published_on
+        self.url = url
+        self.summary_html = summary_html
+
+
+class DetailRecord(_Record):
+    __slots__ = ("title", "description", "filed_under", "company", "metadata", "extra_fields")
+
+    def __init__(self, title, description, filed_under, company, metadata, extra_fields):
+        self.title = title
+        self.description = description
+        self.filed_under = filed_under
+        self.company = company
+        self.metadata = metadata
+        self.extra_fields = extra_fields
@@ -22,3 +22,16 @@ def get_required_config(required_keys, path=None):
         raise ValueError(f"Missing required config value(s): {missing_list}")
     return config
 
+
+def get_optional_config(key, default=None, cast=None, path=None):
+    value = os.getenv(key)
+    if not value:
+        value = load_config(path).get(key)
+    if value is None or value == "":
+        return default
+    if cast is not None:
+        try:
+            return cast(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid config value for {key}: {value!r}")
+    return value
@@ -0,0 +1,59 @@
+import re
+from datetime import datetime, timedelta
+
+DATE_PATTERNS = [
+    r"(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2}\s+\d{4}",
+    r"(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2}\s+\d{4}",
+    r"\d{1,2}\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{4}",
+    r"\d{1,2}\s+(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4}",
+    r"\d{4}-\d{2}-\d{2}",
+    r"\d{1,2}/\d{1,2}/\d{4}"
+]
+
+DATE_FORMATS = [
+    "%b %d %Y",
+    "%B %d %Y",
+    "%d %b %Y",
+    "%d %B %Y",
+    "%Y-%m-%d",
+    "%d/%m/%Y"
+]
+
+
+def _normalize_date_text(value):
+    if not value:
+        return ""
+    cleaned = value.replace(",", " ")
+    cleaned = cleaned.replace("(", " ").replace(")", " ")
+    cleaned = re.sub(r"(\d+)(st|nd|rd|th)", r"\1", cleaned, flags=re.IGNORECASE)
+    cleaned = re.sub(r"\s+", " ", cleaned).strip()
+    return cleaned
+
+
+def _extract_date_candidate(value):
+    cleaned = _normalize_date_text(value)
+    if not cleaned:
+        return ""
+    for pattern in DATE_PATTERNS:
+        match = re.search(pattern, cleaned)
+        if match:
+            return match.group(0)
+    return cleaned
+
+
+def parse_date(value, today=None):
+    cleaned = _extract_date_candidate(value)
+    if not cleaned:
+        return None
+    today = today or datetime.utcnow().date()
+    lowered = cleaned.lower()
+    if lowered == "today":
+        return today
+    if lowered == "yesterday":
+        return today - timedelta(days=1)
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(cleaned, fmt).date()
+        except ValueError:
+            continue
+    return None
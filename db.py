@@ -0,0 +1,83 @@
+import logging
+from contextlib import asynccontextmanager
+
+from psycopg_pool import AsyncConnectionPool
+
+from config_loader import get_optional_config, get_required_config
+
+# Text search configuration shared by the stored tsvectors and search queries.
+SEARCH_CONFIG = "english"
+
+_pool = None
+
+
+def get_db_url():
+    config = get_required_config(["DB_URL"])
+    return config["DB_URL"]
+
+
+def get_connect_kwargs():
+    return {"sslmode": get_optional_config("DB_SSLMODE", "require")}
+
+
+async def open_pool(db_url=None, min_size=None, max_size=None, wait=True, connect_kwargs=None):
+    global _pool
+    if _pool is not None:
+        return _pool
+    if min_size is None:
+        min_size = get_optional_config("DB_POOL_MIN_SIZE", 1, int)
+    if max_size is None:
+        max_size = get_optional_config("DB_POOL_MAX_SIZE", 5, int)
+    pool = AsyncConnectionPool(
+        db_url or get_db_url(),
+        kwargs={**get_connect_kwargs(), **(connect_kwargs or {})},
+        min_size=min_size,
+        max_size=max(min_size, max_size),
+        timeout=get_optional_config("DB_POOL_TIMEOUT", 10.0, float),
+        max_idle=get_optional_config("DB_POOL_MAX_IDLE", 300.0, float),
+        # Health-check connections on checkout so ones dropped by the remote
+        # pooler are replaced instead of failing the query.
+        check=AsyncConnectionPool.check_connection,
+        name="tenders",
+        open=False
+    )
+    await pool.open(wait=wait)
+    _pool = pool
+    logging.info("Database pool opened (min=%s, max=%s)", pool.min_size, pool.max_size)
+    return pool
+
+
+def is_pool_open():
+    return _pool is not None
+
+
+def get_pool():
+    if _pool is None:
+        raise RuntimeError("Database pool is not open. Call open_pool() first.")
+    return _pool
+
+
+async def close_pool():
+    global _pool
+    if _pool is None:
+        return
+    pool, _pool = _pool, None
+    await pool.close()
+    logging.info("Database pool closed")
+
+
+def connection():
+    # Commits when the block exits cleanly, rolls back on error.
+    return get_pool().connection()
+
+
+@asynccontextmanager
+async def pool_scope(**kwargs):
+    owns_pool = not is_pool_open()
+    if owns_pool:
+        await open_pool(**kwargs)
+    try:
+        yield get_pool()
+    finally:
+        if owns_pool:
+            await close_pool()
@@ -0,0 +1,102 @@
+import asyncio
+import csv
+import gzip
+import io
+import logging
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from psycopg import sql
+
+from db import SEARCH_CONFIG, connection
+
+# CSV exports stream rows from a named (server-side) cursor in fixed-size
+# batches and encode each batch straight into a temporary file, so memory
+# stays flat however many rows match. The file is then uploaded from disk.
+
+EXPORT_BATCH_SIZE = 2000
+EXPORT_COLUMNS = (
+    "id", "title", "published_on", "bid_closing_date", "bid_opening_date", "region", "bidding_type",
+    "categories", "company", "url"
+)
+
+
+def _export_query(days=None, terms=None):
+    # Live and archived tenders alike; see retention.py.
+    conditions, params = [], []
+    if days:
+        conditions.append(sql.SQL("t.published_date >= %s"))
+        params.append(datetime.utcnow().date() - timedelta(days=max(days - 1, 0)))
+    if terms:
+        conditions.append(sql.SQL("t.search_vector @@ websearch_to_tsquery(%s, %s)"))
+        params.extend((SEARCH_CONFIG, terms))
+    where = sql.SQL(" AND ").join(conditions) if conditions else sql.SQL("TRUE")
+    select = sql.SQL("""
+        SELECT t.id, t.title, t.published_on, t.bid_closing_date, t.bid_opening_date,
+               d.metadata_json->>'region' AS region, d.metadata_json->>'bidding_type' AS bidding_type,
+               d.filed_under AS categories, d.company, t.url, t.published_date
+        FROM {tenders} t
+        LEFT JOIN {details} d ON d.tender_id = t.id
+        WHERE {where}
+    """)
+    query = sql.SQL("""
+        SELECT {columns} FROM ({live} UNION ALL {archived}) AS tenders
+        ORDER BY published_date DESC, id
+    """).format(
+        columns=sql.SQL(", ").join(map(sql.Identifier, EXPORT_COLUMNS)),
+        live=select.format(tenders=sql.Identifier("tenders1"), details=sql.Identifier("tender_details"), where=where),
+        archived=select.format(
+            tenders=sql.Identifier("tenders_archive"), details=sql.Identifier("tender_details_archive"), where=where
+        )
+    )
+    return query, params * 2
+
+
+async def write_export(file, days=None, terms=None, compress=False, batch_size=EXPORT_BATCH_SIZE):
+    # Writes matching tenders as CSV to a binary file object and returns the
+    # row count. Only one batch is held in memory at a time.
+    query, params = _export_query(days, terms)
+    raw = gzip.GzipFile(fileobj=file, mode="wb") if compress else file
+    text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(EXPORT_COLUMNS)
+    rows_written = 0
+    try:
+        async with connection() as conn:
+            # A named cursor keeps the result on the server; each fetchmany is
+            # one round trip for batch_size rows.
+            async with conn.cursor(name="tender_export") as cur:
+                await cur.execute(query, params)
+                while True:
+                    rows = await cur.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    await asyncio.to_thread(writer.writerows, rows)
+                    rows_written += len(rows)
+    finally:
+        text.flush()
+        # Detach so closing the wrappers doesn't close the caller's file.
+        text.detach()
+        if compress:
+            raw.close()
+    return rows_written
+
+
+async def export_to_tempfile(days=None, terms=None, compress=False, batch_size=EXPORT_BATCH_SIZE):
+    # Returns (file, rows, size_bytes). The caller closes the file, which
+    # deletes it.
+    started = time.perf_counter()
+    file = tempfile.TemporaryFile()
+    try:
+        rows = await write_export(file, days, terms, compress, batch_size)
+        size = file.tell()
+        file.seek(0)
+    except BaseException:
+        file.close()
+        raise
+    logging.info(
+        "Exported %s tenders (%s bytes%s) in %.2fs",
+        rows, size, ", gzip" if compress else "", time.perf_counter() - started
+    )
+    return file, rows, size
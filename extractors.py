@@ -0,0 +1,411 @@
+import json
+import logging
+import re
+
+from config_loader import get_optional_config
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:
+    etree = None
+    lxml_html = None
+
+EXTRACTOR_BACKENDS = ("bs4", "lxml")
+# bs4 stays the default until lxml matches it on every input; lxml is faster
+# but differs on nested <p> markup (see the lxml backend below).
+DEFAULT_EXTRACTOR = get_optional_config("SCRAPER_EXTRACTOR", "bs4")
+
+LISTING_SELECTOR = "h3.font-medium.text-lg.tracking-wide.leading-6"
+DETAIL_READY_SELECTOR = "div.ant-tree-list"
+
+NEXT_DATA_PATTERN = re.compile(r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.DOTALL)
+
+DETAIL_FIELDS = {
+    "bid closing date": "bid_closing_date",
+    "bid opening date": "bid_opening_date",
+    "published on": "published_on",
+    "posted": "posted",
+    "bid document price": "bid_document_price",
+    "bid bond": "bid_bond",
+    "region": "region",
+    "bidding": "bidding_type"
+}
+
+# Key spellings accepted when reading tenders out of an embedded JSON payload.
+JSON_FIELD_ALIASES = {
+    "id": ("slug", "id", "_id", "tenderId", "tender_id"),
+    "bid_closing_date": ("bid_closing_date", "bidClosingDate", "closing_date", "closingDate"),
+    "bid_opening_date": ("bid_opening_date", "bidOpeningDate", "opening_date", "openingDate"),
+    "published_on": ("published_on", "publishedOn", "published_at", "publishedAt", "publishedDate"),
+    "posted": ("posted", "postedOn", "posted_at", "postedAt"),
+    "bid_document_price": ("bid_document_price", "bidDocumentPrice", "documentPrice"),
+    "bid_bond": ("bid_bond", "bidBond"),
+    "region": ("region", "regionName"),
+    "bidding_type": ("bidding_type", "biddingType", "bidding")
+}
+
+
+def _absolute_url(href, site_root):
+    return href if href.startswith("http") else site_root + href
+
+
+def _listing_tender(tender_id, title, full_url, dates):
+    return {
+        "id": tender_id,
+        "title": title,
+        "url": full_url,
+        "bid_closing_date": dates.get("closing"),
+        "bid_opening_date": dates.get("opening"),
+        "published_on": dates.get("published")
+    }
+
+
+def _listing_date_key(label_text):
+    lowered = label_text.lower()
+    if "closing date" in lowered:
+        return "closing"
+    if "opening date" in lowered:
+        return "opening"
+    if "published" in lowered:
+        return "published"
+    return None
+
+
+def _detail_result(title, paragraphs, categories, company, info_rows):
+    metadata = {}
+    extra_fields = {}
+    for label_text, value_text in info_rows:
+        if not value_text:
+            continue
+        key = DETAIL_FIELDS.get(label_text.lower())
+        if key:
+            metadata[key] = value_text
+        else:
+            extra_fields[label_text] = value_text
+    # Keep first-seen order so filed_under is stable across runs.
+    categories = list(dict.fromkeys(categories))
+    return {
+        "title": title,
+        "description": "\n".join(text for text in paragraphs if text),
+        "filed_under": ", ".join(categories) if categories else None,
+        "categories": categories,
+        "company": company,
+        "metadata": metadata,
+        "extra_fields": extra_fields
+    }
+
+
+# ---------- BEAUTIFULSOUP BACKEND ----------
+def _soup(html_content):
+    # Imported on first use; runs with the lxml backend never need bs4.
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(html_content, "html.parser")
+
+
+def _bs4_listing(html_content, site_root):
+    soup = _soup(html_content)
+    tenders = []
+    seen_ids = set()
+    for h3 in soup.select(LISTING_SELECTOR):
+        try:
+            a_tag = h3.select_one("a")
+            if not a_tag:
+                continue
+            href = a_tag.get("href", "").strip()
+            if not href:
+                continue
+            full_url = _absolute_url(href, site_root)
+            tender_id = full_url.rstrip("/").split("/")[-1]
+            if tender_id in seen_ids:
+                continue
+            seen_ids.add(tender_id)
+
+            dates = {}
+            detail_div = h3.find_parent().find_next_sibling("div")
+            if detail_div:
+                for row in detail_div.select("div.flex.gap-x-4"):
+                    label = row.select_one("div.font-medium")
+                    if not label:
+                        continue
+                    key = _listing_date_key(label.get_text(strip=True))
+                    if key:
+                        value_div = label.find_next_sibling("div")
+                        dates[key] = value_div.get_text(strip=True) if value_div else ""
+            tenders.append(_listing_tender(tender_id, a_tag.get_text(strip=True), full_url, dates))
+        except Exception as exc:
+            logging.warning("Skipping tender: %s", exc)
+    return tenders
+
+
+def _bs4_detail(html_content):
+    soup = _soup(html_content)
+
+    title_tag = soup.select_one("h1.text-xl.font-semibold")
+    company_tag = soup.select_one("h3.text-lg.font-medium.m-0.underline.text-blue-600 a")
+
+    info_rows = []
+    for row in soup.select("div.flex.gap-x-4.gap-y-0.p-2.flex-wrap"):
+        label_div = row.select_one("div.font-medium")
+        if not label_div:
+            continue
+        value_div = label_div.find_next_sibling("div")
+        info_rows.append((
+            label_div.get_text(strip=True).rstrip(":"),
+            value_div.get_text(strip=True) if value_div else ""
+        ))
+
+    return _detail_result(
+        title_tag.get_text(strip=True) if title_tag else None,
+        [p.get_text(strip=True) for p in soup.find_all("p")],
+        [a.get_text(strip=True) for a in soup.select("span.ant-tree-title a")],
+        company_tag.get_text(strip=True) if company_tag else None,
+        info_rows
+    )
+
+
+# ---------- LXML BACKEND ----------
+# Mirrors the BeautifulSoup selectors with precompiled XPath so each page is
+# parsed once in C and only the matched subtrees are visited from Python.
+# libxml2 closes an open <p> when another <p> or a block element starts, where
+# html.parser nests them; on such markup the descriptions differ (see
+# tests/test_extractors.py).
+_NON_TEXT_TAGS = {"script", "style", "template"}
+
+
+def _has_classes(*classes):
+    return " and ".join(
+        f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')" for name in classes
+    )
+
+
+if etree is not None:
+    _X_LISTING_H3 = etree.XPath(f"//h3[{_has_classes('font-medium', 'text-lg', 'tracking-wide', 'leading-6')}]")
+    _X_FIRST_LINK = etree.XPath("(.//a)[1]")
+    _X_NEXT_DIV = etree.XPath("following-sibling::div[1]")
+    _X_LISTING_ROWS = etree.XPath(f".//div[{_has_classes('flex', 'gap-x-4')}]")
+    _X_FIRST_LABEL = etree.XPath(f"(.//div[{_has_classes('font-medium')}])[1]")
+    _X_DETAIL_TITLE = etree.XPath(f"(//h1[{_has_classes('text-xl', 'font-semibold')}])[1]")
+    _X_DETAIL_COMPANY = etree.XPath(
+        f"(//h3[{_has_classes('text-lg', 'font-medium', 'm-0', 'underline', 'text-blue-600')}]//a)[1]"
+    )
+    _X_DETAIL_ROWS = etree.XPath(f"//div[{_has_classes('flex', 'gap-x-4', 'gap-y-0', 'p-2', 'flex-wrap')}]")
+    _X_CATEGORY_LINKS = etree.XPath(f"//span[{_has_classes('ant-tree-title')}]//a")
+    _X_PARAGRAPHS = etree.XPath("//p")
+
+
+def _lxml_text_nodes(element, parts):
+    if element.text:
+        parts.append(element.text.strip())
+    for child in element:
+        if isinstance(child.tag, str) and child.tag not in _NON_TEXT_TAGS:
+            _lxml_text_nodes(child, parts)
+        if child.tail:
+            parts.append(child.tail.strip())
+
+
+def _lxml_get_text(element):
+    # Same result as BeautifulSoup's get_text(strip=True): stripped text nodes
+    # joined without a separator, skipping comments and script/style bodies.
+    parts = []
+    _lxml_text_nodes(element, parts)
+    return "".join(parts)
+
+
+def _lxml_document(html_content):
+    if not html_content or not html_content.strip():
+        return lxml_html.fromstring("<html></html>")
+    return lxml_html.fromstring(html_content)
+
+
+def _first(xpath, node):
+    matches = xpath(node)
+    return matches[0] if matches else None
+
+
+def _lxml_listing(html_content, site_root):
+    root = _lxml_document(html_content)
+    tenders = []
+    seen_ids = set()
+    for h3 in _X_LISTING_H3(root):
+        try:
+            a_tag = _first(_X_FIRST_LINK, h3)
+            if a_tag is None:
+                continue
+            href = a_tag.get("href", "").strip()
+            if not href:
+                continue
+            full_url = _absolute_url(href, site_root)
+            tender_id = full_url.rstrip("/").split("/")[-1]
+            if tender_id in seen_ids:
+                continue
+            seen_ids.add(tender_id)
+
+            dates = {}
+            parent = h3.getparent()
+            detail_div = _first(_X_NEXT_DIV, parent) if parent is not None else None
+            if detail_div is not None:
+                for row in _X_LISTING_ROWS(detail_div):
+                    label = _first(_X_FIRST_LABEL, row)
+                    if label is None:
+                        continue
+                    key = _listing_date_key(_lxml_get_text(label))
+                    if key:
+                        value_div = _first(_X_NEXT_DIV, label)
+                        dates[key] = _lxml_get_text(value_div) if value_div is not None else ""
+            tenders.append(_listing_tender(tender_id, _lxml_get_text(a_tag), full_url, dates))
+        except Exception as exc:
+            logging.warning("Skipping tender: %s", exc)
+    return tenders
+
+
+def _lxml_detail(html_content):
+    root = _lxml_document(html_content)
+
+    title_tag = _first(_X_DETAIL_TITLE, root)
+    company_tag = _first(_X_DETAIL_COMPANY, root)
+
+    info_rows = []
+    for row in _X_DETAIL_ROWS(root):
+        label_div = _first(_X_FIRST_LABEL, row)
+        if label_div is None:
+            continue
+        value_div = _first(_X_NEXT_DIV, label_div)
+        info_rows.append((
+            _lxml_get_text(label_div).rstrip(":"),
+            _lxml_get_text(value_div) if value_div is not None else ""
+        ))
+
+    return _detail_result(
+        _lxml_get_text(title_tag) if title_tag is not None else None,
+        [_lxml_get_text(p) for p in _X_PARAGRAPHS(root)],
+        [_lxml_get_text(a) for a in _X_CATEGORY_LINKS(root)],
+        _lxml_get_text(company_tag) if company_tag is not None else None,
+        info_rows
+    )
+
+
+# ---------- PUBLIC API ----------
+_BACKENDS = {
+    "bs4": (_bs4_listing, _bs4_detail),
+    "lxml": (_lxml_listing, _lxml_detail)
+}
+
+
+def _backend(name):
+    name = name or DEFAULT_EXTRACTOR
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown extractor backend: {name}")
+    if name == "lxml" and lxml_html is None:
+        raise ValueError("The lxml extractor backend requires the lxml package.")
+    return _BACKENDS[name]
+
+
+def parse_listing_html(html_content, site_root, backend=None):
+    return _backend(backend)[0](html_content, site_root)
+
+
+def parse_detail_html(html_content, backend=None):
+    return _backend(backend)[1](html_content)
+
+
+# ---------- EMBEDDED JSON ----------
+def extract_next_data(html_content):
+    match = NEXT_DATA_PATTERN.search(html_content)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(1))
+    except json.JSONDecodeError:
+        return None
+
+
+def _iter_json_nodes(node):
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        yield current
+        if isinstance(current, dict):
+            stack.extend(reversed(list(current.values())))
+        elif isinstance(current, list):
+            stack.extend(reversed(current))
+
+
+def _json_field(record, field):
+    for key in JSON_FIELD_ALIASES.get(field, (field,)):
+        value = record.get(key)
+        if value not in (None, ""):
+            return value if isinstance(value, str) else str(value)
+    return None
+
+
+def _json_text(value):
+    if isinstance(value, dict):
+        value = value.get("name") or value.get("title")
+    return str(value).strip() if value not in (None, "") else None
+
+
+def parse_listing_next_data(payload, site_root):
+    if not payload:
+        return []
+    for node in _iter_json_nodes(payload.get("props", payload)):
+        if not isinstance(node, list) or not node:
+            continue
+        records = [item for item in node if isinstance(item, dict) and item.get("title")]
+        if len(records) != len(node) or not all(_json_field(item, "id") for item in records):
+            continue
+        tenders = []
+        seen_ids = set()
+        for record in records:
+            tender_id = _json_field(record, "id")
+            if tender_id in seen_ids:
+                continue
+            seen_ids.add(tender_id)
+            tenders.append({
+                "id": tender_id,
+                "title": _json_text(record["title"]),
+                "url": f"{site_root}/tenders/{tender_id}",
+                "bid_closing_date": _json_field(record, "bid_closing_date"),
+                "bid_opening_date": _json_field(record, "bid_opening_date"),
+                "published_on": _json_field(record, "published_on")
+            })
+        return tenders
+    return []
+
+
+def parse_detail_next_data(payload, tender_id):
+    # Only the record whose id/slug is the tender's own counts: pageProps also
+    # carries SEO and layout objects with a title and description. Without a
+    # match this returns None and the HTML extractor takes over.
+    if not payload or not tender_id:
+        return None
+    for node in _iter_json_nodes(payload.get("props", payload)):
+        if not isinstance(node, dict) or not node.get("title") or "description" not in node:
+            continue
+        if _json_field(node, "id") != tender_id:
+            continue
+        categories = node.get("categories") or node.get("category") or []
+        if not isinstance(categories, list):
+            categories = [categories]
+        category_names = list(dict.fromkeys(filter(None, (_json_text(c) for c in categories))))
+        metadata = {}
+        for key in DETAIL_FIELDS.values():
+            value = _json_field(node, key)
+            if value:
+                metadata[key] = value
+        description = node.get("description") or ""
+        if "<" in description:
+            fragment = _soup(description)
+            paragraphs = [p.get_text(strip=True) for p in fragment.find_all("p")]
+            description = "\n".join(text for text in paragraphs if text) or fragment.get_text(strip=True)
+        return {
+            "title": _json_text(node["title"]),
+            "description": description,
+            "filed_under": ", ".join(category_names) if category_names else None,
+            "categories": category_names,
+            "company": _json_text(node.get("company") or node.get("companyName")),
+            "metadata": metadata,
+            "extra_fields": {}
+        }
+    return None
@@ -0,0 +1,334 @@
+import asyncio
+import logging
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) TenderScrapperBot/1.0",
+    "Accept": "text/html,application/xhtml+xml,application/json;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en"
+}
+
+
+# Resource types the lean browser profile lets through. First-party scripts
+# stay allowed because the listing and detail pages are rendered client-side.
+LEAN_ALLOWED_RESOURCE_TYPES = frozenset({"document", "xhr", "fetch", "script"})
+
+
+def _site_domain(url):
+    host = urlsplit(url).hostname or ""
+    labels = host.split(".")
+    if len(labels) > 2 and not host.replace(".", "").isdigit():
+        return ".".join(labels[-2:])
+    return host
+
+
+class FetchError(Exception):
+    pass
+
+
+# A browser that is kept across runs is relaunched after this many page loads
+# or this many seconds, whichever comes first, to cap Chromium's memory growth.
+DEFAULT_MAX_PAGES_PER_BROWSER = 500
+DEFAULT_MAX_BROWSER_AGE = 6 * 3600
+HEALTH_CHECK_TIMEOUT = 10.0
+
+
+class HttpFetcher:
+    # Plain HTTP fast path: one pooled keep-alive session for the whole run.
+    def __init__(self, max_connections=8, timeout=30.0, headers=None):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.headers = headers or DEFAULT_HEADERS
+        self.requests = 0
+        self.bytes_fetched = 0
+        self._session = None
+
+    async def start(self):
+        if self._session is None:
+            import aiohttp
+
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                keepalive_timeout=30,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers=self.headers
+            )
+        return self
+
+    async def fetch(self, url):
+        import aiohttp
+
+        await self.start()
+        self.requests += 1
+        try:
+            async with self._session.get(url) as response:
+                body = await response.read()
+                self.bytes_fetched += len(body)
+                if response.status >= 400:
+                    raise FetchError(f"HTTP {response.status} for {url}")
+                return body.decode(response.get_encoding() or "utf-8", errors="replace")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            raise FetchError(f"{type(exc).__name__} for {url}: {exc}") from exc
+
+    async def close(self):
+        if self._session is not None:
+            session, self._session = self._session, None
+            await session.close()
+
+
+class PlaywrightFetcher:
+    # Headless Chromium fallback. The browser is launched on first use, so a
+    # run served entirely by the HTTP fast path never starts Chromium. Pages
+    # are pooled and reused across navigations, and the lean profile aborts
+    # images, fonts, stylesheets, media and any third-party request.
+    #
+    # One instance can outlive many scrape runs: a crashed browser is
+    # relaunched on the next fetch, and an idle one is recycled once it has
+    # loaded max_pages_per_browser pages or is max_browser_age seconds old.
+    def __init__(
+        self,
+        headless=True,
+        navigation_timeout=60000,
+        selector_timeout=15000,
+        lean=True,
+        page_pool_size=4,
+        max_pages_per_browser=DEFAULT_MAX_PAGES_PER_BROWSER,
+        max_browser_age=DEFAULT_MAX_BROWSER_AGE
+    ):
+        self.headless = headless
+        self.navigation_timeout = navigation_timeout
+        self.selector_timeout = selector_timeout
+        self.lean = lean
+        self.page_pool_size = max(1, page_pool_size)
+        self.max_pages_per_browser = max_pages_per_browser
+        self.max_browser_age = max_browser_age
+        self.requests = 0
+        self.bytes_fetched = 0
+        self.stats = {
+            "pages_loaded": 0,
+            "load_seconds": 0.0,
+            "pages_created": 0,
+            "pages_recycled": 0,
+            "blocked_requests": 0,
+            "launch_seconds": 0.0,
+            "navigation_timeouts": 0,
+            "selector_timeouts": 0,
+            "browser_launches": 0,
+            "browser_relaunches": 0,
+            "browser_recycles": 0
+        }
+        self._first_party = set()
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._idle_pages = None
+        self._page_count = 0
+        self._generation = 0
+        self._in_flight = 0
+        self._launched_at = None
+        self._pages_since_launch = 0
+        self._launch_lock = asyncio.Lock()
+
+    @property
+    def launched(self):
+        return self._browser is not None
+
+    def _due_for_recycle(self):
+        if self._launched_at is None:
+            return False
+        if self.max_pages_per_browser and self._pages_since_launch >= self.max_pages_per_browser:
+            return True
+        return bool(self.max_browser_age) and time.monotonic() - self._launched_at >= self.max_browser_age
+
+    async def start(self):
+        async with self._launch_lock:
+            if self._browser is not None and not self._browser.is_connected():
+                logging.warning("Chromium disconnected; relaunching")
+                self.stats["browser_relaunches"] += 1
+                await self._discard_browser()
+            elif self._in_flight <= 1 and self._due_for_recycle():
+                # Only when the caller is the sole fetch in progress.
+                logging.info("Recycling Chromium after %s pages", self._pages_since_launch)
+                self.stats["browser_recycles"] += 1
+                await self._discard_browser()
+            if self._browser is None:
+                await self._launch()
+        return self._browser
+
+    async def _launch(self):
+        started = time.perf_counter()
+        if self._playwright is None:
+            from playwright.async_api import async_playwright
+
+            self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=self.headless)
+        self._context = await self._browser.new_context(
+            service_workers="block" if self.lean else "allow"
+        )
+        if self.lean:
+            await self._context.route("**/*", self._route)
+        self._idle_pages = asyncio.Queue()
+        self._page_count = 0
+        self._launched_at = time.monotonic()
+        self._pages_since_launch = 0
+        self.stats["browser_launches"] += 1
+        self.stats["launch_seconds"] += time.perf_counter() - started
+        logging.info("Launched headless Chromium (lean=%s)", self.lean)
+
+    async def _discard_browser(self):
+        # Pages still checked out belong to the old generation and are dropped
+        # when released.
+        context, self._context = self._context, None
+        browser, self._browser = self._browser, None
+        if self._idle_pages is not None:
+            for _ in range(self._in_flight):
+                self._idle_pages.put_nowait(None)
+        self._idle_pages = None
+        self._page_count = 0
+        self._generation += 1
+        self._launched_at = None
+        for closeable in (context, browser):
+            if closeable is None:
+                continue
+            try:
+                await closeable.close()
+            except Exception as exc:
+                logging.debug("Closing the old browser failed: %s", exc)
+
+    async def check_health(self):
+        # Opens a blank page and evaluates a trivial script. A browser that
+        # fails is discarded and relaunched on the next fetch. A browser that
+        # was never launched counts as healthy.
+        if self._browser is None or self._in_flight:
+            return True
+        try:
+            async def probe():
+                page = await self._context.new_page()
+                try:
+                    await page.evaluate("1 + 1")
+                finally:
+                    await page.close()
+
+            await asyncio.wait_for(probe(), HEALTH_CHECK_TIMEOUT)
+            return True
+        except Exception as exc:
+            logging.warning("Browser health check failed: %s", exc)
+            async with self._launch_lock:
+                self.stats["browser_relaunches"] += 1
+                await self._discard_browser()
+            return False
+
+    async def _route(self, route):
+        request = route.request
+        resource_type = request.resource_type
+        first_party = _site_domain(request.url) in self._first_party
+        if resource_type in LEAN_ALLOWED_RESOURCE_TYPES and first_party:
+            await route.continue_()
+            return
+        # Counted per reason (blocked_image, blocked_font, ..., or
+        # blocked_third_party for otherwise allowed types from other hosts).
+        reason = "third_party" if resource_type in LEAN_ALLOWED_RESOURCE_TYPES else resource_type
+        self.stats["blocked_requests"] += 1
+        self.stats[f"blocked_{reason}"] = self.stats.get(f"blocked_{reason}", 0) + 1
+        await route.abort("blockedbyclient")
+
+    async def _on_request_finished(self, request):
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return
+        self.bytes_fetched += sizes.get("responseBodySize", 0) + sizes.get("responseHeadersSize", 0)
+
+    async def _new_page(self):
+        page = await self._context.new_page()
+        page.on("requestfinished", self._on_request_finished)
+        self.stats["pages_created"] += 1
+        return page
+
+    async def _acquire_page(self, generation):
+        # A None in the idle queue means a pool slot was freed (or the browser
+        # replaced), so waiters re-check instead of blocking forever.
+        idle_pages = self._idle_pages
+        while True:
+            if generation != self._generation or idle_pages is not self._idle_pages:
+                raise FetchError("Browser was relaunched while waiting for a page")
+            if idle_pages.empty() and self._page_count < self.page_pool_size:
+                self._page_count += 1
+                try:
+                    return await self._new_page()
+                except Exception:
+                    self._page_count -= 1
+                    idle_pages.put_nowait(None)
+                    raise
+            page = await idle_pages.get()
+            if page is not None:
+                return page
+
+    async def _release_page(self, page, healthy, generation):
+        if generation != self._generation:
+            # The browser was relaunched while this page was in use.
+            try:
+                await page.close()
+            except Exception:
+                pass
+            return
+        if not healthy:
+            # A failed navigation can leave the page mid-load; replace it.
+            self.stats["pages_recycled"] += 1
+            try:
+                await page.close()
+            except Exception:
+                pass
+            try:
+                page = await self._new_page()
+            except Exception as exc:
+                logging.warning("Could not replace browser page: %s", exc)
+                self._page_count -= 1
+                self._idle_pages.put_nowait(None)
+                return
+        self._idle_pages.put_nowait(page)
+
+    async def fetch(self, url, wait_selector=None):
+        self._in_flight += 1
+        try:
+            return await self._fetch(url, wait_selector)
+        finally:
+            self._in_flight -= 1
+
+    async def _fetch(self, url, wait_selector):
+        await self.start()
+        self._first_party.add(_site_domain(url))
+        self.requests += 1
+        generation = self._generation
+        page = await self._acquire_page(generation)
+        self._pages_since_launch += 1
+        healthy = False
+        started = time.perf_counter()
+        stage = "navigation"
+        try:
+            await page.goto(url, timeout=self.navigation_timeout, wait_until="domcontentloaded")
+            stage = "selector"
+            if wait_selector:
+                await page.wait_for_selector(wait_selector, timeout=self.selector_timeout)
+            html_content = await page.content()
+            healthy = True
+            self.stats["pages_loaded"] += 1
+            self.stats["load_seconds"] += time.perf_counter() - started
+            return html_content
+        except Exception as exc:
+            if type(exc).__name__ == "TimeoutError":
+                self.stats[f"{stage}_timeouts"] += 1
+            raise FetchError(f"{type(exc).__name__} for {url}: {exc}") from exc
+        finally:
+            await self._release_page(page, healthy, generation)
+
+    async def close(self):
+        await self._discard_browser()
+        if self._playwright is not None:
+            playwright, self._playwright = self._playwright, None
+            await playwright.stop()
@@ -0,0 +1,74 @@
+import html
+
+# Bump whenever the output of the render_* functions changes; migrate_db.py
+# re-renders every stored message whose version differs.
+RENDERER_VERSION = 1
+
+MESSAGE_LIMIT = 4000
+DETAILS_UNAVAILABLE = (
+    "ℹ️ Details are not available yet.\n"
+    "Please try again later after the scheduled scraper runs."
+)
+
+
+def truncate(text, max_len=1800):
+    if text and len(text) > max_len:
+        return text[: max_len - 3].rstrip() + "..."
+    return text
+
+
+def render_tender_summary(tender):
+    # Digest entry without its number; the bot prefixes the position on the page.
+    title = truncate(tender.get("title") or "Untitled tender", 200)
+    return (
+        f"📌 <b>{html.escape(title)}</b>\n"
+        f"🗓 Closing: {html.escape(tender.get('bid_closing_date') or 'N/A')}\n"
+        f"📅 Published: {html.escape(tender.get('published_on') or 'N/A')}"
+    )
+
+
+def render_tender_details(tender, details):
+    if not details:
+        return DETAILS_UNAVAILABLE
+    title = details.get("title") or tender.get("title") or "Tender Details"
+    title_html = html.escape(title)
+    closing = html.escape(tender.get("bid_closing_date") or "N/A")
+    opening = html.escape(tender.get("bid_opening_date") or "N/A")
+    filed_under = html.escape(details.get("filed_under") or "N/A")
+    company = html.escape(details.get("company") or "N/A")
+    metadata = details.get("metadata") or {}
+    extra_fields = details.get("extra_fields") or {}
+    description = html.escape(details.get("description") or "No description available.")
+
+    lines = [
+        f"📌 <b>{title_html}</b>",
+        f"🗓 <b>Closing</b>: {closing}",
+        f"🗓 <b>Opening</b>: {opening}",
+        f"🏢 <b>Company</b>: {company}",
+        f"🗂 <b>Filed under</b>: {filed_under}"
+    ]
+
+    def add_field(label, key):
+        value = metadata.get(key)
+        if value:
+            lines.append(f"{label}: {html.escape(value)}")
+
+    add_field("📅 <b>Published</b>", "published_on")
+    add_field("🗓 <b>Posted</b>", "posted")
+    add_field("💵 <b>Bid document price</b>", "bid_document_price")
+    add_field("💰 <b>Bid bond</b>", "bid_bond")
+    add_field("📍 <b>Region</b>", "region")
+    add_field("🧾 <b>Bidding</b>", "bidding_type")
+
+    for label in sorted(extra_fields.keys()):
+        value = extra_fields[label]
+        if value:
+            lines.append(f"• <b>{html.escape(label)}</b>: {html.escape(value)}")
+
+    message = "\n".join(lines) + "\n\n" + truncate(description, 1800)
+    if len(message) > MESSAGE_LIMIT:
+        message = "\n".join(lines) + "\n\n" + truncate(description, 1200)
+    if len(message) > MESSAGE_LIMIT:
+        trimmed_lines = [line for line in lines if not line.startswith("• ")]
+        message = "\n".join(trimmed_lines) + "\n\n" + truncate(description, 1200)
+    return message
@@ -0,0 +1,108 @@
+import logging
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+METRIC_PREFIX = "tender_scrape"
+QUANTILES = (0.5, 0.95, 0.99)
+
+_last_run = None
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class ScrapeMetrics:
+    # Per-run timings and counters. span() works around awaits too, so the
+    # fetchers, parsers and writers all record into the same object.
+    def __init__(self):
+        self.timings = defaultdict(list)
+        self.counters = Counter()
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def span(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage].append(time.perf_counter() - started)
+
+    def observe(self, stage, seconds):
+        self.timings[stage].append(seconds)
+
+    def incr(self, name, amount=1):
+        self.counters[name] += amount
+
+    def summary(self):
+        stages = {}
+        for stage, values in self.timings.items():
+            stages[stage] = {
+                "count": len(values),
+                "total": round(sum(values), 4),
+                "p50": round(percentile(values, 0.5), 4),
+                "p95": round(percentile(values, 0.95), 4),
+                "p99": round(percentile(values, 0.99), 4),
+                "max": round(max(values), 4)
+            }
+        return {
+            "wall_seconds": round(time.perf_counter() - self._started, 3),
+            "stages": stages,
+            "counters": dict(self.counters)
+        }
+
+
+def set_last_run(summary):
+    global _last_run
+    _last_run = summary
+
+
+def get_last_run():
+    return _last_run
+
+
+def render_prometheus(summary):
+    # Prometheus text exposition format for the most recent run.
+    if not summary:
+        return ""
+    lines = [
+        f"# HELP {METRIC_PREFIX}_wall_seconds Wall time of the last scrape run.",
+        f"# TYPE {METRIC_PREFIX}_wall_seconds gauge",
+        f"{METRIC_PREFIX}_wall_seconds {summary['wall_seconds']}",
+        f"# HELP {METRIC_PREFIX}_stage_seconds Per-stage timings of the last scrape run.",
+        f"# TYPE {METRIC_PREFIX}_stage_seconds summary"
+    ]
+    for stage, stats in sorted(summary["stages"].items()):
+        for quantile in QUANTILES:
+            key = f"p{round(quantile * 100)}"
+            lines.append(f'{METRIC_PREFIX}_stage_seconds{{stage="{stage}",quantile="{quantile}"}} {stats[key]}')
+        lines.append(f'{METRIC_PREFIX}_stage_seconds_sum{{stage="{stage}"}} {stats["total"]}')
+        lines.append(f'{METRIC_PREFIX}_stage_seconds_count{{stage="{stage}"}} {stats["count"]}')
+    lines.append(f"# HELP {METRIC_PREFIX}_events Counters from the last scrape run.")
+    lines.append(f"# TYPE {METRIC_PREFIX}_events gauge")
+    for name, value in sorted(summary["counters"].items()):
+        lines.append(f'{METRIC_PREFIX}_events{{name="{name}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+async def start_metrics_server(port, host="0.0.0.0"):
+    from aiohttp import web
+
+    async def handle_metrics(request):
+        return web.Response(
+            text=render_prometheus(get_last_run()),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+        )
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logging.info("Serving scrape metrics on http://%s:%s/metrics", host, port)
+    return runner
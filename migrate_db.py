@@ -0,0 +1,40 @@
+import argparse
+import asyncio
+import logging
+
+from db import pool_scope
+from scraper_lib import (
+    backfill_categories,
+    backfill_content_hashes,
+    backfill_parsed_dates,
+    backfill_search_vectors,
+    init_db,
+    rerender_stored_messages
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Apply schema migrations, backfill derived columns and re-render stale messages.")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=500,
+        help="Rows to backfill per transaction."
+    )
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    async with pool_scope():
+        await init_db()
+        await backfill_parsed_dates(batch_size=args.batch_size)
+        await rerender_stored_messages(batch_size=args.batch_size)
+        await backfill_search_vectors(batch_size=args.batch_size)
+        await backfill_content_hashes(batch_size=args.batch_size)
+        await backfill_categories()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+# Telegram's documented ceilings are ~30 messages/second overall, about one
+# message/second per chat and 20 messages/minute per group. Stay a bit below.
+GLOBAL_RATE = 25.0
+CHAT_RATE = 1.0
+GROUP_RATE = 20 / 60
+MAX_TRACKED_CHATS = 10_000
+
+
+def _rewind_uploads(data):
+    # Uploads streamed from a file handle (InputFile with
+    # read_file_handle=False) were consumed by the failed attempt.
+    for value in data.values():
+        content = getattr(value, "input_file_content", None)
+        if hasattr(content, "seek"):
+            content.seek(0)
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self):
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    async def acquire(self):
+        # The lock queues waiters in arrival order, so each bucket behaves like
+        # a FIFO send queue.
+        async with self._lock:
+            while not self.try_acquire():
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def is_full(self):
+        self._refill()
+        return self._tokens >= self.capacity
+
+
+class TelegramRateLimiter(BaseRateLimiter):
+    # Every Bot API call made through the Application passes through here.
+    # Calls addressed to a chat wait for that chat's bucket and then the global
+    # bucket. Calls without a chat (answerCallbackQuery, getUpdates, ...) go
+    # straight through. A RetryAfter from Telegram pauses all sends and is retried.
+    def __init__(
+        self,
+        global_rate=GLOBAL_RATE,
+        chat_rate=CHAT_RATE,
+        group_rate=GROUP_RATE,
+        max_retries=2
+    ):
+        self.global_bucket = TokenBucket(global_rate, capacity=max(1, int(global_rate)))
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self.stats = {"delayed": 0, "retry_after": 0}
+        self._chat_buckets = OrderedDict()
+        self._paused_until = 0.0
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        self._chat_buckets.clear()
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            rate = self.group_rate if is_group else self.chat_rate
+            bucket = TokenBucket(rate, capacity=3)
+            self._chat_buckets[chat_id] = bucket
+            if len(self._chat_buckets) > MAX_TRACKED_CHATS:
+                self._evict_idle_buckets()
+        else:
+            self._chat_buckets.move_to_end(chat_id)
+        return bucket
+
+    def _evict_idle_buckets(self):
+        for chat_id in list(self._chat_buckets)[: len(self._chat_buckets) - MAX_TRACKED_CHATS]:
+            if self._chat_buckets[chat_id].is_full():
+                del self._chat_buckets[chat_id]
+
+    async def _wait_for_slot(self, chat_id):
+        started = time.monotonic()
+        if chat_id is not None:
+            await self._chat_bucket(chat_id).acquire()
+        await self.global_bucket.acquire()
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+        if time.monotonic() - started > 0.05:
+            self.stats["delayed"] += 1
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        chat_id = data.get("chat_id")
+        if chat_id is None:
+            return await callback(*args, **kwargs)
+
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_slot(chat_id)
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as exc:
+                if attempt >= self.max_retries:
+                    raise
+                self.stats["retry_after"] += 1
+                retry_after = exc.retry_after
+                if not isinstance(retry_after, (int, float)):
+                    retry_after = retry_after.total_seconds()
+                logging.warning("%s hit flood control; retrying in %ss", endpoint, retry_after)
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+                _rewind_uploads(data)
+        return None
+
+
+class RequestThrottle:
+    # Incoming-side counterpart of TelegramRateLimiter: caps how often one
+    # user in one chat can trigger handlers, so button mashing can't turn into
+    # a stream of DB queries.
+    def __init__(self, rate, burst, max_tracked=MAX_TRACKED_CHATS):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_tracked = max_tracked
+        self.throttled = 0
+        self._buckets = OrderedDict()
+
+    def allow(self, key):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, capacity=self.burst)
+            self._buckets[key] = bucket
+            while len(self._buckets) > self.max_tracked:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        if bucket.try_acquire():
+            return True
+        self.throttled += 1
+        return False
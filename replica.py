@@ -0,0 +1,345 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from db import connection
+
+# Local SQLite mirror of the tables the bot reads. It is refreshed by pulling
+# rows whose updated_at (or id, for scrape_status) moved past a stored
+# watermark, and keeps answering from the last good copy while Postgres is
+# unreachable. Tenders moved to the archive tables (retention.py) are deleted
+# here by the same watermark scheme on tenders_archive.archived_at.
+
+SYNC_BATCH_SIZE = 2000
+# updated_at comes from now() at the start of the writing transaction, so a
+# long transaction can commit rows older than the watermark. Re-reading a
+# short window on every sync picks those up. Rows already mirrored with the
+# same updated_at are skipped and not reported as changed.
+SYNC_OVERLAP = timedelta(minutes=5)
+EPOCH = datetime(1970, 1, 1)
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS tenders1 (
+        id TEXT PRIMARY KEY,
+        title TEXT,
+        url TEXT,
+        bid_closing_date TEXT,
+        bid_opening_date TEXT,
+        published_on TEXT,
+        published_date TEXT,
+        summary_html TEXT,
+        renderer_version INTEGER,
+        updated_at TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_tenders1_published_date ON tenders1 (published_date DESC, id)",
+    """
+    CREATE TABLE IF NOT EXISTS tender_details (
+        tender_id TEXT PRIMARY KEY,
+        title TEXT,
+        description TEXT,
+        filed_under TEXT,
+        company TEXT,
+        metadata_json TEXT,
+        extra_fields_json TEXT,
+        message_html TEXT,
+        renderer_version INTEGER,
+        updated_at TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS scrape_status (
+        id INTEGER PRIMARY KEY,
+        run_at TEXT,
+        pages_scraped INTEGER,
+        tenders_saved INTEGER
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS scrape_metrics (
+        scrape_status_id INTEGER PRIMARY KEY,
+        wall_seconds REAL,
+        metrics_json TEXT
+    )
+    """,
+    "CREATE TABLE IF NOT EXISTS sync_state (name TEXT PRIMARY KEY, watermark TEXT, synced_at REAL)"
+)
+
+# Postgres source query, SQLite upsert and key column per mirrored table. Each
+# source query is keyset-paginated on (updated_at, key).
+TABLES = {
+    "tenders1": (
+        """
+        SELECT id, title, url, bid_closing_date, bid_opening_date, published_on, published_date,
+               summary_html, renderer_version, updated_at
+        FROM tenders1
+        WHERE (updated_at, id) > (%s, %s)
+        ORDER BY updated_at, id
+        LIMIT %s
+        """,
+        "INSERT OR REPLACE INTO tenders1 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        "id"
+    ),
+    "tender_details": (
+        """
+        SELECT tender_id, title, description, filed_under, company, metadata_json, extra_fields_json,
+               message_html, renderer_version, updated_at
+        FROM tender_details
+        WHERE (updated_at, tender_id) > (%s, %s)
+        ORDER BY updated_at, tender_id
+        LIMIT %s
+        """,
+        "INSERT OR REPLACE INTO tender_details VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        "tender_id"
+    )
+}
+
+_replica = None
+
+
+def _sqlite_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+class Replica:
+    def __init__(self, path):
+        self.path = path
+        self.last_error = None
+        self.synced_at = None
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+        # Syncs write through their own connection in a worker thread, so reads
+        # on self._db only ever see committed batches (WAL keeps them apart).
+        self._writer = sqlite3.connect(path, check_same_thread=False)
+        self._writer.execute("PRAGMA synchronous=NORMAL")
+        self._lock = asyncio.Lock()
+        # A copy left by an earlier run is served until the first sync lands.
+        self.ready = self._db.execute("SELECT 1 FROM sync_state LIMIT 1").fetchone() is not None
+
+    def close(self):
+        self._writer.close()
+        self._db.close()
+
+    # ---------- sync ----------
+    def _watermark(self, name):
+        row = self._db.execute("SELECT watermark FROM sync_state WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _write(self, name, rows, watermark):
+        # Upserts the rows whose updated_at differs from the mirrored copy and
+        # returns their keys; rows re-read from the overlap window are skipped.
+        _, upsert, key = TABLES[name]
+        lookup = f"SELECT updated_at FROM {name} WHERE {key} = ?"
+        values = []
+        for row in rows:
+            row = tuple(_sqlite_value(value) for value in row)
+            mirrored = self._writer.execute(lookup, (row[0],)).fetchone()
+            if mirrored is None or mirrored[0] != row[-1]:
+                values.append(row)
+        with self._writer:
+            self._writer.executemany(upsert, values)
+            self._writer.execute(
+                "INSERT OR REPLACE INTO sync_state (name, watermark, synced_at) VALUES (?, ?, ?)",
+                (name, watermark, time.time())
+            )
+        return [row[0] for row in values]
+
+    async def _sync_table(self, name):
+        source = TABLES[name][0]
+        stored = self._watermark(name)
+        stored = datetime.fromisoformat(stored) if stored else EPOCH
+        since = max(EPOCH, stored - SYNC_OVERLAP)
+        last_key = ""
+        changed = []
+        while True:
+            async with connection() as conn:
+                cur = await conn.execute(source, (since, last_key, SYNC_BATCH_SIZE))
+                rows = await cur.fetchall()
+            if not rows:
+                break
+            since, last_key = rows[-1][-1], rows[-1][0]
+            changed += await asyncio.to_thread(self._write, name, rows, _sqlite_value(max(since, stored)))
+            if len(rows) < SYNC_BATCH_SIZE:
+                break
+        return changed
+
+    def _delete_archived(self, ids, watermark):
+        # Returns the ids that were still mirrored.
+        deleted = []
+        with self._writer:
+            for tender_id in ids:
+                removed = self._writer.execute("DELETE FROM tenders1 WHERE id = ?", (tender_id,)).rowcount
+                removed += self._writer.execute("DELETE FROM tender_details WHERE tender_id = ?", (tender_id,)).rowcount
+                if removed:
+                    deleted.append(tender_id)
+            self._writer.execute(
+                "INSERT OR REPLACE INTO sync_state (name, watermark, synced_at) VALUES (?, ?, ?)",
+                ("tenders_archive", watermark, time.time())
+            )
+        return deleted
+
+    async def _sync_archived(self):
+        stored = self._watermark("tenders_archive")
+        stored = datetime.fromisoformat(stored) if stored else EPOCH
+        since = max(EPOCH, stored - SYNC_OVERLAP)
+        last_key = ""
+        archived = []
+        while True:
+            async with connection() as conn:
+                cur = await conn.execute("""
+                    SELECT id, archived_at
+                    FROM tenders_archive
+                    WHERE (archived_at, id) > (%s, %s)
+                    ORDER BY archived_at, id
+                    LIMIT %s
+                """, (since, last_key, SYNC_BATCH_SIZE))
+                rows = await cur.fetchall()
+            if not rows:
+                break
+            since, last_key = rows[-1][1], rows[-1][0]
+            ids = [row[0] for row in rows]
+            archived += await asyncio.to_thread(self._delete_archived, ids, _sqlite_value(max(since, stored)))
+            if len(rows) < SYNC_BATCH_SIZE:
+                break
+        return archived
+
+    async def _sync_status(self):
+        row = self._db.execute("SELECT coalesce(max(id), 0) FROM scrape_status").fetchone()
+        async with connection() as conn:
+            cur = await conn.execute("""
+                SELECT s.id, s.run_at, s.pages_scraped, s.tenders_saved, m.wall_seconds, m.metrics_json
+                FROM scrape_status s
+                LEFT JOIN scrape_metrics m ON m.scrape_status_id = s.id
+                WHERE s.id > %s
+                ORDER BY s.id
+            """, (row[0],))
+            rows = await cur.fetchall()
+        if rows:
+            await asyncio.to_thread(self._write_status, rows)
+
+    def _write_status(self, rows):
+        with self._writer:
+            self._writer.executemany(
+                "INSERT OR REPLACE INTO scrape_status VALUES (?, ?, ?, ?)",
+                [(row[0], _sqlite_value(row[1]), row[2], row[3]) for row in rows]
+            )
+            self._writer.executemany(
+                "INSERT OR REPLACE INTO scrape_metrics VALUES (?, ?, ?)",
+                [(row[0], row[4], row[5]) for row in rows if row[5] is not None]
+            )
+
+    async def sync(self):
+        # Returns the tender ids whose listing or details changed, or that were
+        # archived, since the last sync, for cache invalidation.
+        async with self._lock:
+            try:
+                changed = await self._sync_table("tenders1")
+                changed += await self._sync_table("tender_details")
+                changed += await self._sync_archived()
+                await self._sync_status()
+            except Exception as exc:
+                self.last_error = str(exc)
+                raise
+            self.last_error = None
+            self.synced_at = time.time()
+            self.ready = True
+        return list(dict.fromkeys(changed))
+
+    def last_synced(self):
+        if self.synced_at is not None:
+            return self.synced_at
+        return self._db.execute("SELECT max(synced_at) FROM sync_state").fetchone()[0]
+
+    def count(self, table):
+        return self._db.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+
+    # ---------- reads ----------
+    def last_scrape_status(self):
+        return self._db.execute(
+            "SELECT run_at, pages_scraped, tenders_saved FROM scrape_status ORDER BY run_at DESC LIMIT 1"
+        ).fetchone()
+
+    def recent_run_metrics(self, limit):
+        return self._db.execute("""
+            SELECT m.metrics_json
+            FROM scrape_metrics m
+            JOIN scrape_status s ON s.id = m.scrape_status_id
+            ORDER BY s.run_at DESC
+            LIMIT ?
+        """, (limit,)).fetchall()
+
+    def tenders_page(self, cutoff_date, renderer_version, page, page_size):
+        cutoff = cutoff_date.isoformat()
+        rows = self._db.execute("""
+            SELECT id, title, bid_closing_date, bid_opening_date, published_on, url,
+                   CASE WHEN renderer_version = ? THEN summary_html END,
+                   count(*) OVER ()
+            FROM tenders1
+            WHERE published_date >= ?
+            ORDER BY published_date DESC, id
+            LIMIT ? OFFSET ?
+        """, (renderer_version, cutoff, page_size, page * page_size)).fetchall()
+        if not rows and page > 0:
+            total = self._db.execute(
+                "SELECT count(*) FROM tenders1 WHERE published_date >= ?", (cutoff,)
+            ).fetchone()[0]
+            return [], total
+        return rows, (rows[0][7] if rows else 0)
+
+    def tender_by_id(self, tender_id):
+        return self._db.execute(
+            "SELECT id, title, bid_closing_date, bid_opening_date, published_on, url FROM tenders1 WHERE id = ?",
+            (tender_id,)
+        ).fetchone()
+
+    def tender_details(self, tender_id):
+        return self._db.execute("""
+            SELECT title, description, filed_under, company, metadata_json, extra_fields_json
+            FROM tender_details
+            WHERE tender_id = ?
+        """, (tender_id,)).fetchone()
+
+    def detail_message(self, tender_id):
+        return self._db.execute(
+            "SELECT message_html, renderer_version FROM tender_details WHERE tender_id = ?",
+            (tender_id,)
+        ).fetchone()
+
+
+def open_replica(path):
+    global _replica
+    if _replica is None and path:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        _replica = Replica(path)
+        logging.info("Opened local replica at %s", path)
+    return _replica
+
+
+def get_replica():
+    # The replica only answers reads once it holds a synced copy.
+    if _replica is not None and _replica.ready:
+        return _replica
+    return None
+
+
+def close_replica():
+    global _replica
+    if _replica is not None:
+        replica, _replica = _replica, None
+        replica.close()
@@ -0,0 +1,129 @@
+import logging
+import zlib
+from datetime import datetime, timedelta
+
+from psycopg import sql
+
+from db import connection
+
+# Tenders whose closing date passed more than archive_after_days ago move out
+# of tenders1 / tender_details into tenders_archive / tender_details_archive,
+# keeping the tables the bot's hot paths read small. /search and /export
+# read both; details taps fall back to the archive. Rows are moved by column
+# name, so a column added to a live table only needs adding to its archive.
+
+DEFAULT_ARCHIVE_BATCH_SIZE = 500
+# Archive-only bookkeeping columns, never present in the live tables.
+ARCHIVE_ONLY_COLUMNS = ("archived_at", "description_compressed")
+
+
+async def _shared_columns(conn, table, archive):
+    cur = await conn.execute("""
+        SELECT a.column_name
+        FROM information_schema.columns a
+        JOIN information_schema.columns l
+          ON l.table_schema = a.table_schema AND l.column_name = a.column_name AND l.table_name = %s
+        WHERE a.table_schema = current_schema()
+          AND a.table_name = %s
+          AND a.column_name <> ALL(%s)
+        ORDER BY a.ordinal_position
+    """, (table, archive, list(ARCHIVE_ONLY_COLUMNS)))
+    return [row[0] for row in await cur.fetchall()]
+
+
+async def _archive_only_columns(conn, archive):
+    cur = await conn.execute("""
+        SELECT column_name
+        FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = %s AND column_name = ANY(%s)
+    """, (archive, list(ARCHIVE_ONLY_COLUMNS)))
+    return [row[0] for row in await cur.fetchall()]
+
+
+async def _move_rows(conn, table, archive, key, columns, archive_only, ids):
+    # A tender can be archived again after being re-scraped into the live
+    # table; the newer copy replaces the archived one and its bookkeeping
+    # columns start over.
+    assignments = [
+        sql.SQL("{column} = EXCLUDED.{column}").format(column=sql.Identifier(column))
+        for column in columns if column != key
+    ] + [sql.SQL("{column} = DEFAULT").format(column=sql.Identifier(column)) for column in archive_only]
+    cur = await conn.execute(sql.SQL("""
+        WITH moved AS (
+            DELETE FROM {table} WHERE {key} = ANY(%s) RETURNING {columns}
+        )
+        INSERT INTO {archive} ({columns})
+        SELECT {columns} FROM moved
+        ON CONFLICT ({key}) DO UPDATE SET {assignments}
+    """).format(table=sql.Identifier(table), archive=sql.Identifier(archive), key=sql.Identifier(key),
+                columns=sql.SQL(", ").join(map(sql.Identifier, columns)),
+                assignments=sql.SQL(", ").join(assignments)), (ids,))
+    return cur.rowcount
+
+
+def compress_description(text):
+    return zlib.compress(text.encode("utf-8"), 9)
+
+
+def decompress_description(description, compressed):
+    if compressed is None:
+        return description
+    return zlib.decompress(compressed).decode("utf-8")
+
+
+async def _compress_descriptions(conn, ids):
+    cur = await conn.execute("""
+        SELECT tender_id, description
+        FROM tender_details_archive
+        WHERE tender_id = ANY(%s) AND description IS NOT NULL
+    """, (ids,))
+    rows = await cur.fetchall()
+    if not rows:
+        return
+    await conn.execute("""
+        UPDATE tender_details_archive AS a SET
+            description_compressed = rows.compressed,
+            description = NULL
+        FROM unnest(%s::text[], %s::bytea[]) AS rows (tender_id, compressed)
+        WHERE a.tender_id = rows.tender_id
+    """, ([row[0] for row in rows], [compress_description(row[1]) for row in rows]))
+
+
+async def archive_closed_tenders(archive_after_days, compress=False, batch_size=DEFAULT_ARCHIVE_BATCH_SIZE):
+    # Returns (tenders_moved, details_moved). Each batch moves in its own
+    # transaction, so an interrupted run leaves every tender in exactly one
+    # place and the next run picks up the rest.
+    cutoff = datetime.utcnow().date() - timedelta(days=archive_after_days)
+    tenders_moved = details_moved = 0
+    async with connection() as conn:
+        tender_columns = await _shared_columns(conn, "tenders1", "tenders_archive")
+        detail_columns = await _shared_columns(conn, "tender_details", "tender_details_archive")
+        tender_archive_only = await _archive_only_columns(conn, "tenders_archive")
+        detail_archive_only = await _archive_only_columns(conn, "tender_details_archive")
+    while True:
+        async with connection() as conn:
+            cur = await conn.execute("""
+                SELECT id FROM tenders1
+                WHERE closing_date < %s
+                ORDER BY closing_date, id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            """, (cutoff, batch_size))
+            ids = [row[0] for row in await cur.fetchall()]
+            if not ids:
+                break
+            details_moved += await _move_rows(
+                conn, "tender_details", "tender_details_archive", "tender_id", detail_columns, detail_archive_only, ids
+            )
+            if compress:
+                await _compress_descriptions(conn, ids)
+            tenders_moved += await _move_rows(
+                conn, "tenders1", "tenders_archive", "id", tender_columns, tender_archive_only, ids
+            )
+        if len(ids) < batch_size:
+            break
+    if tenders_moved:
+        logging.info(
+            "Archived %s tenders and %s detail rows closed before %s", tenders_moved, details_moved, cutoff
+        )
+    return tenders_moved, details_moved
@@ -1,25 +1,126 @@
 import argparse
 import asyncio
 import logging
-from datetime import timedelta
-
-from scraper_lib import scrape_pages
+from db import pool_scope
+from fetchers import DEFAULT_MAX_BROWSER_AGE, DEFAULT_MAX_PAGES_PER_BROWSER, PlaywrightFetcher
+from metrics import start_metrics_server
+from scheduler import AdaptiveScheduler
+from scraper_lib import (
+    DEFAULT_DETAIL_CONCURRENCY,
+    DEFAULT_KNOWN_PAGE_LIMIT,
+    DEFAULT_MAX_PER_HOST,
+    DEFAULT_POLITENESS_DELAY,
+    FETCH_MODES,
+    scrape_pages
+)
 
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Run scheduled tender scraping.")
-    parser.add_argument("--pages", type=int, default=5, help="Number of pages to scrape each run.")
+    parser.add_argument("--pages", type=int, default=5, help="Maximum number of pages to scrape each run.")
     parser.add_argument(
         "--interval-hours",
-        type=int,
+        type=float,
         default=24,
-        help="Hours between scraping runs."
+        help="Hours between full crawls of --pages. Probes in between stop at already-known tenders."
+    )
+    parser.add_argument(
+        "--min-interval-minutes",
+        type=float,
+        default=5,
+        help="Shortest gap between probes, used in the busiest hours."
+    )
+    parser.add_argument(
+        "--max-interval-minutes",
+        type=float,
+        default=120,
+        help="Longest gap between probes, used when nothing is being posted."
     )
     parser.add_argument(
         "--no-details",
         action="store_true",
         help="Skip detail-page scraping."
     )
+    parser.add_argument(
+        "--detail-concurrency",
+        type=int,
+        default=DEFAULT_DETAIL_CONCURRENCY,
+        help="Number of detail pages to fetch concurrently."
+    )
+    parser.add_argument(
+        "--max-per-host",
+        type=int,
+        default=DEFAULT_MAX_PER_HOST,
+        help="Most requests in flight to one host at a time, listing and detail pages together."
+    )
+    parser.add_argument(
+        "--politeness-delay",
+        type=float,
+        default=DEFAULT_POLITENESS_DELAY,
+        help=(
+            "Seconds between the starts of two requests to the same host. Each host then sees at most "
+            "1/delay requests per second (2/s at the default 0.5) with up to --max-per-host in flight; "
+            "0 leaves only the --max-per-host cap."
+        )
+    )
+    parser.add_argument(
+        "--fetch-mode",
+        choices=FETCH_MODES,
+        default="auto",
+        help="auto: plain HTTP with headless-browser fallback; http: never launch a browser; browser: always use it."
+    )
+    parser.add_argument(
+        "--browser-max-pages",
+        type=int,
+        default=DEFAULT_MAX_PAGES_PER_BROWSER,
+        help="Relaunch the long-lived Chromium after this many page loads (0: never)."
+    )
+    parser.add_argument(
+        "--browser-max-age-hours",
+        type=float,
+        default=DEFAULT_MAX_BROWSER_AGE / 3600,
+        help="Relaunch the long-lived Chromium after this many hours (0: never)."
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="With --once, walk every page up to --pages instead of stopping at already-known tenders."
+    )
+    parser.add_argument(
+        "--stop-after-known-pages",
+        type=int,
+        default=DEFAULT_KNOWN_PAGE_LIMIT,
+        help="Consecutive pages without new tenders before an incremental run stops."
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Also rewrite known tenders whose listing changed and re-fetch their detail pages when changed or due."
+    )
+    parser.add_argument(
+        "--archive-after-days",
+        type=int,
+        help=(
+            "After each run, move tenders closed more than this many days ago to the archive tables. "
+            "Off unless given, since archived tenders leave the date digests and /filter and the right "
+            "window depends on the deployment."
+        )
+    )
+    parser.add_argument(
+        "--compress-archive",
+        action="store_true",
+        help="Store archived descriptions zlib-compressed (with --archive-after-days)."
+    )
+    parser.add_argument(
+        "--no-notify",
+        action="store_true",
+        help="Don't queue subscription notifications for new tenders."
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve the last run's metrics in Prometheus text format on this port."
+    )
     parser.add_argument(
         "--once",
         action="store_true",
@@ -28,19 +129,53 @@ def parse_args():
     return parser.parse_args()
 
 
-async def run_loop(pages, interval_hours, scrape_details):
-    while True:
-        await scrape_pages(pages, scrape_details=scrape_details)
-        await asyncio.sleep(timedelta(hours=interval_hours).total_seconds())
-
-
 async def main():
     args = parse_args()
     logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
-    if args.once:
-        await scrape_pages(args.pages, scrape_details=not args.no_details)
-    else:
-        await run_loop(args.pages, args.interval_hours, scrape_details=not args.no_details)
+    scrape_options = {
+        "scrape_details": not args.no_details,
+        "detail_concurrency": args.detail_concurrency,
+        "max_per_host": args.max_per_host,
+        "politeness_delay": args.politeness_delay,
+        "known_page_limit": args.stop_after_known_pages,
+        "fetch_mode": args.fetch_mode,
+        "notify": not args.no_notify,
+        "refresh": args.refresh,
+        "archive_after_days": args.archive_after_days,
+        "compress_archive": args.compress_archive
+    }
+    browser = None
+    if args.fetch_mode != "http" and not args.once:
+        # One Chromium for the whole process, launched on first use and
+        # recycled by page count and age.
+        browser = PlaywrightFetcher(
+            page_pool_size=args.detail_concurrency + 1,
+            max_pages_per_browser=args.browser_max_pages,
+            max_browser_age=args.browser_max_age_hours * 3600
+        )
+        scrape_options["browser"] = browser
+    metrics_server = None
+    if args.metrics_port:
+        metrics_server = await start_metrics_server(args.metrics_port)
+    try:
+        # One pool for the whole process instead of one per run.
+        async with pool_scope(max_size=max(args.detail_concurrency + 1, 2)):
+            if args.once:
+                await scrape_pages(args.pages, incremental=not args.full, **scrape_options)
+            else:
+                scheduler = AdaptiveScheduler(
+                    args.pages,
+                    scrape_options,
+                    min_interval=args.min_interval_minutes * 60,
+                    max_interval=args.max_interval_minutes * 60,
+                    deep_interval=args.interval_hours * 3600
+                )
+                await scheduler.run()
+    finally:
+        if browser is not None:
+            await browser.close()
+        if metrics_server is not None:
+            await metrics_server.cleanup()
 
 
 if __name__ == "__main__":
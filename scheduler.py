@@ -0,0 +1,165 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from datetime import datetime
+
+from db import connection
+from metrics import get_last_run
+from scraper_lib import init_db, scrape_pages
+
+STATE_NAME = "scheduled_scraper"
+# Smoothing factor for the per-hour posting rate (new tenders per hour).
+RATE_SMOOTHING = 0.3
+# Assumed rate until an hour of the day has been observed at least once.
+DEFAULT_RATE_PER_HOUR = 1.0
+# Probe when about this many new tenders are expected to be waiting.
+TARGET_NEW_PER_PROBE = 1.0
+# Gaps longer than this (downtime, long backoff) don't teach the rate anything.
+MAX_LEARNING_GAP_SECONDS = 6 * 3600
+INTERVAL_JITTER = 0.1
+BACKOFF_BASE_SECONDS = 60.0
+
+
+async def load_scheduler_state(name):
+    async with connection() as conn:
+        cur = await conn.execute("SELECT state_json FROM scheduler_state WHERE name = %s;", (name,))
+        row = await cur.fetchone()
+    if not row:
+        return {}
+    try:
+        return json.loads(row[0])
+    except json.JSONDecodeError:
+        return {}
+
+
+async def save_scheduler_state(name, state):
+    async with connection() as conn:
+        await conn.execute("""
+            INSERT INTO scheduler_state (name, state_json, updated_at)
+            VALUES (%s, %s, now() AT TIME ZONE 'utc')
+            ON CONFLICT (name) DO UPDATE SET
+                state_json = EXCLUDED.state_json,
+                updated_at = EXCLUDED.updated_at
+        """, (name, json.dumps(state)))
+
+
+def _hour(timestamp):
+    return datetime.utcfromtimestamp(timestamp).hour
+
+
+class AdaptiveScheduler:
+    # Replaces the fixed sleep between full crawls. Most runs are cheap probes:
+    # an incremental scrape that stops after page 1 unless it holds new IDs,
+    # and only then walks deeper. Probes are spaced by the posting rate
+    # learned for each hour of the day (UTC), so quiet hours cost few page
+    # loads. A full crawl still runs every deep_interval seconds. Failed runs
+    # back off exponentially with jitter. The state lives in scheduler_state,
+    # so a restart resumes the schedule instead of crawling straight away.
+    def __init__(self, pages, scrape_options, min_interval, max_interval, deep_interval, name=STATE_NAME):
+        self.pages = pages
+        self.scrape_options = scrape_options
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.deep_interval = deep_interval
+        self.name = name
+        self.state = {}
+
+    async def load(self):
+        await init_db()
+        self.state = {
+            "hourly_rate": [None] * 24,
+            "last_probe_at": None,
+            "last_deep_at": None,
+            "next_run_at": None,
+            "failures": 0,
+            **await load_scheduler_state(self.name)
+        }
+
+    def expected_rate(self, timestamp):
+        # Looks one hour ahead too, so probing speeds up before a busy hour.
+        rates = self.state["hourly_rate"]
+        known = [rate for rate in rates if rate is not None]
+        fallback = sum(known) / len(known) if known else DEFAULT_RATE_PER_HOUR
+        hour = _hour(timestamp)
+        return max(
+            rates[hour] if rates[hour] is not None else fallback,
+            rates[(hour + 1) % 24] if rates[(hour + 1) % 24] is not None else fallback
+        )
+
+    def learn(self, probed_at, new_tenders):
+        last_probe_at = self.state["last_probe_at"]
+        self.state["last_probe_at"] = probed_at
+        if last_probe_at is None:
+            return
+        elapsed = probed_at - last_probe_at
+        if not 0 < elapsed <= MAX_LEARNING_GAP_SECONDS:
+            return
+        observed = new_tenders * 3600 / elapsed
+        hour = _hour(last_probe_at + elapsed / 2)
+        previous = self.state["hourly_rate"][hour]
+        self.state["hourly_rate"][hour] = observed if previous is None else (
+            RATE_SMOOTHING * observed + (1 - RATE_SMOOTHING) * previous
+        )
+
+    def next_interval(self, now):
+        rate = self.expected_rate(now)
+        seconds = TARGET_NEW_PER_PROBE * 3600 / rate if rate > 0 else self.max_interval
+        seconds = min(self.max_interval, max(self.min_interval, seconds))
+        seconds *= random.uniform(1 - INTERVAL_JITTER, 1 + INTERVAL_JITTER)
+        last_deep_at = self.state["last_deep_at"]
+        if last_deep_at is not None:
+            seconds = min(seconds, max(0.0, last_deep_at + self.deep_interval - now))
+        return seconds
+
+    def backoff_interval(self):
+        cap = min(self.max_interval, BACKOFF_BASE_SECONDS * 2 ** (self.state["failures"] - 1))
+        return random.uniform(cap / 2, cap)
+
+    def deep_due(self, now):
+        last_deep_at = self.state["last_deep_at"]
+        return last_deep_at is None or now - last_deep_at >= self.deep_interval
+
+    async def run_once(self):
+        started = time.time()
+        deep = self.deep_due(started)
+        try:
+            tenders_saved = await scrape_pages(self.pages, incremental=not deep, **self.scrape_options)
+            counters = (get_last_run() or {}).get("counters", {})
+            succeeded = counters.get("pages_scraped", 0) > 0
+        except Exception as exc:
+            logging.warning("Scrape run failed: %s", exc)
+            tenders_saved, succeeded = 0, False
+
+        now = time.time()
+        if succeeded:
+            self.state["failures"] = 0
+            self.learn(started, tenders_saved)
+            if deep:
+                self.state["last_deep_at"] = started
+            delay = self.next_interval(now)
+        else:
+            self.state["failures"] += 1
+            delay = self.backoff_interval()
+            logging.warning("Run %s failed in a row; backing off %.0fs", self.state["failures"], delay)
+        self.state["next_run_at"] = now + delay
+        logging.info(
+            "%s run saved %s tenders; expecting %.2f new/hour, next run in %.0fs",
+            "Deep" if deep else "Probe", tenders_saved, self.expected_rate(now), delay
+        )
+        try:
+            await save_scheduler_state(self.name, self.state)
+        except Exception as exc:
+            logging.warning("Could not persist scheduler state: %s", exc)
+
+    async def run(self):
+        await self.load()
+        while True:
+            next_run_at = self.state["next_run_at"]
+            if next_run_at is not None:
+                delay = next_run_at - time.time()
+                if delay > 0:
+                    logging.info("Next scrape in %.0fs", delay)
+                    await asyncio.sleep(delay)
+            await self.run_once()
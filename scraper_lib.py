@@ -1,297 +1,1250 @@
 import asyncio
+import hashlib
 import json
 import logging
-from datetime import datetime
-
-import psycopg
-from bs4 import BeautifulSoup
-from playwright.async_api import async_playwright
-
-from config_loader import get_required_config
-
-BASE_URL = "https://tender.2merkato.com/tenders/free?page={}"
-
-DETAIL_FIELDS = {
-    "bid closing date": "bid_closing_date",
-    "bid opening date": "bid_opening_date",
-    "published on": "published_on",
-    "posted": "posted",
-    "bid document price": "bid_document_price",
-    "bid bond": "bid_bond",
-    "region": "region",
-    "bidding": "bidding_type"
-}
-
-
-def _get_db_url():
-    config = get_required_config(["DB_URL"])
-    return config["DB_URL"]
-
-
-def init_db():
-    conn = psycopg.connect(_get_db_url(), sslmode="require")
-    cur = conn.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS tenders1 (
-            id TEXT PRIMARY KEY,
-            title TEXT,
-            url TEXT,
-            bid_closing_date TEXT,
-            bid_opening_date TEXT,
-            published_on TEXT
-        )
-    """)
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS tender_details (
-            tender_id TEXT PRIMARY KEY,
-            title TEXT,
-            description TEXT,
-            filed_under TEXT,
-            company TEXT,
-            metadata_json TEXT,
-            extra_fields_json TEXT
-        )
-    """)
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS scrape_status (
-            id SERIAL PRIMARY KEY,
-            run_at TIMESTAMP NOT NULL,
-            pages_scraped INTEGER NOT NULL,
-            tenders_saved INTEGER NOT NULL
-        )
-    """)
-    conn.commit()
-    cur.close()
-    conn.close()
-
-
-def load_existing_ids():
-    conn = psycopg.connect(_get_db_url(), sslmode="require")
-    cur = conn.cursor()
-    cur.execute("SELECT id FROM tenders1;")
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+from psycopg import sql
+
+from config_loader import get_optional_config
+from date_utils import parse_date
+from db import SEARCH_CONFIG, connection, pool_scope
+from extractors import (
+    DETAIL_READY_SELECTOR,
+    LISTING_SELECTOR,
+    extract_next_data,
+    parse_detail_html,
+    parse_detail_next_data,
+    parse_listing_html,
+    parse_listing_next_data
+)
+from fetchers import FetchError, HttpFetcher, PlaywrightFetcher
+from formatting import RENDERER_VERSION, render_tender_details, render_tender_summary
+from metrics import ScrapeMetrics, set_last_run
+from retention import archive_closed_tenders
+from subscriptions import queue_notifications
+
+BASE_URL = get_optional_config("SCRAPER_BASE_URL", "https://tender.2merkato.com/tenders/free?page={}")
+SITE_ROOT = "{0.scheme}://{0.netloc}".format(urlsplit(BASE_URL))
+FETCH_MODES = ("auto", "http", "browser")
+
+DEFAULT_DETAIL_CONCURRENCY = 4
+DEFAULT_MAX_PER_HOST = 4
+DEFAULT_POLITENESS_DELAY = 0.5
+DEFAULT_KNOWN_PAGE_LIMIT = 1
+DEFAULT_DETAIL_BATCH_SIZE = 25
+
+LISTING_HASH_FIELDS = ("title", "url", "bid_closing_date", "bid_opening_date", "published_on")
+DETAIL_HASH_FIELDS = ("title", "description", "filed_under", "company", "metadata", "extra_fields")
+# (days until closing, revisit interval): a refresh run re-fetches a tender's
+# detail page more often as its closing date approaches. Closed tenders are
+# only revisited when their listing row changes.
+REVISIT_SCHEDULE = (
+    (2, timedelta(hours=6)),
+    (7, timedelta(days=1)),
+    (30, timedelta(days=3))
+)
+DEFAULT_REVISIT_INTERVAL = timedelta(days=7)
+
+
+async def init_db():
+    async with connection() as conn:
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS tenders1 (
+                id TEXT PRIMARY KEY,
+                title TEXT,
+                url TEXT,
+                bid_closing_date TEXT,
+                bid_opening_date TEXT,
+                published_on TEXT
+            )
+        """)
+        await conn.execute("""
+            ALTER TABLE tenders1
+                ADD COLUMN IF NOT EXISTS published_date DATE,
+                ADD COLUMN IF NOT EXISTS closing_date DATE,
+                ADD COLUMN IF NOT EXISTS opening_date DATE,
+                ADD COLUMN IF NOT EXISTS summary_html TEXT,
+                ADD COLUMN IF NOT EXISTS renderer_version INTEGER,
+                ADD COLUMN IF NOT EXISTS search_vector TSVECTOR,
+                ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+                ADD COLUMN IF NOT EXISTS listing_hash TEXT,
+                ADD COLUMN IF NOT EXISTS detail_checked_at TIMESTAMP,
+                ADD COLUMN IF NOT EXISTS detail_due_at TIMESTAMP
+        """)
+        await conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_tenders1_updated_at
+            ON tenders1 (updated_at, id)
+        """)
+        await conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_tenders1_published_date
+            ON tenders1 (published_date DESC, id)
+        """)
+        await conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_tenders1_search_vector
+            ON tenders1 USING GIN (search_vector)
+        """)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS tender_details (
+                tender_id TEXT PRIMARY KEY,
+                title TEXT,
+                description TEXT,
+                filed_under TEXT,
+                company TEXT,
+                metadata_json JSONB,
+                extra_fields_json JSONB
+            )
+        """)
+        await _convert_json_columns(conn, "tender_details")
+        await conn.execute("""
+            ALTER TABLE tender_details
+                ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+                ADD COLUMN IF NOT EXISTS message_html TEXT,
+                ADD COLUMN IF NOT EXISTS renderer_version INTEGER,
+                ADD COLUMN IF NOT EXISTS content_hash TEXT
+        """)
+        await conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_tender_details_updated_at
+            ON tender_details (updated_at)
+        """)
+        await conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_tender_details_metadata
+            ON tender_details USING GIN (metadata_json jsonb_path_ops)
+        """)
+        await conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_tenders1_closing_date
+            ON tenders1 (closing_date, id)
+        """)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS categories (
+                id SERIAL PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE
+            )
+        """)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS tender_categories (
+                tender_id TEXT NOT NULL,
+                category_id INTEGER NOT NULL REFERENCES categories (id),
+                PRIMARY KEY (tender_id, category_id)
+            )
+        """)
+        await conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_tender_categories_category
+            ON tender_categories (category_id, tender_id)
+        """)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS tender_details_history (
+                id BIGSERIAL PRIMARY KEY,
+                tender_id TEXT NOT NULL,
+                content_hash TEXT,
+                title TEXT,
+                description TEXT,
+                filed_under TEXT,
+                company TEXT,
+                metadata_json JSONB,
+                extra_fields_json JSONB,
+                replaced_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc')
+            )
+        """)
+        await _convert_json_columns(conn, "tender_details_history")
+        await conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_tender_details_history_tender
+            ON tender_details_history (tender_id, replaced_at)
+        """)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS subscriptions (
+                id SERIAL PRIMARY KEY,
+                chat_id BIGINT NOT NULL,
+                kind TEXT NOT NULL,
+                value TEXT NOT NULL,
+                normalized TEXT NOT NULL,
+                created_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+                UNIQUE (chat_id, kind, normalized)
+            )
+        """)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS notifications (
+                chat_id BIGINT NOT NULL,
+                tender_id TEXT NOT NULL,
+                matched TEXT,
+                created_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+                claimed_at TIMESTAMP,
+                sent_at TIMESTAMP,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (chat_id, tender_id)
+            )
+        """)
+        await conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_notifications_pending
+            ON notifications (created_at) WHERE sent_at IS NULL
+        """)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS scrape_status (
+                id SERIAL PRIMARY KEY,
+                run_at TIMESTAMP NOT NULL,
+                pages_scraped INTEGER NOT NULL,
+                tenders_saved INTEGER NOT NULL
+            )
+        """)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS scheduler_state (
+                name TEXT PRIMARY KEY,
+                state_json TEXT NOT NULL,
+                updated_at TIMESTAMP NOT NULL
+            )
+        """)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS scrape_metrics (
+                scrape_status_id INTEGER PRIMARY KEY REFERENCES scrape_status (id) ON DELETE CASCADE,
+                wall_seconds DOUBLE PRECISION NOT NULL,
+                metrics_json TEXT NOT NULL
+            )
+        """)
+        # Closed tenders moved out by retention.archive_closed_tenders. LIKE
+        # copies the columns and indexes (including the search vector's GIN
+        # index) of the live tables as they are now.
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS tenders_archive
+            (LIKE tenders1 INCLUDING DEFAULTS INCLUDING INDEXES)
+        """)
+        await conn.execute("""
+            ALTER TABLE tenders_archive
+                ADD COLUMN IF NOT EXISTS archived_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc')
+        """)
+        await conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_tenders_archive_archived_at
+            ON tenders_archive (archived_at, id)
+        """)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS tender_details_archive
+            (LIKE tender_details INCLUDING DEFAULTS INCLUDING INDEXES)
+        """)
+        await conn.execute("""
+            ALTER TABLE tender_details_archive
+                ADD COLUMN IF NOT EXISTS description_compressed BYTEA,
+                ADD COLUMN IF NOT EXISTS archived_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc')
+        """)
+
+
+async def _convert_json_columns(conn, table):
+    # metadata_json and extra_fields_json were TEXT before the structured
+    # filters; JSONB lets Postgres index and query them.
+    cur = await conn.execute("""
+        SELECT column_name
+        FROM information_schema.columns
+        WHERE table_schema = current_schema()
+          AND table_name = %s
+          AND column_name IN ('metadata_json', 'extra_fields_json')
+          AND data_type = 'text'
+    """, (table,))
+    for (column,) in await cur.fetchall():
+        logging.info("Converting %s.%s to JSONB", table, column)
+        await conn.execute(sql.SQL("""
+            ALTER TABLE {table}
+            ALTER COLUMN {column} TYPE JSONB USING COALESCE(NULLIF({column}, ''), '{{}}')::jsonb
+        """).format(table=sql.Identifier(table), column=sql.Identifier(column)))
+
+
+async def find_existing_ids(tender_ids):
+    # Archived tenders count as known, so a closed tender still listed on the
+    # site isn't inserted (and notified) again.
+    if not tender_ids:
+        return set()
+    async with connection() as conn:
+        cur = await conn.execute("""
+            SELECT id FROM tenders1 WHERE id = ANY(%s)
+            UNION ALL
+            SELECT id FROM tenders_archive WHERE id = ANY(%s);
+        """, (list(tender_ids), list(tender_ids)))
+        rows = await cur.fetchall()
     return set(row[0] for row in rows)
 
 
-def insert_tender(tender):
-    conn = psycopg.connect(_get_db_url(), sslmode="require")
-    cur = conn.cursor()
-    cur.execute("""
-        INSERT INTO tenders1 (id, title, url, bid_closing_date, bid_opening_date, published_on)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        ON CONFLICT (id) DO NOTHING
-    """, (
-        tender["id"],
-        tender["title"],
-        tender["url"],
-        tender.get("bid_closing_date"),
-        tender.get("bid_opening_date"),
-        tender.get("published_on")
-    ))
-    inserted = cur.rowcount
-    conn.commit()
-    cur.close()
-    conn.close()
-    return inserted
-
-
-def upsert_tender_details(tender_id, details):
-    conn = psycopg.connect(_get_db_url(), sslmode="require")
-    cur = conn.cursor()
-    cur.execute("""
-        INSERT INTO tender_details (
-            tender_id,
-            title,
-            description,
-            filed_under,
-            company,
-            metadata_json,
-            extra_fields_json
-        )
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
-        ON CONFLICT (tender_id) DO UPDATE SET
-            title = EXCLUDED.title,
-            description = EXCLUDED.description,
-            filed_under = EXCLUDED.filed_under,
-            company = EXCLUDED.company,
-            metadata_json = EXCLUDED.metadata_json,
-            extra_fields_json = EXCLUDED.extra_fields_json
-    """, (
-        tender_id,
-        details.get("title"),
-        details.get("description"),
-        details.get("filed_under"),
-        details.get("company"),
-        json.dumps(details.get("metadata") or {}),
-        json.dumps(details.get("extra_fields") or {})
-    ))
-    conn.commit()
-    cur.close()
-    conn.close()
-
-
-def record_scrape_status(pages_scraped, tenders_saved):
-    conn = psycopg.connect(_get_db_url(), sslmode="require")
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO scrape_status (run_at, pages_scraped, tenders_saved) VALUES (%s, %s, %s);",
-        (datetime.utcnow(), pages_scraped, tenders_saved)
+async def find_known_listings(tender_ids):
+    # Stored listing hash per known tender, and whether its detail page is due
+    # for a revisit.
+    if not tender_ids:
+        return {}
+    async with connection() as conn:
+        cur = await conn.execute("""
+            SELECT id, listing_hash,
+                   detail_checked_at IS NULL OR detail_due_at <= now() AT TIME ZONE 'utc'
+            FROM tenders1
+            WHERE id = ANY(%s)
+            UNION ALL
+            SELECT id, listing_hash, FALSE
+            FROM tenders_archive
+            WHERE id = ANY(%s);
+        """, (list(tender_ids), list(tender_ids)))
+        rows = await cur.fetchall()
+    return {row[0]: (row[1], row[2]) for row in rows}
+
+
+def content_hash(fields):
+    payload = json.dumps(fields, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def listing_hash(tender):
+    return content_hash({key: tender.get(key) for key in LISTING_HASH_FIELDS})
+
+
+def detail_hash(details):
+    fields = {key: details.get(key) for key in DETAIL_HASH_FIELDS}
+    fields["metadata"] = fields["metadata"] or {}
+    fields["extra_fields"] = fields["extra_fields"] or {}
+    return content_hash(fields)
+
+
+def next_detail_check(closing_date, now):
+    if closing_date is None:
+        return now + DEFAULT_REVISIT_INTERVAL
+    days_left = (closing_date - now.date()).days
+    if days_left < 0:
+        return None
+    for max_days, interval in REVISIT_SCHEDULE:
+        if days_left <= max_days:
+            return now + interval
+    return now + DEFAULT_REVISIT_INTERVAL
+
+
+def changed_listings(listed, known):
+    # Known tenders whose listing row no longer matches the stored hash.
+    return [
+        tender for tender in listed
+        if tender["id"] in known and known[tender["id"]][0] != listing_hash(tender)
+    ]
+
+
+def select_revisits(listed, known, changed):
+    # Detail pages to re-fetch: the rewritten listings, then the known
+    # tenders whose revisit is due.
+    changed_ids = {tender["id"] for tender in changed}
+    return changed + [
+        tender for tender in listed
+        if tender["id"] in known and known[tender["id"]][1] and tender["id"] not in changed_ids
+    ]
+
+
+def parse_tender_dates(tender):
+    return (
+        parse_date(tender.get("published_on")),
+        parse_date(tender.get("bid_closing_date")),
+        parse_date(tender.get("bid_opening_date"))
     )
-    conn.commit()
-    cur.close()
-    conn.close()
 
 
-async def scrape_detail_page(browser, url):
-    page = await browser.new_page()
+async def backfill_parsed_dates(batch_size=500):
+    updated = 0
+    last_id = ""
+    while True:
+        async with connection() as conn:
+            cur = await conn.execute("""
+                SELECT id, published_on, bid_closing_date, bid_opening_date
+                FROM tenders1
+                WHERE id > %s
+                  AND (published_date IS NULL OR closing_date IS NULL OR opening_date IS NULL)
+                ORDER BY id
+                LIMIT %s
+            """, (last_id, batch_size))
+            rows = await cur.fetchall()
+            if not rows:
+                break
+            params = []
+            for tender_id, published_on, closing, opening in rows:
+                dates = parse_tender_dates({
+                    "published_on": published_on,
+                    "bid_closing_date": closing,
+                    "bid_opening_date": opening
+                })
+                if any(dates):
+                    params.append((*dates, tender_id))
+            async with conn.cursor() as update_cur:
+                await update_cur.executemany("""
+                    UPDATE tenders1
+                    SET published_date = COALESCE(published_date, %s),
+                        closing_date = COALESCE(closing_date, %s),
+                        opening_date = COALESCE(opening_date, %s),
+                        updated_at = now() AT TIME ZONE 'utc'
+                    WHERE id = %s
+                """, params)
+        updated += len(params)
+        last_id = rows[-1][0]
+    logging.info("Backfilled parsed dates for %s tenders", updated)
+    return updated
+
+
+def _listing_rows(tenders):
+    rows = []
+    for tender in tenders:
+        published_date, closing_date, opening_date = parse_tender_dates(tender)
+        rows.append((
+            tender["id"],
+            tender["title"],
+            tender["url"],
+            tender.get("bid_closing_date"),
+            tender.get("bid_opening_date"),
+            tender.get("published_on"),
+            published_date,
+            closing_date,
+            opening_date,
+            render_tender_summary(tender),
+            listing_hash(tender)
+        ))
+    return [list(column) for column in zip(*rows)]
+
+
+async def insert_tenders(tenders):
+    if not tenders:
+        return []
+    async with connection() as conn:
+        cur = await conn.execute("""
+            INSERT INTO tenders1 (
+                id,
+                title,
+                url,
+                bid_closing_date,
+                bid_opening_date,
+                published_on,
+                published_date,
+                closing_date,
+                opening_date,
+                summary_html,
+                listing_hash,
+                renderer_version
+            )
+            SELECT rows.*, %s::integer FROM unnest(
+                %s::text[], %s::text[], %s::text[], %s::text[], %s::text[], %s::text[],
+                %s::date[], %s::date[], %s::date[], %s::text[], %s::text[]
+            ) AS rows
+            ON CONFLICT (id) DO NOTHING
+            RETURNING id
+        """, [RENDERER_VERSION, *_listing_rows(tenders)])
+        inserted_ids = [row[0] for row in await cur.fetchall()]
+        await refresh_search_vectors(conn, inserted_ids)
+    return inserted_ids
+
+
+async def update_tenders(tenders):
+    # Rewrites known listing rows whose content hash changed.
+    if not tenders:
+        return []
+    async with connection() as conn:
+        cur = await conn.execute("""
+            UPDATE tenders1 AS t
+            SET title = rows.title,
+                url = rows.url,
+                bid_closing_date = rows.bid_closing_date,
+                bid_opening_date = rows.bid_opening_date,
+                published_on = rows.published_on,
+                published_date = rows.published_date,
+                closing_date = rows.closing_date,
+                opening_date = rows.opening_date,
+                summary_html = rows.summary_html,
+                listing_hash = rows.listing_hash,
+                renderer_version = %s,
+                updated_at = now() AT TIME ZONE 'utc'
+            FROM unnest(
+                %s::text[], %s::text[], %s::text[], %s::text[], %s::text[], %s::text[],
+                %s::date[], %s::date[], %s::date[], %s::text[], %s::text[]
+            ) AS rows (
+                id, title, url, bid_closing_date, bid_opening_date, published_on,
+                published_date, closing_date, opening_date, summary_html, listing_hash
+            )
+            WHERE t.id = rows.id AND t.listing_hash IS DISTINCT FROM rows.listing_hash
+            RETURNING t.id
+        """, [RENDERER_VERSION, *_listing_rows(tenders)])
+        updated_ids = [row[0] for row in await cur.fetchall()]
+        await refresh_search_vectors(conn, updated_ids)
+    return updated_ids
+
+
+async def refresh_search_vectors(conn, tender_ids):
+    # Rebuilds the full-text vector of just these tenders from the listing
+    # title and whatever details are stored; the GIN index updates in place.
+    if not tender_ids:
+        return
+    await conn.execute("""
+        UPDATE tenders1 AS t
+        SET search_vector =
+            setweight(to_tsvector(%(config)s, coalesce(src.title, '')), 'A')
+            || setweight(to_tsvector(%(config)s, coalesce(d.title, '') || ' ' || coalesce(d.company, '')), 'B')
+            || setweight(to_tsvector(%(config)s, coalesce(d.filed_under, '')), 'C')
+            || setweight(to_tsvector(%(config)s, coalesce(d.description, '')), 'D')
+        FROM tenders1 AS src
+        LEFT JOIN tender_details AS d ON d.tender_id = src.id
+        WHERE t.id = src.id AND src.id = ANY(%(ids)s)
+    """, {"config": SEARCH_CONFIG, "ids": list(tender_ids)})
+
+
+async def backfill_search_vectors(batch_size=500):
+    updated = 0
+    last_id = ""
+    while True:
+        async with connection() as conn:
+            cur = await conn.execute("""
+                SELECT id FROM tenders1
+                WHERE id > %s AND search_vector IS NULL
+                ORDER BY id
+                LIMIT %s
+            """, (last_id, batch_size))
+            tender_ids = [row[0] for row in await cur.fetchall()]
+            if not tender_ids:
+                break
+            await refresh_search_vectors(conn, tender_ids)
+        updated += len(tender_ids)
+        last_id = tender_ids[-1]
+    logging.info("Built search vectors for %s tenders", updated)
+    return updated
+
+
+async def _fetch_tender_rows(conn, tender_ids):
+    cur = await conn.execute("""
+        SELECT id, title, bid_closing_date, bid_opening_date, published_on, closing_date
+        FROM tenders1
+        WHERE id = ANY(%s)
+    """, (list(tender_ids),))
+    return {
+        row[0]: {
+            "id": row[0],
+            "title": row[1],
+            "bid_closing_date": row[2],
+            "bid_opening_date": row[3],
+            "published_on": row[4],
+            "closing_date": row[5]
+        }
+        for row in await cur.fetchall()
+    }
+
+
+async def upsert_tender_details_many(details_by_id):
+    # Only rows whose content hash (or rendered message) differs are written;
+    # the version being replaced is kept in tender_details_history. Every
+    # fetched tender gets its next revisit scheduled. Returns the number of
+    # rows written and how many of those replaced different content.
+    if not details_by_id:
+        return 0, 0
+    now = datetime.utcnow()
+    async with connection() as conn:
+        # The stored message also shows the listing's closing/opening dates.
+        tenders = await _fetch_tender_rows(conn, details_by_id)
+        rows = [
+            (
+                tender_id,
+                details.get("title"),
+                details.get("description"),
+                details.get("filed_under"),
+                details.get("company"),
+                json.dumps(details.get("metadata") or {}),
+                json.dumps(details.get("extra_fields") or {}),
+                render_tender_details(tenders.get(tender_id, {}), details),
+                detail_hash(details)
+            )
+            for tender_id, details in details_by_id.items()
+        ]
+        columns = [list(column) for column in zip(*rows)]
+        cur = await conn.execute("""
+            INSERT INTO tender_details_history (
+                tender_id,
+                content_hash,
+                title,
+                description,
+                filed_under,
+                company,
+                metadata_json,
+                extra_fields_json
+            )
+            SELECT d.tender_id, d.content_hash, d.title, d.description, d.filed_under, d.company,
+                   d.metadata_json, d.extra_fields_json
+            FROM tender_details d
+            JOIN unnest(%s::text[], %s::text[]) AS fetched (tender_id, content_hash)
+              ON fetched.tender_id = d.tender_id
+            WHERE d.content_hash IS DISTINCT FROM fetched.content_hash
+        """, (columns[0], columns[8]))
+        changed = cur.rowcount
+        cur = await conn.execute("""
+            INSERT INTO tender_details (
+                tender_id,
+                title,
+                description,
+                filed_under,
+                company,
+                metadata_json,
+                extra_fields_json,
+                message_html,
+                content_hash,
+                renderer_version
+            )
+            SELECT rows.*, %s::integer FROM unnest(
+                %s::text[], %s::text[], %s::text[], %s::text[], %s::text[], %s::jsonb[], %s::jsonb[],
+                %s::text[], %s::text[]
+            ) AS rows
+            ON CONFLICT (tender_id) DO UPDATE SET
+                title = EXCLUDED.title,
+                description = EXCLUDED.description,
+                filed_under = EXCLUDED.filed_under,
+                company = EXCLUDED.company,
+                metadata_json = EXCLUDED.metadata_json,
+                extra_fields_json = EXCLUDED.extra_fields_json,
+                message_html = EXCLUDED.message_html,
+                content_hash = EXCLUDED.content_hash,
+                renderer_version = EXCLUDED.renderer_version,
+                updated_at = now() AT TIME ZONE 'utc'
+            WHERE tender_details.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+               OR tender_details.message_html IS DISTINCT FROM EXCLUDED.message_html
+               OR tender_details.renderer_version IS DISTINCT FROM EXCLUDED.renderer_version
+            RETURNING tender_id
+        """, [RENDERER_VERSION, *columns])
+        written_ids = [row[0] for row in await cur.fetchall()]
+        await refresh_search_vectors(conn, written_ids)
+        await _write_tender_categories(conn, {tender_id: details_by_id[tender_id] for tender_id in written_ids})
+        await conn.execute("""
+            UPDATE tenders1 AS t
+            SET detail_checked_at = %s, detail_due_at = due.due_at
+            FROM unnest(%s::text[], %s::timestamp[]) AS due (id, due_at)
+            WHERE t.id = due.id
+        """, (
+            now,
+            columns[0],
+            [next_detail_check(tenders.get(tender_id, {}).get("closing_date"), now) for tender_id in columns[0]]
+        ))
+    return len(written_ids), changed
+
+
+def detail_categories(details):
+    # Parsers return the category list; rows stored earlier only have the
+    # comma-joined filed_under.
+    categories = details.get("categories")
+    if categories is None:
+        categories = (details.get("filed_under") or "").split(",")
+    return list(dict.fromkeys(name.strip() for name in categories if name and name.strip()))
+
+
+async def _write_tender_categories(conn, details_by_id):
+    if not details_by_id:
+        return
+    pairs = [
+        (tender_id, name)
+        for tender_id, details in details_by_id.items()
+        for name in detail_categories(details)
+    ]
+    tender_ids = list(details_by_id)
+    pair_columns = [list(column) for column in zip(*pairs)] if pairs else [[], []]
+    await conn.execute("""
+        DELETE FROM tender_categories tc
+        USING categories c
+        WHERE c.id = tc.category_id
+          AND tc.tender_id = ANY(%s)
+          AND (tc.tender_id, c.name) NOT IN (SELECT * FROM unnest(%s::text[], %s::text[]))
+    """, (tender_ids, *pair_columns))
+    if not pairs:
+        return
+    await conn.execute("""
+        WITH pairs AS (
+            SELECT * FROM unnest(%s::text[], %s::text[]) AS p (tender_id, name)
+        ),
+        added AS (
+            INSERT INTO categories (name)
+            SELECT DISTINCT name FROM pairs
+            ON CONFLICT (name) DO NOTHING
+            RETURNING id, name
+        ),
+        resolved AS (
+            SELECT id, name FROM added
+            UNION ALL
+            SELECT c.id, c.name FROM categories c WHERE c.name IN (SELECT name FROM pairs)
+        )
+        INSERT INTO tender_categories (tender_id, category_id)
+        SELECT DISTINCT pairs.tender_id, resolved.id
+        FROM pairs
+        JOIN resolved ON resolved.name = pairs.name
+        ON CONFLICT DO NOTHING
+    """, pair_columns)
+
+
+async def backfill_categories():
+    # Builds the normalized category tables from stored filed_under strings.
+    async with connection() as conn:
+        await conn.execute("""
+            INSERT INTO categories (name)
+            SELECT DISTINCT trim(name)
+            FROM tender_details, unnest(string_to_array(filed_under, ',')) AS name
+            WHERE trim(name) <> ''
+            ON CONFLICT (name) DO NOTHING
+        """)
+        cur = await conn.execute("""
+            INSERT INTO tender_categories (tender_id, category_id)
+            SELECT DISTINCT d.tender_id, c.id
+            FROM tender_details d
+            CROSS JOIN LATERAL unnest(string_to_array(d.filed_under, ',')) AS filed (name)
+            JOIN categories c ON c.name = trim(filed.name)
+            ON CONFLICT DO NOTHING
+        """)
+        linked = cur.rowcount
+    logging.info("Linked %s tender categories", linked)
+    return linked
+
+
+async def backfill_content_hashes(batch_size=500):
+    # Hashes rows stored before change detection existed, so the first
+    # refresh run doesn't treat every known tender as changed.
+    listings = 0
+    last_id = ""
+    while True:
+        async with connection() as conn:
+            cur = await conn.execute("""
+                SELECT id, title, url, bid_closing_date, bid_opening_date, published_on
+                FROM tenders1
+                WHERE id > %s AND listing_hash IS NULL
+                ORDER BY id
+                LIMIT %s
+            """, (last_id, batch_size))
+            rows = await cur.fetchall()
+            if not rows:
+                break
+            params = [
+                (listing_hash(dict(zip(("id",) + LISTING_HASH_FIELDS, row))), row[0])
+                for row in rows
+            ]
+            async with conn.cursor() as update_cur:
+                await update_cur.executemany("UPDATE tenders1 SET listing_hash = %s WHERE id = %s", params)
+        listings += len(params)
+        last_id = rows[-1][0]
+
+    details = 0
+    last_id = ""
+    while True:
+        async with connection() as conn:
+            cur = await conn.execute("""
+                SELECT tender_id, title, description, filed_under, company, metadata_json, extra_fields_json
+                FROM tender_details
+                WHERE tender_id > %s AND content_hash IS NULL
+                ORDER BY tender_id
+                LIMIT %s
+            """, (last_id, batch_size))
+            rows = await cur.fetchall()
+            if not rows:
+                break
+            params = [
+                (detail_hash({
+                    "title": row[1],
+                    "description": row[2],
+                    "filed_under": row[3],
+                    "company": row[4],
+                    "metadata": _json_or_empty(row[5]),
+                    "extra_fields": _json_or_empty(row[6])
+                }), row[0])
+                for row in rows
+            ]
+            async with conn.cursor() as update_cur:
+                await update_cur.executemany(
+                    "UPDATE tender_details SET content_hash = %s WHERE tender_id = %s",
+                    params
+                )
+        details += len(params)
+        last_id = rows[-1][0]
+    logging.info("Hashed %s listing rows and %s detail rows", listings, details)
+    return listings, details
+
+
+def _json_or_empty(value):
+    if not value:
+        return {}
+    if isinstance(value, dict):
+        return value
     try:
-        await page.goto(url, timeout=60000, wait_until="domcontentloaded")
-        await page.wait_for_selector("div.ant-tree-list", timeout=15000)
-        html_content = await page.content()
-        soup = BeautifulSoup(html_content, "html.parser")
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return {}
+
+
+async def rerender_stored_messages(batch_size=500):
+    # Regenerates summaries and detail messages written by an older renderer.
+    summaries = 0
+    last_id = ""
+    while True:
+        async with connection() as conn:
+            cur = await conn.execute("""
+                SELECT id, title, bid_closing_date, bid_opening_date, published_on
+                FROM tenders1
+                WHERE id > %s AND renderer_version IS DISTINCT FROM %s
+                ORDER BY id
+                LIMIT %s
+            """, (last_id, RENDERER_VERSION, batch_size))
+            rows = await cur.fetchall()
+            if not rows:
+                break
+            params = [
+                (render_tender_summary({
+                    "title": title,
+                    "bid_closing_date": closing,
+                    "published_on": published_on
+                }), RENDERER_VERSION, tender_id)
+                for tender_id, title, closing, opening, published_on in rows
+            ]
+            async with conn.cursor() as update_cur:
+                await update_cur.executemany(
+                    """
+                    UPDATE tenders1
+                    SET summary_html = %s, renderer_version = %s, updated_at = now() AT TIME ZONE 'utc'
+                    WHERE id = %s
+                    """,
+                    params
+                )
+        summaries += len(params)
+        last_id = rows[-1][0]
+
+    messages = 0
+    last_id = ""
+    while True:
+        async with connection() as conn:
+            cur = await conn.execute("""
+                SELECT d.tender_id, d.title, d.description, d.filed_under, d.company,
+                       d.metadata_json, d.extra_fields_json,
+                       t.title, t.bid_closing_date, t.bid_opening_date
+                FROM tender_details d
+                LEFT JOIN tenders1 t ON t.id = d.tender_id
+                WHERE d.tender_id > %s AND d.renderer_version IS DISTINCT FROM %s
+                ORDER BY d.tender_id
+                LIMIT %s
+            """, (last_id, RENDERER_VERSION, batch_size))
+            rows = await cur.fetchall()
+            if not rows:
+                break
+            params = []
+            for row in rows:
+                tender = {"title": row[7], "bid_closing_date": row[8], "bid_opening_date": row[9]}
+                details = {
+                    "title": row[1],
+                    "description": row[2],
+                    "filed_under": row[3],
+                    "company": row[4],
+                    "metadata": _json_or_empty(row[5]),
+                    "extra_fields": _json_or_empty(row[6])
+                }
+                params.append((render_tender_details(tender, details), RENDERER_VERSION, row[0]))
+            async with conn.cursor() as update_cur:
+                await update_cur.executemany("""
+                    UPDATE tender_details
+                    SET message_html = %s,
+                        renderer_version = %s,
+                        updated_at = now() AT TIME ZONE 'utc'
+                    WHERE tender_id = %s
+                """, params)
+        messages += len(params)
+        last_id = rows[-1][0]
+    logging.info("Re-rendered %s tender summaries and %s detail messages", summaries, messages)
+    return summaries, messages
 
-        title_tag = soup.select_one("h1.text-xl.font-semibold")
-        title = title_tag.get_text(strip=True) if title_tag else None
 
-        paragraphs = soup.find_all("p")
-        description = "\n".join(
-            p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)
+class TenderWriter:
+    # Buffers scraped rows so a run costs one transaction per listing page for
+    # tenders and one per detail_batch_size detail rows, instead of one per row.
+    def __init__(self, detail_batch_size=DEFAULT_DETAIL_BATCH_SIZE, metrics=None):
+        self.detail_batch_size = max(1, detail_batch_size)
+        self.metrics = metrics or ScrapeMetrics()
+        self.tenders_saved = 0
+        self.tenders_updated = 0
+        self.details_saved = 0
+        self.details_changed = 0
+        self.inserted_ids = []
+        self._details = {}
+        self._lock = asyncio.Lock()
+
+    async def write_listing_page(self, tenders):
+        with self.metrics.span("db_listing_write"):
+            inserted_ids = await insert_tenders(tenders)
+        self.tenders_saved += len(inserted_ids)
+        self.inserted_ids.extend(inserted_ids)
+        inserted = set(inserted_ids)
+        return [tender for tender in tenders if tender["id"] in inserted]
+
+    async def write_listing_changes(self, tenders):
+        with self.metrics.span("db_listing_update"):
+            updated_ids = await update_tenders(tenders)
+        self.tenders_updated += len(updated_ids)
+        updated = set(updated_ids)
+        return [tender for tender in tenders if tender["id"] in updated]
+
+    async def add_details(self, tender_id, details):
+        self._details[tender_id] = details
+        if len(self._details) >= self.detail_batch_size:
+            await self.flush_details()
+
+    async def flush_details(self):
+        async with self._lock:
+            batch, self._details = self._details, {}
+            if not batch:
+                return
+            try:
+                with self.metrics.span("db_detail_write"):
+                    written, changed = await upsert_tender_details_many(batch)
+                self.details_saved += written
+                self.details_changed += changed
+            except Exception as exc:
+                self.metrics.incr("detail_write_failures", len(batch))
+                logging.warning("Detail batch write failed (%s rows): %s", len(batch), exc)
+
+
+async def record_scrape_status(pages_scraped, tenders_saved, metrics_summary=None):
+    async with connection() as conn:
+        cur = await conn.execute(
+            "INSERT INTO scrape_status (run_at, pages_scraped, tenders_saved) VALUES (%s, %s, %s) RETURNING id;",
+            (datetime.utcnow(), pages_scraped, tenders_saved)
         )
+        status_id = (await cur.fetchone())[0]
+        if metrics_summary is not None:
+            await conn.execute(
+                "INSERT INTO scrape_metrics (scrape_status_id, wall_seconds, metrics_json) VALUES (%s, %s, %s);",
+                (status_id, metrics_summary["wall_seconds"], json.dumps(metrics_summary))
+            )
+    return status_id
 
-        categories = list({a.get_text(strip=True) for a in soup.select("span.ant-tree-title a")})
-        filed_under = ", ".join(categories) if categories else None
 
-        company_tag = soup.select_one("h3.text-lg.font-medium.m-0.underline.text-blue-600 a")
-        company = company_tag.get_text(strip=True) if company_tag else None
+class HostThrottle:
+    # Caps concurrent requests per host and spaces out request starts so the
+    # detail workers don't hammer the site.
+    def __init__(self, max_per_host=DEFAULT_MAX_PER_HOST, delay=DEFAULT_POLITENESS_DELAY):
+        self.max_per_host = max(1, max_per_host)
+        self.delay = max(0.0, delay)
+        self._semaphores = {}
+        self._locks = {}
+        self._next_start = {}
 
-        metadata = {}
-        extra_fields = {}
-        info_rows = soup.select("div.flex.gap-x-4.gap-y-0.p-2.flex-wrap")
-        for row in info_rows:
-            label_div = row.select_one("div.font-medium")
-            if not label_div:
-                continue
-            label_text = label_div.get_text(strip=True).rstrip(":")
-            value_div = label_div.find_next_sibling("div")
-            value_text = value_div.get_text(strip=True) if value_div else ""
-            if not value_text:
-                continue
-            label_key = label_text.lower()
-            key = DETAIL_FIELDS.get(label_key)
-            if key:
-                metadata[key] = value_text
-            else:
-                extra_fields[label_text] = value_text
-
-        return {
-            "title": title,
-            "description": description,
-            "filed_under": filed_under,
-            "company": company,
-            "metadata": metadata,
-            "extra_fields": extra_fields
-        }
+    @asynccontextmanager
+    async def slot(self, url):
+        host = urlsplit(url).netloc
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.max_per_host))
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with semaphore:
+            async with lock:
+                loop = asyncio.get_running_loop()
+                wait = self._next_start.get(host, 0.0) - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._next_start[host] = loop.time() + self.delay
+            yield
+
+
+class TenderFetcher:
+    # Tries a plain HTTP fetch first (embedded JSON payload, then server-rendered
+    # HTML) and only falls back to headless Chromium when neither has the data.
+    # An injected browser is left open on close so it can serve later runs.
+    def __init__(self, mode="auto", http=None, browser=None, max_connections=8, extractor=None, metrics=None):
+        if mode not in FETCH_MODES:
+            raise ValueError(f"Unknown fetch mode: {mode}")
+        self.mode = mode
+        self.extractor = extractor
+        self.metrics = metrics or ScrapeMetrics()
+        if http is None and mode != "browser":
+            http = HttpFetcher(max_connections=max_connections)
+        self.http = http
+        if mode == "http":
+            browser = None
+        self._owns_browser = browser is None
+        if browser is None and mode != "http":
+            browser = PlaywrightFetcher(page_pool_size=max_connections)
+        self.browser = browser
+        # A long-lived browser's counters span runs; this run reports the difference.
+        self._browser_baseline = dict(browser.stats, bytes_fetched=browser.bytes_fetched) if browser else {}
+        self.stats = {"http_pages": 0, "json_pages": 0, "browser_pages": 0, "fallbacks": 0}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        if self.http is not None:
+            await self.http.close()
+        if self.browser is not None and self._owns_browser:
+            await self.browser.close()
+
+    def browser_stats(self):
+        if self.browser is None:
+            return {}
+        current = dict(self.browser.stats, bytes_fetched=self.browser.bytes_fetched)
+        return {name: value - self._browser_baseline.get(name, 0) for name, value in current.items()}
+
+    async def _fast_path(self, url):
+        if self.http is None:
+            return None
+        try:
+            with self.metrics.span("http_request"):
+                return await self.http.fetch(url)
+        except FetchError as exc:
+            self.metrics.incr("http_failures")
+            logging.debug("HTTP fast path failed: %s", exc)
+            return None
+
+    async def _fallback(self, url, wait_selector):
+        if self.browser is None:
+            raise FetchError(f"No usable data at {url} and browser fallback is disabled")
+        if self.http is not None:
+            self.stats["fallbacks"] += 1
+        with self.metrics.span("browser_navigation"):
+            html_content = await self.browser.fetch(url, wait_selector=wait_selector)
+        self.stats["browser_pages"] += 1
+        return html_content
+
+    async def get_listing(self, url):
+        html_content = await self._fast_path(url)
+        if html_content:
+            with self.metrics.span("parse"):
+                tenders = parse_listing_next_data(extract_next_data(html_content), SITE_ROOT)
+            if tenders:
+                self.stats["json_pages"] += 1
+                return tenders
+            with self.metrics.span("parse"):
+                tenders = parse_listing_html(html_content, SITE_ROOT, self.extractor)
+            if tenders:
+                self.stats["http_pages"] += 1
+                return tenders
+        html_content = await self._fallback(url, LISTING_SELECTOR + " a")
+        with self.metrics.span("parse"):
+            return parse_listing_html(html_content, SITE_ROOT, self.extractor)
+
+    async def get_detail(self, url):
+        html_content = await self._fast_path(url)
+        if html_content:
+            with self.metrics.span("parse"):
+                details = parse_detail_next_data(extract_next_data(html_content), url.rstrip("/").split("/")[-1])
+            if details:
+                self.stats["json_pages"] += 1
+                return details
+            if "ant-tree-list" in html_content:
+                self.stats["http_pages"] += 1
+                with self.metrics.span("parse"):
+                    return parse_detail_html(html_content, self.extractor)
+        html_content = await self._fallback(url, DETAIL_READY_SELECTOR)
+        with self.metrics.span("parse"):
+            return parse_detail_html(html_content, self.extractor)
+
+    def collect_metrics(self):
+        # Folds the fetchers' own counters into the run metrics.
+        metrics = self.metrics
+        for name, value in self.stats.items():
+            metrics.incr(name, value)
+        bytes_fetched = 0
+        if self.http is not None:
+            bytes_fetched += self.http.bytes_fetched
+        if self.browser is not None:
+            browser_stats = self.browser_stats()
+            bytes_fetched += browser_stats["bytes_fetched"]
+            if browser_stats["launch_seconds"]:
+                metrics.observe("browser_launch", browser_stats["launch_seconds"])
+            for name in (
+                "navigation_timeouts",
+                "selector_timeouts",
+                "blocked_requests",
+                "pages_recycled",
+                "browser_relaunches",
+                "browser_recycles"
+            ):
+                metrics.incr(name, browser_stats[name])
+            for name, value in browser_stats.items():
+                if name.startswith("blocked_") and name != "blocked_requests":
+                    metrics.incr(name, value)
+            # Measured transfer of the browser alone, comparable between lean
+            # and full runs.
+            metrics.incr("browser_bytes_fetched", browser_stats["bytes_fetched"])
+        metrics.incr("bytes_fetched", bytes_fetched)
+
+
+async def scrape_detail_page(fetcher, url):
+    try:
+        return await fetcher.get_detail(url)
     except Exception as exc:
         logging.warning("Detail scrape failed for %s: %s", url, exc)
         return None
-    finally:
-        await page.close()
-
 
-async def scrape_pages(pages_to_scrape, scrape_details=True):
-    init_db()
-    existing_ids = load_existing_ids()
-    tenders_saved = 0
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
+async def _detail_worker(fetcher, queue, throttle, writer):
+    while True:
+        tender_id, url = await queue.get()
         try:
-            for page_num in range(1, pages_to_scrape + 1):
-                url = BASE_URL.format(page_num)
-                logging.info("Scraping page %s -> %s", page_num, url)
-
-                loaded = False
-                for attempt in range(1, 4):
-                    try:
-                        await page.goto(url, timeout=60000, wait_until="domcontentloaded")
-                        await page.wait_for_selector(
-                            "h3.font-medium.text-lg.tracking-wide.leading-6 a",
-                            timeout=15000
-                        )
-                        loaded = True
-                        break
-                    except Exception as exc:
-                        logging.warning("List page failed (attempt %s): %s", attempt, exc)
-                        await page.close()
-                        page = await browser.new_page()
-                        await asyncio.sleep(2 * attempt)
-
-                if not loaded:
-                    logging.warning("Skipping list page after retries: %s", url)
-                    continue
-
-                html_content = await page.content()
-                soup = BeautifulSoup(html_content, "html.parser")
-                h3_tags = soup.select("h3.font-medium.text-lg.tracking-wide.leading-6")
-
-                for h3 in h3_tags:
-                    try:
-                        a_tag = h3.select_one("a")
-                        if not a_tag:
-                            continue
-                        title = a_tag.get_text(strip=True)
-                        href = a_tag.get("href", "").strip()
-                        if not href:
-                            continue
-                        full_url = href if href.startswith("http") else "https://tender.2merkato.com" + href
-                        tender_id = full_url.rstrip("/").split("/")[-1]
-                        if tender_id in existing_ids:
-                            continue
-
-                        detail_div = h3.find_parent().find_next_sibling("div")
-                        closing_date = opening_date = published_on = None
-
-                        if detail_div:
-                            for row in detail_div.select("div.flex.gap-x-4"):
-                                label = row.select_one("div.font-medium")
-                                if not label:
-                                    continue
-                                value_div = label.find_next_sibling("div")
-                                label_text = label.get_text(strip=True)
-                                value_text = value_div.get_text(strip=True) if value_div else ""
-
-                                if "closing date" in label_text.lower():
-                                    closing_date = value_text
-                                elif "opening date" in label_text.lower():
-                                    opening_date = value_text
-                                elif "published" in label_text.lower():
-                                    published_on = value_text
-
-                        tender_data = {
-                            "id": tender_id,
-                            "title": title,
-                            "url": full_url,
-                            "bid_closing_date": closing_date,
-                            "bid_opening_date": opening_date,
-                            "published_on": published_on
-                        }
-                        inserted = insert_tender(tender_data)
-                        if inserted:
-                            existing_ids.add(tender_id)
-                            tenders_saved += 1
-                            if scrape_details:
-                                details = await scrape_detail_page(browser, full_url)
-                                if details:
-                                    upsert_tender_details(tender_id, details)
-                    except Exception as exc:
-                        logging.warning("Skipping tender: %s", exc)
+            waited = time.perf_counter()
+            async with throttle.slot(url):
+                fetcher.metrics.observe("throttle_wait", time.perf_counter() - waited)
+                with fetcher.metrics.span("detail_fetch"):
+                    details = await scrape_detail_page(fetcher, url)
+            if details:
+                await writer.add_details(tender_id, details)
+            else:
+                fetcher.metrics.incr("detail_failures")
+        except Exception as exc:
+            logging.warning("Detail worker failed for %s: %s", url, exc)
         finally:
-            await page.close()
-            await browser.close()
+            queue.task_done()
+
+
+async def scrape_pages(
+    pages_to_scrape,
+    scrape_details=True,
+    detail_concurrency=DEFAULT_DETAIL_CONCURRENCY,
+    max_per_host=DEFAULT_MAX_PER_HOST,
+    politeness_delay=DEFAULT_POLITENESS_DELAY,
+    incremental=False,
+    known_page_limit=DEFAULT_KNOWN_PAGE_LIMIT,
+    fetch_mode="auto",
+    notify=True,
+    refresh=False,
+    browser=None,
+    archive_after_days=None,
+    compress_archive=False
+):
+    # In incremental mode, pages_to_scrape is an upper bound: paging stops once
+    # known_page_limit consecutive listing pages contain no new tender IDs.
+    # With notify, new tenders are matched against subscriptions afterwards
+    # and queued for the bot to deliver. With refresh, known tenders whose
+    # listing row changed are rewritten, and their detail pages are re-fetched
+    # along with those whose revisit is due (see REVISIT_SCHEDULE). A browser
+    # passed in (a PlaywrightFetcher kept across runs) is health-checked and
+    # reused instead of launching Chromium for this run. With
+    # archive_after_days, tenders closed longer ago than that are moved to the
+    # archive tables once the scrape is done.
+    throttle = HostThrottle(max_per_host=max_per_host, delay=politeness_delay)
+    metrics = ScrapeMetrics()
+    # Leave one connection for the listing loop on top of the detail writers.
+    async with pool_scope(max_size=max(detail_concurrency + 1, 2)):
+        if browser is not None and fetch_mode != "http":
+            await browser.check_health()
+        fetcher = TenderFetcher(
+            mode=fetch_mode,
+            browser=browser,
+            max_connections=detail_concurrency + 1,
+            metrics=metrics
+        )
+        async with fetcher:
+            writer = await _scrape_pages(
+                fetcher,
+                pages_to_scrape,
+                scrape_details,
+                detail_concurrency,
+                throttle,
+                known_page_limit if incremental else None,
+                refresh
+            )
+        logging.info("Fetch stats: %s", fetcher.stats)
+        browser_stats = fetcher.browser_stats()
+        if browser_stats.get("pages_loaded"):
+            logging.info("Browser stats: %s", browser_stats)
+        if notify:
+            try:
+                with metrics.span("notify"):
+                    await queue_notifications(writer.inserted_ids)
+            except Exception as exc:
+                logging.warning("Subscription fan-out failed: %s", exc)
+        if archive_after_days is not None:
+            try:
+                with metrics.span("archive"):
+                    tenders_archived, details_archived = await archive_closed_tenders(
+                        archive_after_days, compress=compress_archive
+                    )
+                metrics.incr("tenders_archived", tenders_archived)
+                metrics.incr("details_archived", details_archived)
+            except Exception as exc:
+                logging.warning("Archiving closed tenders failed: %s", exc)
+
+        fetcher.collect_metrics()
+        metrics.incr("tenders_saved", writer.tenders_saved)
+        metrics.incr("details_saved", writer.details_saved)
+        if refresh:
+            metrics.incr("tenders_updated", writer.tenders_updated)
+            metrics.incr("details_changed", writer.details_changed)
+        summary = metrics.summary()
+        await record_scrape_status(metrics.counters["pages_scraped"], writer.tenders_saved, summary)
+        set_last_run(summary)
+        logging.info("Run metrics: %s", json.dumps(summary))
+        return writer.tenders_saved
+
 
-    record_scrape_status(pages_to_scrape, tenders_saved)
-    return tenders_saved
+async def _fetch_listing(fetcher, throttle, url):
+    for attempt in range(1, 4):
+        if attempt > 1:
+            fetcher.metrics.incr("listing_retries")
+        try:
+            async with throttle.slot(url):
+                with fetcher.metrics.span("listing_fetch"):
+                    return await fetcher.get_listing(url)
+        except Exception as exc:
+            logging.warning("List page failed (attempt %s): %s", attempt, exc)
+            await asyncio.sleep(2 * attempt)
+    fetcher.metrics.incr("listing_failures")
+    return None
+
+
+async def _scrape_pages(
+    fetcher, pages_to_scrape, scrape_details, detail_concurrency, throttle, known_page_limit, refresh=False
+):
+    await init_db()
+    metrics = fetcher.metrics
+    writer = TenderWriter(metrics=metrics)
+    known_pages = 0
+
+    detail_queue = asyncio.Queue()
+    workers = []
+    if scrape_details:
+        workers = [
+            asyncio.create_task(_detail_worker(fetcher, detail_queue, throttle, writer))
+            for _ in range(max(1, detail_concurrency))
+        ]
+    try:
+        for page_num in range(1, pages_to_scrape + 1):
+            url = BASE_URL.format(page_num)
+            logging.info("Scraping page %s -> %s", page_num, url)
+
+            listed = await _fetch_listing(fetcher, throttle, url)
+            if listed is None:
+                logging.warning("Skipping list page after retries: %s", url)
+                continue
 
+            metrics.incr("pages_scraped")
+            listed_ids = [tender["id"] for tender in listed]
+            with metrics.span("db_lookup"):
+                if refresh:
+                    known = await find_known_listings(listed_ids)
+                else:
+                    known = dict.fromkeys(await find_existing_ids(listed_ids))
+            new_tenders = [tender for tender in listed if tender["id"] not in known]
+
+            revisits = []
+            if refresh:
+                try:
+                    changed = await writer.write_listing_changes(changed_listings(listed, known))
+                except Exception as exc:
+                    logging.warning("Listing updates failed on page %s: %s", page_num, exc)
+                    changed = []
+                revisits = select_revisits(listed, known, changed)
+
+            if new_tenders or revisits:
+                known_pages = 0
+            elif known_page_limit is not None:
+                known_pages += 1
+                if known_pages >= known_page_limit:
+                    logging.info("No new tenders on the last %s page(s); stopping early.", known_pages)
+                    break
+
+            try:
+                inserted = await writer.write_listing_page(new_tenders)
+            except Exception as exc:
+                logging.warning("Skipping listing page %s: %s", page_num, exc)
+                continue
+            if scrape_details:
+                if revisits:
+                    metrics.incr("details_revisited", len(revisits))
+                for tender_data in inserted + revisits:
+                    detail_queue.put_nowait((tender_data["id"], tender_data["url"]))
+
+        if workers:
+            await detail_queue.join()
+        await writer.flush_details()
+    finally:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+    return writer
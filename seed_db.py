@@ -2,7 +2,14 @@ import argparse
 import asyncio
 import logging
 
-from scraper_lib import scrape_pages
+from scraper_lib import (
+    DEFAULT_DETAIL_CONCURRENCY,
+    DEFAULT_KNOWN_PAGE_LIMIT,
+    DEFAULT_MAX_PER_HOST,
+    DEFAULT_POLITENESS_DELAY,
+    FETCH_MODES,
+    scrape_pages
+)
 
 
 def parse_args():
@@ -13,13 +20,67 @@ def parse_args():
         action="store_true",
         help="Skip detail-page scraping."
     )
+    parser.add_argument(
+        "--detail-concurrency",
+        type=int,
+        default=DEFAULT_DETAIL_CONCURRENCY,
+        help="Number of detail pages to fetch concurrently."
+    )
+    parser.add_argument(
+        "--max-per-host",
+        type=int,
+        default=DEFAULT_MAX_PER_HOST,
+        help="Most requests in flight to one host at a time, listing and detail pages together."
+    )
+    parser.add_argument(
+        "--politeness-delay",
+        type=float,
+        default=DEFAULT_POLITENESS_DELAY,
+        help=(
+            "Seconds between the starts of two requests to the same host. Each host then sees at most "
+            "1/delay requests per second (2/s at the default 0.5) with up to --max-per-host in flight; "
+            "0 leaves only the --max-per-host cap."
+        )
+    )
+    parser.add_argument(
+        "--fetch-mode",
+        choices=FETCH_MODES,
+        default="auto",
+        help="auto: plain HTTP with headless-browser fallback; http: never launch a browser; browser: always use it."
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Stop paging once listing pages contain no new tenders."
+    )
+    parser.add_argument(
+        "--stop-after-known-pages",
+        type=int,
+        default=DEFAULT_KNOWN_PAGE_LIMIT,
+        help="Consecutive pages without new tenders before an incremental run stops."
+    )
+    parser.add_argument(
+        "--notify",
+        action="store_true",
+        help="Queue subscription notifications for the tenders this run adds."
+    )
     return parser.parse_args()
 
 
 async def main():
     args = parse_args()
     logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
-    await scrape_pages(args.pages, scrape_details=not args.no_details)
+    await scrape_pages(
+        args.pages,
+        scrape_details=not args.no_details,
+        detail_concurrency=args.detail_concurrency,
+        max_per_host=args.max_per_host,
+        politeness_delay=args.politeness_delay,
+        incremental=args.incremental,
+        known_page_limit=args.stop_after_known_pages,
+        fetch_mode=args.fetch_mode,
+        notify=args.notify
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,246 @@
+import logging
+import re
+from collections import defaultdict
+
+from db import connection
+from formatting import RENDERER_VERSION
+
+SUBSCRIPTION_KINDS = ("keyword", "category", "region")
+MAX_SUBSCRIPTIONS_PER_CHAT = 20
+MAX_DELIVERY_ATTEMPTS = 5
+# Claimed rows older than this are treated as abandoned by a stopped bot.
+DEFAULT_CLAIM_TIMEOUT_SECONDS = 600.0
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+def parse_subscription(text):
+    # "/subscribe road construction" is a keyword; "category: Vehicles" and
+    # "region: Oromia" target those fields.
+    kind, value = "keyword", (text or "").strip()
+    prefix, sep, rest = value.partition(":")
+    if sep and prefix.strip().lower() in SUBSCRIPTION_KINDS:
+        kind, value = prefix.strip().lower(), rest.strip()
+    tokens = tokenize(value)
+    if not tokens:
+        return None
+    return kind, value, " ".join(tokens)
+
+
+def tender_fields(tender):
+    # Token sets per subscription kind. A category subscription has to match
+    # within one category, so each category is its own set.
+    keyword_text = " ".join(
+        tender.get(key) or "" for key in ("title", "detail_title", "company", "filed_under", "description")
+    )
+    categories = [part for part in (tender.get("filed_under") or "").split(",") if part.strip()]
+    return {
+        "keyword": [set(tokenize(keyword_text))],
+        "category": [set(tokenize(category)) for category in categories],
+        "region": [set(tokenize(tender.get("region")))]
+    }
+
+
+class SubscriptionMatcher:
+    # Inverted index from one token of each subscription to the subscription.
+    # A tender only looks up its own tokens, so matching costs
+    # O(tokens in the new tenders + candidate checks), independent of how many
+    # subscriptions exist.
+    def __init__(self, subscriptions):
+        self._index = {kind: defaultdict(list) for kind in SUBSCRIPTION_KINDS}
+        self.size = 0
+        for chat_id, kind, value, normalized in subscriptions:
+            tokens = frozenset(normalized.split())
+            if kind not in self._index or not tokens:
+                continue
+            # Index on the longest token; long words tend to be the rarest.
+            anchor = max(tokens, key=len)
+            self._index[kind][anchor].append((chat_id, value, tokens))
+            self.size += 1
+
+    def match(self, tender):
+        matches = {}
+        for kind, token_sets in tender_fields(tender).items():
+            index = self._index[kind]
+            if not index:
+                continue
+            for tokens in token_sets:
+                for token in tokens:
+                    for chat_id, value, required in index.get(token, ()):
+                        if required <= tokens:
+                            matches.setdefault(chat_id, set()).add(value)
+        return matches
+
+
+async def add_subscription(chat_id, kind, value, normalized):
+    async with connection() as conn:
+        cur = await conn.execute("SELECT count(*) FROM subscriptions WHERE chat_id = %s;", (chat_id,))
+        if (await cur.fetchone())[0] >= MAX_SUBSCRIPTIONS_PER_CHAT:
+            return None
+        cur = await conn.execute("""
+            INSERT INTO subscriptions (chat_id, kind, value, normalized)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (chat_id, kind, normalized) DO NOTHING
+            RETURNING id
+        """, (chat_id, kind, value, normalized))
+        row = await cur.fetchone()
+    return row[0] if row else 0
+
+
+async def list_subscriptions(chat_id):
+    async with connection() as conn:
+        cur = await conn.execute(
+            "SELECT id, kind, value FROM subscriptions WHERE chat_id = %s ORDER BY id;",
+            (chat_id,)
+        )
+        return await cur.fetchall()
+
+
+async def remove_subscription(chat_id, subscription_id):
+    async with connection() as conn:
+        cur = await conn.execute(
+            "DELETE FROM subscriptions WHERE chat_id = %s AND id = %s;",
+            (chat_id, subscription_id)
+        )
+        return cur.rowcount
+
+
+async def remove_chat(chat_id):
+    async with connection() as conn:
+        await conn.execute("DELETE FROM subscriptions WHERE chat_id = %s;", (chat_id,))
+
+
+async def load_matcher():
+    async with connection() as conn:
+        cur = await conn.execute("SELECT chat_id, kind, value, normalized FROM subscriptions;")
+        return SubscriptionMatcher(await cur.fetchall())
+
+
+async def _load_tenders_for_matching(conn, tender_ids):
+    cur = await conn.execute("""
+        SELECT t.id, t.title, d.title, d.company, d.filed_under, d.description, d.metadata_json->>'region'
+        FROM tenders1 t
+        LEFT JOIN tender_details d ON d.tender_id = t.id
+        WHERE t.id = ANY(%s)
+    """, (list(tender_ids),))
+    tenders = []
+    for row in await cur.fetchall():
+        tenders.append({
+            "id": row[0],
+            "title": row[1],
+            "detail_title": row[2],
+            "company": row[3],
+            "filed_under": row[4],
+            "description": row[5],
+            "region": row[6]
+        })
+    return tenders
+
+
+async def queue_notifications(tender_ids):
+    # Writes one outbox row per (chat, tender); the bot delivers them. The
+    # primary key makes re-queuing the same tender a no-op.
+    if not tender_ids:
+        return 0
+    matcher = await load_matcher()
+    if not matcher.size:
+        return 0
+    rows = []
+    queued = 0
+    async with connection() as conn:
+        for tender in await _load_tenders_for_matching(conn, tender_ids):
+            for chat_id, values in matcher.match(tender).items():
+                rows.append((chat_id, tender["id"], ", ".join(sorted(values))))
+        if rows:
+            cur = await conn.execute("""
+                INSERT INTO notifications (chat_id, tender_id, matched)
+                SELECT * FROM unnest(%s::bigint[], %s::text[], %s::text[])
+                ON CONFLICT (chat_id, tender_id) DO NOTHING
+            """, [list(column) for column in zip(*rows)])
+            queued = cur.rowcount
+    logging.info(
+        "Matched %s new tenders against %s subscriptions: %s notifications queued",
+        len(tender_ids), matcher.size, queued
+    )
+    return queued
+
+
+async def release_stale_claims(timeout_seconds=DEFAULT_CLAIM_TIMEOUT_SECONDS):
+    # A row claimed longer ago than any send takes means the bot that claimed
+    # it stopped mid-send. It may have reached the user, so it is closed
+    # instead of being sent twice. Younger claims may belong to another bot
+    # process that is still sending them.
+    async with connection() as conn:
+        cur = await conn.execute("""
+            UPDATE notifications
+            SET sent_at = claimed_at
+            WHERE sent_at IS NULL
+              AND claimed_at < now() AT TIME ZONE 'utc' - make_interval(secs => %s)
+        """, (timeout_seconds,))
+        if cur.rowcount:
+            logging.warning("Dropped %s notifications left claimed by a stopped bot", cur.rowcount)
+        return cur.rowcount
+
+
+async def claim_notifications(limit=200):
+    # Claims the oldest pending rows and groups them by chat. A tender may
+    # have been archived since it was queued, so both tables are read.
+    async with connection() as conn:
+        cur = await conn.execute("""
+            WITH claimed AS (
+                UPDATE notifications
+                SET claimed_at = now() AT TIME ZONE 'utc', attempts = attempts + 1
+                WHERE (chat_id, tender_id) IN (
+                    SELECT chat_id, tender_id FROM notifications
+                    WHERE sent_at IS NULL AND claimed_at IS NULL
+                    ORDER BY created_at
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING chat_id, tender_id, matched, created_at
+            )
+            SELECT c.chat_id, c.tender_id, t.title, t.bid_closing_date, t.published_on,
+                   CASE WHEN t.renderer_version = %s THEN t.summary_html END, c.matched
+            FROM claimed c
+            JOIN (
+                SELECT id, title, bid_closing_date, published_on, renderer_version, summary_html FROM tenders1
+                UNION ALL
+                SELECT id, title, bid_closing_date, published_on, renderer_version, summary_html FROM tenders_archive
+            ) t ON t.id = c.tender_id
+            ORDER BY c.chat_id, c.created_at, c.tender_id
+        """, (limit, RENDERER_VERSION))
+        rows = await cur.fetchall()
+    by_chat = defaultdict(list)
+    for chat_id, tender_id, title, closing, published_on, summary_html, matched in rows:
+        by_chat[chat_id].append({
+            "id": tender_id,
+            "title": title,
+            "bid_closing_date": closing,
+            "published_on": published_on,
+            "summary_html": summary_html,
+            "matched": matched
+        })
+    return by_chat
+
+
+async def mark_sent(chat_id, tender_ids):
+    async with connection() as conn:
+        await conn.execute("""
+            UPDATE notifications SET sent_at = now() AT TIME ZONE 'utc'
+            WHERE chat_id = %s AND tender_id = ANY(%s)
+        """, (chat_id, list(tender_ids)))
+
+
+async def release_claim(chat_id, tender_ids):
+    # Failed sends go back in the queue until MAX_DELIVERY_ATTEMPTS.
+    async with connection() as conn:
+        await conn.execute("""
+            UPDATE notifications
+            SET claimed_at = NULL,
+                sent_at = CASE WHEN attempts >= %s THEN now() AT TIME ZONE 'utc' END
+            WHERE chat_id = %s AND tender_id = ANY(%s)
+        """, (MAX_DELIVERY_ATTEMPTS, chat_id, list(tender_ids)))
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# The bot and scraper are flat modules at the repo root; the benchmark
+# fixtures double as test data.
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [REPO_ROOT, os.path.join(REPO_ROOT, "benchmarks")]
+
+# bot.py reads its required settings at import; tests never connect.
+os.environ.setdefault("DB_URL", "postgresql://localhost/unused")
+os.environ.setdefault("TELEGRAM_TOKEN", "123456:test-token")
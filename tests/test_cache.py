@@ -0,0 +1,247 @@
+import asyncio
+
+import pytest
+
+import cache
+from cache import DetailRecord, LRUCache, SingleFlight, TenderRecord
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    return clock
+
+
+def test_get_counts_hits_and_misses(clock):
+    lru = LRUCache(max_entries=10, ttl=60)
+    lru.set("a", 1)
+    assert lru.get("a") == 1
+    assert lru.get("b", "default") == "default"
+    assert lru.stats()["hits"] == 1
+    assert lru.stats()["misses"] == 1
+    assert lru.stats()["hit_rate"] == 0.5
+
+
+def test_entries_expire_after_ttl(clock):
+    lru = LRUCache(max_entries=10, ttl=60)
+    lru.set("a", 1)
+    clock.now += 59.9
+    assert "a" in lru
+    clock.now += 0.2
+    assert lru.get("a") is None
+    assert len(lru) == 0
+    assert lru.expirations == 1
+
+
+def test_set_refreshes_the_ttl(clock):
+    lru = LRUCache(max_entries=10, ttl=60)
+    lru.set("a", 1)
+    clock.now += 50
+    lru.set("a", 2)
+    clock.now += 50
+    assert lru.get("a") == 2
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    lru = LRUCache(max_entries=2, ttl=60)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    lru.get("a")
+    lru.set("c", 3)
+    assert "a" in lru and "c" in lru
+    assert "b" not in lru
+    assert lru.evictions == 1
+
+
+def test_membership_check_is_not_counted(clock):
+    lru = LRUCache(max_entries=2, ttl=60)
+    lru.set("a", 1)
+    assert "a" in lru
+    assert "b" not in lru
+    assert lru.hits == 0 and lru.misses == 0
+
+
+def test_falsy_values_are_cached(clock):
+    lru = LRUCache(max_entries=2, ttl=60)
+    lru.set("empty", None)
+    lru.set("zero", 0)
+    assert "empty" in lru
+    assert lru.get("zero", "default") == 0
+
+
+def test_invalidate_and_clear_are_counted(clock):
+    lru = LRUCache(max_entries=10, ttl=60)
+    for key in "abc":
+        lru.set(key, key)
+    lru.invalidate("a")
+    lru.invalidate("missing")
+    assert lru.invalidations == 1
+    lru.clear()
+    assert len(lru) == 0
+    assert lru.invalidations == 3
+
+
+def test_max_entries_is_at_least_one():
+    lru = LRUCache(max_entries=0)
+    lru.set("a", 1)
+    assert lru.get("a") == 1
+
+
+def test_records_behave_like_read_only_dicts():
+    tender = TenderRecord("t1", "Title", "Nov 03, 2026", None, "Oct 17, 2026", "https://tender.example/t1")
+    assert tender["title"] == "Title"
+    assert tender.get("bid_opening_date", "n/a") == "n/a"
+    assert tender.get("unknown", "n/a") == "n/a"
+    with pytest.raises(KeyError):
+        tender["unknown"]
+    assert tender.to_dict()["summary_html"] is None
+
+    detail = DetailRecord("Title", "Body", "Vehicles", "Ministry", {"region": "Oromia"}, {})
+    assert detail.get("metadata") == {"region": "Oromia"}
+    assert not hasattr(detail, "__dict__")
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class Source:
+    # Counts calls; each call waits on `release` so tests control overlap.
+    def __init__(self, value="result"):
+        self.value = value
+        self.calls = 0
+        self.release = None
+
+    async def __call__(self):
+        self.calls += 1
+        if self.release is not None:
+            await self.release.wait()
+        if isinstance(self.value, Exception):
+            raise self.value
+        return self.value
+
+
+def test_concurrent_calls_share_one_flight():
+    async def scenario():
+        flights, source = SingleFlight(), Source()
+        source.release = asyncio.Event()
+        calls = [asyncio.create_task(flights.do("k", source)) for _ in range(5)]
+        await asyncio.sleep(0)
+        source.release.set()
+        return await asyncio.gather(*calls), source.calls, flights.stats()
+
+    results, calls, stats = run(scenario())
+    assert results == ["result"] * 5
+    assert calls == 1
+    assert stats["calls"] == 1 and stats["shared"] == 4 and stats["in_flight"] == 0
+
+
+def test_results_are_kept_for_the_ttl(clock):
+    async def scenario():
+        flights, source = SingleFlight(ttl=30), Source()
+        await flights.do("k", source)
+        await flights.do("k", source)
+        clock.now += 31
+        await flights.do("k", source)
+        return source.calls, flights.cached
+
+    assert run(scenario()) == (2, 1)
+
+
+def test_new_generation_drops_kept_results():
+    async def scenario():
+        flights, source = SingleFlight(), Source()
+        flights.set_generation("run-1")
+        await flights.do("k", source)
+        flights.set_generation("run-1")
+        await flights.do("k", source)
+        flights.set_generation("run-2")
+        await flights.do("k", source)
+        return source.calls
+
+    assert run(scenario()) == 2
+
+
+def test_result_of_an_older_generation_is_not_kept():
+    async def scenario():
+        flights, source = SingleFlight(), Source()
+        source.release = asyncio.Event()
+        call = asyncio.create_task(flights.do("k", source))
+        await asyncio.sleep(0)
+        flights.set_generation("run-2")
+        source.release.set()
+        await call
+        source.release = None
+        await flights.do("k", source)
+        return source.calls
+
+    assert run(scenario()) == 2
+
+
+def test_forget_drops_one_kept_result():
+    async def scenario():
+        flights, source = SingleFlight(), Source()
+        await flights.do("a", source)
+        await flights.do("b", source)
+        flights.forget("a")
+        flights.forget("missing")
+        await flights.do("a", source)
+        await flights.do("b", source)
+        return source.calls
+
+    assert run(scenario()) == 3
+
+
+def test_forget_during_a_flight_starts_a_fresh_one():
+    async def scenario():
+        flights, old, new = SingleFlight(), Source("old"), Source("new")
+        old.release = asyncio.Event()
+        first = asyncio.create_task(flights.do("k", old))
+        await asyncio.sleep(0)
+        flights.forget("k")
+        second = await flights.do("k", new)
+        old.release.set()
+        return await first, second, await flights.do("k", old)
+
+    # The forgotten flight's result isn't kept over the fresh one.
+    assert run(scenario()) == ("old", "new", "new")
+
+
+def test_errors_reach_every_waiter_and_are_not_kept():
+    async def scenario():
+        flights, source = SingleFlight(), Source(RuntimeError("db down"))
+        source.release = asyncio.Event()
+        calls = [asyncio.create_task(flights.do("k", source)) for _ in range(3)]
+        await asyncio.sleep(0)
+        source.release.set()
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        source.value, source.release = "ok", None
+        return results, await flights.do("k", source)
+
+    results, retried = run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retried == "ok"
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_call():
+    async def scenario():
+        flights, source = SingleFlight(), Source()
+        source.release = asyncio.Event()
+        owner = asyncio.create_task(flights.do("k", source))
+        waiter = asyncio.create_task(flights.do("k", source))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        source.release.set()
+        return await owner, waiter.cancelled()
+
+    assert run(scenario()) == ("result", True)
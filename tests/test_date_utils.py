@@ -0,0 +1,29 @@
+from datetime import date
+
+import pytest
+
+from date_utils import parse_date
+
+TODAY = date(2026, 10, 17)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Nov 03, 2026 (10:00 AM)", date(2026, 11, 3)),
+    ("Oct 17, 2026", date(2026, 10, 17)),
+    ("October 17, 2026", date(2026, 10, 17)),
+    ("17 Oct 2026", date(2026, 10, 17)),
+    ("17th October, 2026", date(2026, 10, 17)),
+    ("Published: Oct 1st, 2026 10:00 AM", date(2026, 10, 1)),
+    ("2026-10-17", date(2026, 10, 17)),
+    ("17/10/2026", date(2026, 10, 17)),
+    ("Today", TODAY),
+    ("yesterday", date(2026, 10, 16)),
+    ("", None),
+    (None, None),
+    ("   ", None),
+    ("Closing soon", None),
+    ("Feb 30, 2026", None),
+    ("13/13/2026", None),
+])
+def test_parse_date(text, expected):
+    assert parse_date(text, today=TODAY) == expected
@@ -0,0 +1,34 @@
+import pytest
+
+from bot import EXPORT_DEFAULT_DAYS, export_filename, parse_export_args
+
+
+@pytest.mark.parametrize("args, expected", [
+    ([], (EXPORT_DEFAULT_DAYS, None, False)),
+    (["30"], (30, None, False)),
+    (["0"], (0, None, False)),
+    (["gzip"], (EXPORT_DEFAULT_DAYS, None, True)),
+    (["GZIP"], (EXPORT_DEFAULT_DAYS, None, True)),
+    (["14", "gzip"], (14, None, True)),
+    (["road", "construction"], (None, "road construction", False)),
+    (["7", "road", "construction", "gzip"], (7, "road construction", True)),
+    # Only a leading number is a day count; later numbers are search words.
+    (["road", "2026"], (None, "road 2026", False)),
+    (["gzip", "road"], (None, "gzip road", False)),
+    (["-5"], (None, "-5", False)),
+])
+def test_parse_export_args(args, expected):
+    assert parse_export_args(args) == expected
+
+
+def test_parse_export_args_leaves_the_caller_list_alone():
+    args = ["7", "road", "gzip"]
+    parse_export_args(args)
+    assert args == ["7", "road", "gzip"]
+
+
+def test_export_filename_describes_the_export():
+    assert export_filename(7, None, False).endswith("_7d.csv")
+    assert export_filename(0, None, True).endswith(".csv.gz")
+    assert "_0d" not in export_filename(0, None, True)
+    assert export_filename(None, "road", False).endswith("_search.csv")
@@ -0,0 +1,112 @@
+import glob
+import os
+
+import pytest
+
+from conftest import REPO_ROOT
+from extractors import parse_detail_html, parse_listing_html
+from fixture_server import render_detail_page, render_listing_page
+
+SITE_ROOT = "https://tender.example"
+FIXTURE_DIR = os.path.join(REPO_ROOT, "benchmarks", "fixtures")
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as file:
+        return file.read()
+
+
+def _detail_pages():
+    pages = [_read(path) for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "detail_*.html")))]
+    return pages + [render_detail_page(f"fx{number:07d}") for number in range(1, 40, 3)]
+
+
+def _listing_pages():
+    pages = [_read(path) for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "listing_*.html")))]
+    return pages + [render_listing_page(page) for page in (1, 2, 7)]
+
+
+@pytest.mark.parametrize("page", _detail_pages())
+def test_detail_backends_agree_on_fixtures(page):
+    assert parse_detail_html(page, backend="lxml") == parse_detail_html(page, backend="bs4")
+
+
+@pytest.mark.parametrize("page", _listing_pages())
+def test_listing_backends_agree_on_fixtures(page):
+    listing = parse_listing_html(page, SITE_ROOT, backend="lxml")
+    assert listing
+    assert listing == parse_listing_html(page, SITE_ROOT, backend="bs4")
+
+
+@pytest.mark.parametrize("markup", [
+    "",
+    "<p>x<!-- note --> y</p><p><script>var a;</script>z</p>",
+    "<p>a&nbsp;b</p><p>   </p><p>\n c \n</p>",
+    "<p>before <b>bold</b> after</p><p><style>p {}</style>styled</p>",
+    "<div class='flex gap-x-4 gap-y-0 p-2 flex-wrap'><div class='font-medium'>Region:</div></div>",
+    "<div class='flex gap-x-4 gap-y-0 p-2 flex-wrap'><div class='font-medium'>Region:</div><div>Oromia",
+    "<span class='ant-tree-title'><a>B</a></span><span class='ant-tree-title'><a>A</a></span>"
+    "<span class='ant-tree-title'><a>B</a></span>",
+    "<h1 class='text-xl font-semibold'>Title <span>part</span></h1><p>unclosed",
+])
+def test_detail_backends_agree_on_malformed_markup(markup):
+    assert parse_detail_html(markup, backend="lxml") == parse_detail_html(markup, backend="bs4")
+
+
+@pytest.mark.parametrize("markup, bs4_description, lxml_description", [
+    # html.parser nests a <p> opened inside another, so bs4 repeats the inner
+    # text in the outer paragraph. lxml closes the open <p> first, as browsers
+    # do, and keeps each paragraph once.
+    ("<p>outer<p>inner</p></p>", "outerinner\ninner", "outer\ninner"),
+    ("<p>unclosed<p>next", "unclosednext\nnext", "unclosed\nnext"),
+    # A block element ends an open <p> for lxml; its text and the tail after
+    # it are no longer part of the paragraph.
+    ("<p>a<div>b</div>c</p>", "abc", "a"),
+])
+def test_detail_backends_known_divergence_on_nested_paragraphs(markup, bs4_description, lxml_description):
+    assert parse_detail_html(markup, backend="bs4")["description"] == bs4_description
+    assert parse_detail_html(markup, backend="lxml")["description"] == lxml_description
+
+
+def test_detail_categories_keep_first_seen_order():
+    markup = "".join(
+        f"<span class='ant-tree-title'><a>{name}</a></span>" for name in ("Vehicles", "Furniture", "Vehicles")
+    )
+    for backend in ("bs4", "lxml"):
+        detail = parse_detail_html(markup, backend=backend)
+        assert detail["categories"] == ["Vehicles", "Furniture"]
+        assert detail["filed_under"] == "Vehicles, Furniture"
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        parse_detail_html("<p>x</p>", backend="html5lib")
+
+
+def test_next_data_detail_skips_meta_objects_before_the_tender():
+    from extractors import extract_next_data, parse_detail_next_data
+
+    payload = extract_next_data(render_detail_page("fx0000007", mode="next"))
+    props = payload["props"]["pageProps"]
+    assert list(props) == ["seo", "tender"]
+    detail = parse_detail_next_data(payload, "fx0000007")
+    assert detail["title"] == props["tender"]["title"]
+    assert detail["description"] != props["seo"]["description"]
+    assert detail["company"] == props["tender"]["company"]["name"]
+
+
+def test_next_data_detail_needs_the_tender_id():
+    from extractors import extract_next_data, parse_detail_next_data
+
+    payload = extract_next_data(render_detail_page("fx0000007", mode="next"))
+    assert parse_detail_next_data(payload, "fx0000008") is None
+    assert parse_detail_next_data(payload, None) is None
+    assert parse_detail_next_data({"props": {"seo": {"title": "Tenders", "description": "x"}}}, "fx0000007") is None
+
+
+def test_default_backend_is_bs4():
+    import extractors
+
+    assert extractors.DEFAULT_EXTRACTOR == "bs4"
+    markup = "<p>outer<p>inner</p></p>"
+    assert parse_detail_html(markup) == parse_detail_html(markup, backend="bs4")
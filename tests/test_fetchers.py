@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from fetchers import PlaywrightFetcher, _site_domain
+
+
+class FakeRequest:
+    def __init__(self, url, resource_type):
+        self.url = url
+        self.resource_type = resource_type
+
+
+class FakeRoute:
+    def __init__(self, url, resource_type):
+        self.request = FakeRequest(url, resource_type)
+        self.outcome = None
+
+    async def continue_(self):
+        self.outcome = "continued"
+
+    async def abort(self, error_code=None):
+        self.outcome = "aborted"
+
+
+@pytest.mark.parametrize("url, domain", [
+    ("https://tender.2merkato.com/tenders/1", "2merkato.com"),
+    ("https://www.googletagmanager.com/gtm.js", "googletagmanager.com"),
+    ("http://127.0.0.1:8080/tenders", "127.0.0.1"),
+    ("http://localhost:8080/", "localhost"),
+])
+def test_site_domain(url, domain):
+    assert _site_domain(url) == domain
+
+
+def route_all(fetcher, requests):
+    routes = [FakeRoute(url, resource_type) for url, resource_type in requests]
+
+    async def scenario():
+        for route in routes:
+            await fetcher._route(route)
+
+    asyncio.run(scenario())
+    return [route.outcome for route in routes]
+
+
+def test_lean_profile_only_lets_first_party_documents_and_scripts_through():
+    fetcher = PlaywrightFetcher()
+    fetcher._first_party.add("2merkato.com")
+    outcomes = route_all(fetcher, [
+        ("https://tender.2merkato.com/tenders/1", "document"),
+        ("https://tender.2merkato.com/_next/static/app.js", "script"),
+        ("https://api.2merkato.com/tenders", "fetch"),
+        ("https://tender.2merkato.com/logo.png", "image"),
+        ("https://tender.2merkato.com/app.css", "stylesheet"),
+        ("https://fonts.gstatic.com/inter.woff2", "font"),
+        ("https://www.googletagmanager.com/gtm.js", "script"),
+    ])
+    assert outcomes == ["continued"] * 3 + ["aborted"] * 4
+
+
+def test_blocked_requests_are_counted_per_reason():
+    fetcher = PlaywrightFetcher()
+    fetcher._first_party.add("2merkato.com")
+    route_all(fetcher, [
+        ("https://tender.2merkato.com/a.png", "image"),
+        ("https://tender.2merkato.com/b.png", "image"),
+        ("https://fonts.gstatic.com/inter.woff2", "font"),
+        ("https://www.googletagmanager.com/gtm.js", "script"),
+        ("https://tender.2merkato.com/tenders/1", "document"),
+    ])
+    stats = fetcher.stats
+    assert stats["blocked_requests"] == 4
+    assert stats["blocked_image"] == 2
+    assert stats["blocked_font"] == 1
+    assert stats["blocked_third_party"] == 1
+    assert "blocked_document" not in stats
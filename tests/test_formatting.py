@@ -0,0 +1,137 @@
+import asyncio
+import json
+
+import pytest
+
+import bot
+from cache import LRUCache, SingleFlight, TenderRecord
+from formatting import (
+    DETAILS_UNAVAILABLE,
+    MESSAGE_LIMIT,
+    RENDERER_VERSION,
+    render_tender_details,
+    render_tender_summary,
+    truncate
+)
+
+TENDER = {
+    "id": "t1",
+    "title": "Supply of Tyres & Batteries",
+    "bid_closing_date": "Nov 03, 2026 (10:00 AM)",
+    "bid_opening_date": "Nov 04, 2026 (10:30 AM)",
+    "published_on": "Oct 17, 2026",
+    "url": "https://example.test/tenders/t1"
+}
+
+DETAILS = {
+    "title": "Supply of Tyres <Lot 2>",
+    "description": "Tyres for the light vehicle fleet.",
+    "filed_under": "Vehicles, Spare Parts",
+    "company": "Ethiopian Roads Administration",
+    "metadata": {"published_on": "Oct 17, 2026", "bid_bond": "50,000 ETB", "region": "Addis Ababa"},
+    "extra_fields": {"Site Visit": "Oct 25, 2026", "Contact": "procurement@example.test", "Empty": ""}
+}
+
+
+def test_summary():
+    assert render_tender_summary(TENDER) == (
+        "📌 <b>Supply of Tyres &amp; Batteries</b>\n"
+        "🗓 Closing: Nov 03, 2026 (10:00 AM)\n"
+        "📅 Published: Oct 17, 2026"
+    )
+
+
+def test_summary_of_a_bare_listing():
+    assert render_tender_summary({"id": "t2"}) == (
+        "📌 <b>Untitled tender</b>\n"
+        "🗓 Closing: N/A\n"
+        "📅 Published: N/A"
+    )
+
+
+def test_details():
+    assert render_tender_details(TENDER, DETAILS) == (
+        "📌 <b>Supply of Tyres &lt;Lot 2&gt;</b>\n"
+        "🗓 <b>Closing</b>: Nov 03, 2026 (10:00 AM)\n"
+        "🗓 <b>Opening</b>: Nov 04, 2026 (10:30 AM)\n"
+        "🏢 <b>Company</b>: Ethiopian Roads Administration\n"
+        "🗂 <b>Filed under</b>: Vehicles, Spare Parts\n"
+        "📅 <b>Published</b>: Oct 17, 2026\n"
+        "💰 <b>Bid bond</b>: 50,000 ETB\n"
+        "📍 <b>Region</b>: Addis Ababa\n"
+        "• <b>Contact</b>: procurement@example.test\n"
+        "• <b>Site Visit</b>: Oct 25, 2026\n"
+        "\n"
+        "Tyres for the light vehicle fleet."
+    )
+
+
+def test_details_fall_back_to_the_listing():
+    assert render_tender_details(TENDER, {"metadata": None, "extra_fields": None}) == (
+        "📌 <b>Supply of Tyres &amp; Batteries</b>\n"
+        "🗓 <b>Closing</b>: Nov 03, 2026 (10:00 AM)\n"
+        "🗓 <b>Opening</b>: Nov 04, 2026 (10:30 AM)\n"
+        "🏢 <b>Company</b>: N/A\n"
+        "🗂 <b>Filed under</b>: N/A\n"
+        "\n"
+        "No description available."
+    )
+
+
+@pytest.mark.parametrize("details", [None, {}])
+def test_missing_details(details):
+    assert render_tender_details(TENDER, details) == DETAILS_UNAVAILABLE
+
+
+def test_long_messages_drop_extra_fields_to_fit():
+    details = {
+        **DETAILS,
+        "description": "word " * 1000,
+        "extra_fields": {f"Field {number:03}": "x" * 40 for number in range(60)}
+    }
+    message = render_tender_details(TENDER, details)
+    assert len(message) <= MESSAGE_LIMIT
+    assert "• " not in message
+    assert message.endswith("...")
+
+
+def test_truncate():
+    assert truncate("short", 10) == "short"
+    assert truncate("a" * 20, 10) == "a" * 7 + "..."
+    assert truncate(None) is None
+
+
+class FakeReplica:
+    def __init__(self, message_html, renderer_version):
+        self.row = (message_html, renderer_version)
+
+    def detail_message(self, tender_id):
+        return self.row
+
+    def tender_details(self, tender_id):
+        return (
+            DETAILS["title"], DETAILS["description"], DETAILS["filed_under"], DETAILS["company"],
+            json.dumps(DETAILS["metadata"]), json.dumps(DETAILS["extra_fields"])
+        )
+
+
+def load_detail_message(monkeypatch, renderer_version):
+    monkeypatch.setattr(bot, "get_replica", lambda: FakeReplica("stored message", renderer_version))
+    bot_data = {"details_cache": LRUCache(10, 60), "flights": SingleFlight(60, 10)}
+    tender = TenderRecord(**{key: TENDER[key] for key in TENDER})
+    return asyncio.run(bot.load_detail_message(bot_data, tender))
+
+
+def test_current_stored_message_is_served(monkeypatch):
+    assert load_detail_message(monkeypatch, RENDERER_VERSION) == "stored message"
+
+
+def test_message_from_an_older_renderer_is_rendered_again(monkeypatch):
+    assert load_detail_message(monkeypatch, RENDERER_VERSION - 1) == render_tender_details(TENDER, DETAILS)
+
+
+def test_cached_summary_is_used_as_stored():
+    assert bot.format_tender_summary({**TENDER, "summary_html": "stored summary"}, 3) == "<b>3.</b> stored summary"
+    assert bot.format_tender_summary({**TENDER, "summary_html": None}, 3) == (
+        "<b>3.</b> " + render_tender_summary(TENDER)
+    )
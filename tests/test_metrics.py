@@ -0,0 +1,86 @@
+import pytest
+
+import metrics
+from metrics import ScrapeMetrics, percentile, render_prometheus
+
+
+@pytest.mark.parametrize("values, fraction, expected", [
+    ([], 0.5, 0.0),
+    ([], 0.99, 0.0),
+    ([3.0], 0.5, 3.0),
+    ([3.0], 0.99, 3.0),
+    ([4, 1, 3, 2, 5], 0.5, 3),
+    ([4, 1, 3, 2, 5], 0.0, 1),
+    ([4, 1, 3, 2, 5], 1.0, 5),
+    (list(range(1, 101)), 0.95, 95),
+    (list(range(1, 101)), 0.99, 99),
+])
+def test_percentile(values, fraction, expected):
+    assert percentile(values, fraction) == expected
+
+
+def test_percentile_leaves_the_input_alone():
+    values = [3, 1, 2]
+    percentile(values, 0.5)
+    assert values == [3, 1, 2]
+
+
+def test_summary_reports_each_stage(monkeypatch):
+    clock = iter([10.0, 12.5])
+    monkeypatch.setattr(metrics.time, "perf_counter", lambda: next(clock))
+    run = ScrapeMetrics()
+    run.observe("detail_fetch", 0.2)
+    run.observe("detail_fetch", 0.4)
+    run.incr("pages_scraped")
+    run.incr("pages_scraped", 2)
+    assert run.summary() == {
+        "wall_seconds": 2.5,
+        "stages": {
+            "detail_fetch": {"count": 2, "total": 0.6, "p50": 0.2, "p95": 0.4, "p99": 0.4, "max": 0.4}
+        },
+        "counters": {"pages_scraped": 3}
+    }
+
+
+def test_render_prometheus():
+    summary = {
+        "wall_seconds": 2.5,
+        "stages": {
+            "listing_fetch": {"count": 1, "total": 0.1, "p50": 0.1, "p95": 0.1, "p99": 0.1, "max": 0.1},
+            "detail_fetch": {"count": 2, "total": 0.6, "p50": 0.2, "p95": 0.4, "p99": 0.4, "max": 0.4}
+        },
+        "counters": {"tenders_saved": 7, "pages_scraped": 3}
+    }
+    assert render_prometheus(summary) == (
+        "# HELP tender_scrape_wall_seconds Wall time of the last scrape run.\n"
+        "# TYPE tender_scrape_wall_seconds gauge\n"
+        "tender_scrape_wall_seconds 2.5\n"
+        "# HELP tender_scrape_stage_seconds Per-stage timings of the last scrape run.\n"
+        "# TYPE tender_scrape_stage_seconds summary\n"
+        'tender_scrape_stage_seconds{stage="detail_fetch",quantile="0.5"} 0.2\n'
+        'tender_scrape_stage_seconds{stage="detail_fetch",quantile="0.95"} 0.4\n'
+        'tender_scrape_stage_seconds{stage="detail_fetch",quantile="0.99"} 0.4\n'
+        'tender_scrape_stage_seconds_sum{stage="detail_fetch"} 0.6\n'
+        'tender_scrape_stage_seconds_count{stage="detail_fetch"} 2\n'
+        'tender_scrape_stage_seconds{stage="listing_fetch",quantile="0.5"} 0.1\n'
+        'tender_scrape_stage_seconds{stage="listing_fetch",quantile="0.95"} 0.1\n'
+        'tender_scrape_stage_seconds{stage="listing_fetch",quantile="0.99"} 0.1\n'
+        'tender_scrape_stage_seconds_sum{stage="listing_fetch"} 0.1\n'
+        'tender_scrape_stage_seconds_count{stage="listing_fetch"} 1\n'
+        "# HELP tender_scrape_events Counters from the last scrape run.\n"
+        "# TYPE tender_scrape_events gauge\n"
+        'tender_scrape_events{name="pages_scraped"} 3\n'
+        'tender_scrape_events{name="tenders_saved"} 7\n'
+    )
+
+
+def test_render_prometheus_without_a_run():
+    assert render_prometheus(None) == ""
+
+
+def test_last_run_is_kept_for_the_endpoint():
+    metrics.set_last_run({"wall_seconds": 1.0, "stages": {}, "counters": {}})
+    try:
+        assert render_prometheus(metrics.get_last_run()).endswith("# TYPE tender_scrape_events gauge\n")
+    finally:
+        metrics.set_last_run(None)
@@ -0,0 +1,156 @@
+import asyncio
+import io
+
+import pytest
+from telegram.error import RetryAfter
+
+import rate_limiter
+from rate_limiter import RequestThrottle, TelegramRateLimiter, TokenBucket, _rewind_uploads
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock)
+    return clock
+
+
+def test_bucket_starts_full_and_drains(clock):
+    bucket = TokenBucket(rate=1.0, capacity=3)
+    assert bucket.is_full()
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+
+def test_bucket_refills_at_rate_up_to_capacity(clock):
+    bucket = TokenBucket(rate=2.0, capacity=3)
+    for _ in range(3):
+        bucket.try_acquire()
+    clock.now += 0.4
+    assert not bucket.try_acquire()
+    clock.now += 0.1
+    assert bucket.try_acquire()
+    clock.now += 60
+    assert bucket.is_full()
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+
+def test_acquire_waits_for_the_next_token():
+    async def scenario():
+        bucket = TokenBucket(rate=20.0, capacity=1)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await bucket.acquire()
+        await bucket.acquire()
+        return loop.time() - started
+
+    assert 0.04 <= asyncio.run(scenario()) < 0.5
+
+
+def test_group_chats_get_the_group_rate():
+    limiter = TelegramRateLimiter(chat_rate=1.0, group_rate=0.25)
+    assert limiter._chat_bucket(42).rate == 1.0
+    assert limiter._chat_bucket(-100123).rate == 0.25
+    assert limiter._chat_bucket("@channel").rate == 0.25
+
+
+def test_calls_without_a_chat_bypass_the_buckets():
+    async def scenario():
+        limiter = TelegramRateLimiter()
+        result = await limiter.process_request(lambda: asyncio.sleep(0, "ok"), (), {}, "getMe", {}, None)
+        return result, limiter._chat_buckets
+
+    result, buckets = asyncio.run(scenario())
+    assert result == "ok"
+    assert not buckets
+
+
+def test_retry_after_is_retried_and_pauses_sends():
+    attempts = []
+
+    async def send():
+        attempts.append(asyncio.get_running_loop().time())
+        if len(attempts) == 1:
+            raise RetryAfter(0)
+        return "sent"
+
+    async def scenario():
+        limiter = TelegramRateLimiter(max_retries=2)
+        result = await limiter.process_request(send, (), {}, "sendMessage", {"chat_id": 1}, None)
+        return result, limiter
+
+    result, limiter = asyncio.run(scenario())
+    assert result == "sent"
+    assert len(attempts) == 2
+    assert limiter.stats["retry_after"] == 1
+    assert limiter._paused_until > 0
+
+
+def test_retry_after_is_raised_once_retries_run_out():
+    async def send():
+        raise RetryAfter(0)
+
+    async def scenario():
+        limiter = TelegramRateLimiter(max_retries=1)
+        await limiter.process_request(send, (), {}, "sendMessage", {"chat_id": 1}, None)
+
+    with pytest.raises(RetryAfter):
+        asyncio.run(scenario())
+
+
+def test_idle_buckets_are_evicted_past_the_limit(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "MAX_TRACKED_CHATS", 3)
+    limiter = TelegramRateLimiter()
+    busy = limiter._chat_bucket(1)
+    busy.try_acquire()
+    for chat_id in range(2, 6):
+        limiter._chat_bucket(chat_id)
+    # Chat 1 still has a send in flight, so only full buckets were dropped.
+    assert 1 in limiter._chat_buckets
+    assert len(limiter._chat_buckets) == 4
+
+
+def test_rewind_uploads_seeks_streamed_files_back():
+    class Upload:
+        def __init__(self, content):
+            self.input_file_content = content
+
+    stream = io.BytesIO(b"csv,data")
+    stream.read()
+    _rewind_uploads({"document": Upload(stream), "caption": "text", "thumbnail": Upload(b"bytes")})
+    assert stream.tell() == 0
+
+
+def test_throttle_allows_a_burst_then_the_rate(clock):
+    throttle = RequestThrottle(rate=1.0, burst=3)
+    key = (42, 7)
+    assert [throttle.allow(key) for _ in range(4)] == [True, True, True, False]
+    assert throttle.throttled == 1
+    clock.now += 1
+    assert throttle.allow(key)
+    assert not throttle.allow(key)
+
+
+def test_throttle_keys_are_independent(clock):
+    throttle = RequestThrottle(rate=1.0, burst=1)
+    assert throttle.allow((-100, 1))
+    assert throttle.allow((-100, 2))
+    assert not throttle.allow((-100, 1))
+
+
+def test_throttle_forgets_the_least_recent_keys(clock):
+    throttle = RequestThrottle(rate=1.0, burst=1, max_tracked=2)
+    throttle.allow("a")
+    throttle.allow("b")
+    throttle.allow("a")
+    throttle.allow("c")
+    assert list(throttle._buckets) == ["a", "c"]
+    # "b" starts over with a full burst.
+    assert throttle.allow("b")
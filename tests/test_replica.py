@@ -0,0 +1,206 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+import replica
+from replica import SYNC_OVERLAP, Replica
+
+NOW = datetime(2026, 10, 17, 9, 0)
+
+
+class FakeSource:
+    # Answers the replica's keyset queries from in-memory rows, keyed on
+    # (timestamp, key) like the Postgres queries.
+    def __init__(self):
+        self.tenders = []
+        self.details = []
+        self.archived = []
+        self.queries = []
+
+    def add(self, tender_id, updated_at):
+        self.tenders.append((
+            tender_id, f"Tender {tender_id}", f"https://example.test/tenders/{tender_id}",
+            "Nov 03, 2026", "Nov 04, 2026", "Oct 17, 2026", "2026-10-17", None, 1, updated_at
+        ))
+        self.details.append((
+            tender_id, f"Detail {tender_id}", "Description", "Vehicles", "Acme", {}, {}, None, 1, updated_at
+        ))
+
+    def touch(self, tender_id, updated_at):
+        self.tenders = [row[:-1] + (updated_at,) if row[0] == tender_id else row for row in self.tenders]
+        self.details = [row[:-1] + (updated_at,) if row[0] == tender_id else row for row in self.details]
+
+    def archive(self, tender_id, archived_at):
+        self.tenders = [row for row in self.tenders if row[0] != tender_id]
+        self.details = [row for row in self.details if row[0] != tender_id]
+        self.archived.append((tender_id, archived_at))
+
+    async def execute(self, query, params):
+        if "FROM scrape_status" in query:
+            return FakeCursor([])
+        if "FROM tenders_archive" in query:
+            rows = self.archived
+            stamp = 1
+        elif "FROM tender_details" in query:
+            rows = self.details
+            stamp = -1
+        else:
+            rows = self.tenders
+            stamp = -1
+        since, last_key, limit = params
+        self.queries.append((query.split("FROM")[1].split()[0], since))
+        rows = sorted((row for row in rows if (row[stamp], row[0]) > (since, last_key)), key=lambda r: (r[stamp], r[0]))
+        return FakeCursor(rows[:limit])
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def fetchall(self):
+        return self.rows
+
+
+@pytest.fixture
+def source(monkeypatch):
+    fake = FakeSource()
+
+    @asynccontextmanager
+    async def connection():
+        yield fake
+
+    monkeypatch.setattr(replica, "connection", connection)
+    return fake
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    opened = Replica(str(tmp_path / "replica.sqlite3"))
+    yield opened
+    opened.close()
+
+
+def test_first_sync_mirrors_every_row(source, mirror):
+    source.add("t1", NOW)
+    source.add("t2", NOW + timedelta(seconds=1))
+    assert not mirror.ready
+    assert sorted(asyncio.run(mirror.sync())) == ["t1", "t2"]
+    assert mirror.ready
+    assert mirror.count("tenders1") == 2
+    assert mirror.tender_by_id("t2")[1] == "Tender t2"
+    assert mirror.tender_details("t1")[0] == "Detail t1"
+
+
+def test_unchanged_rows_in_the_overlap_are_not_reported(source, mirror):
+    source.add("t1", NOW)
+    asyncio.run(mirror.sync())
+    source.queries.clear()
+    assert asyncio.run(mirror.sync()) == []
+    # The overlap window is re-read, the rows in it are just skipped.
+    assert ("tenders1", NOW - SYNC_OVERLAP) in source.queries
+
+
+def test_late_commit_inside_the_overlap_is_picked_up(source, mirror):
+    source.add("t1", NOW)
+    asyncio.run(mirror.sync())
+    # Committed after the sync but stamped before the watermark.
+    source.add("t0", NOW - timedelta(minutes=2))
+    source.touch("t1", NOW + timedelta(minutes=1))
+    assert sorted(asyncio.run(mirror.sync())) == ["t0", "t1"]
+    assert mirror.tender_by_id("t0") is not None
+
+
+def test_archived_tenders_are_deleted_once(source, mirror):
+    source.add("t1", NOW)
+    source.add("t2", NOW)
+    asyncio.run(mirror.sync())
+    source.archive("t1", NOW + timedelta(minutes=1))
+    assert asyncio.run(mirror.sync()) == ["t1"]
+    assert mirror.tender_by_id("t1") is None
+    assert mirror.tender_details("t1") is None
+    assert mirror.tender_by_id("t2") is not None
+    assert asyncio.run(mirror.sync()) == []
+
+
+class BlockingWriter:
+    # Pauses a sync half way through deleting an archived tender.
+    def __init__(self, conn):
+        self.conn = conn
+        self.reached = threading.Event()
+        self.release = threading.Event()
+
+    def execute(self, sql, params=()):
+        if sql.startswith("DELETE FROM tender_details"):
+            self.reached.set()
+            self.release.wait(5)
+        return self.conn.execute(sql, params)
+
+    def executemany(self, sql, rows):
+        return self.conn.executemany(sql, rows)
+
+    def __enter__(self):
+        return self.conn.__enter__()
+
+    def __exit__(self, *exc):
+        return self.conn.__exit__(*exc)
+
+
+def test_reads_during_a_sync_see_the_last_committed_copy(source, mirror):
+    source.add("t1", NOW)
+    asyncio.run(mirror.sync())
+    source.archive("t1", NOW + timedelta(minutes=1))
+    writer = mirror._writer = BlockingWriter(mirror._writer)
+
+    async def sync_while_reading():
+        task = asyncio.create_task(mirror.sync())
+        while not writer.reached.is_set():
+            await asyncio.sleep(0.01)
+        # tenders1 is already deleted in the open write transaction.
+        seen = mirror.tender_by_id("t1"), mirror.tender_details("t1")
+        writer.release.set()
+        await task
+        return seen
+
+    tender, details = asyncio.run(sync_while_reading())
+    assert tender is not None and details is not None
+    assert mirror.tender_by_id("t1") is None
+    mirror._writer = writer.conn
+
+
+def test_listing_only_changes_are_reported(source, mirror):
+    source.add("t1", NOW)
+    asyncio.run(mirror.sync())
+    source.tenders = [row[:-1] + (NOW + timedelta(minutes=1),) for row in source.tenders]
+    assert asyncio.run(mirror.sync()) == ["t1"]
+
+
+def test_refresh_drops_cached_tenders_and_details(source, mirror, monkeypatch):
+    import bot
+    from cache import LRUCache, SingleFlight
+
+    async def no_status():
+        return None
+
+    monkeypatch.setattr(bot, "get_last_scrape_status", no_status)
+    source.add("t1", NOW)
+    source.add("t2", NOW)
+    asyncio.run(mirror.sync())
+    context = SimpleNamespace(bot_data={
+        "replica": mirror,
+        "tender_cache": LRUCache(10, 60),
+        "details_cache": LRUCache(10, 60),
+        "flights": SingleFlight(60, 10)
+    })
+    for tender_id in ("t1", "t2"):
+        context.bot_data["tender_cache"].set(tender_id, "tender")
+        context.bot_data["details_cache"].set(tender_id, "details")
+    # Only the listing row changed.
+    source.tenders = [row[:-1] + (NOW + timedelta(minutes=1),) if row[0] == "t1" else row for row in source.tenders]
+    asyncio.run(bot.refresh_caches(context))
+    assert "t1" not in context.bot_data["tender_cache"]
+    assert "t1" not in context.bot_data["details_cache"]
+    assert context.bot_data["tender_cache"].get("t2") == "tender"
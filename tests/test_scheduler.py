@@ -0,0 +1,97 @@
+import random
+from datetime import datetime, timezone
+
+import pytest
+
+import scheduler
+from scheduler import AdaptiveScheduler
+
+
+def at(hour, minute=0):
+    return datetime(2026, 10, 17, hour, minute, tzinfo=timezone.utc).timestamp()
+
+
+@pytest.fixture
+def sched():
+    sched = AdaptiveScheduler(pages=5, scrape_options={}, min_interval=300, max_interval=7200, deep_interval=21600)
+    sched.state = {
+        "hourly_rate": [None] * 24,
+        "last_probe_at": None,
+        "last_deep_at": None,
+        "next_run_at": None,
+        "failures": 0
+    }
+    return sched
+
+
+def test_unknown_hours_fall_back_to_the_default_then_the_mean(sched):
+    assert sched.expected_rate(at(3)) == scheduler.DEFAULT_RATE_PER_HOUR
+    sched.state["hourly_rate"][10] = 4.0
+    sched.state["hourly_rate"][11] = 2.0
+    assert sched.expected_rate(at(3)) == 3.0
+
+
+def test_expected_rate_looks_one_hour_ahead(sched):
+    sched.state["hourly_rate"][8] = 0.5
+    sched.state["hourly_rate"][9] = 6.0
+    assert sched.expected_rate(at(8, 30)) == 6.0
+    sched.state["hourly_rate"][0] = 9.0
+    assert sched.expected_rate(at(23)) == 9.0
+
+
+def test_first_probe_only_records_the_time(sched):
+    sched.learn(at(8), 10)
+    assert sched.state["last_probe_at"] == at(8)
+    assert sched.state["hourly_rate"] == [None] * 24
+
+
+def test_learn_smooths_the_rate_of_the_elapsed_hour(sched):
+    sched.learn(at(8), 0)
+    sched.learn(at(9), 4)
+    assert sched.state["hourly_rate"][8] == 4.0
+    sched.learn(at(8) + 86400, 0)
+    sched.learn(at(9) + 86400, 14)
+    smoothing = scheduler.RATE_SMOOTHING
+    assert sched.state["hourly_rate"][8] == pytest.approx(smoothing * 14 + (1 - smoothing) * 4)
+
+
+def test_long_gaps_are_not_learned(sched):
+    sched.learn(at(1), 0)
+    sched.learn(at(1) + scheduler.MAX_LEARNING_GAP_SECONDS + 1, 50)
+    assert sched.state["hourly_rate"] == [None] * 24
+
+
+def test_next_interval_follows_the_rate_within_bounds(sched):
+    random.seed(1)
+    jitter = scheduler.INTERVAL_JITTER
+    sched.state["hourly_rate"] = [2.0] * 24
+    for _ in range(50):
+        assert 1800 * (1 - jitter) <= sched.next_interval(at(12)) <= 1800 * (1 + jitter)
+    sched.state["hourly_rate"] = [1000.0] * 24
+    assert all(sched.next_interval(at(12)) >= 300 * (1 - jitter) for _ in range(50))
+    sched.state["hourly_rate"] = [0.0] * 24
+    assert all(sched.next_interval(at(12)) <= 7200 * (1 + jitter) for _ in range(50))
+
+
+def test_next_interval_never_passes_the_due_deep_crawl(sched):
+    sched.state["hourly_rate"] = [0.0] * 24
+    sched.state["last_deep_at"] = at(12) - 21600 + 600
+    assert sched.next_interval(at(12)) <= 600
+    sched.state["last_deep_at"] = at(12) - 30000
+    assert sched.next_interval(at(12)) == 0.0
+
+
+def test_deep_due(sched):
+    assert sched.deep_due(at(12))
+    sched.state["last_deep_at"] = at(12) - 21599
+    assert not sched.deep_due(at(12))
+    assert sched.deep_due(at(12) + 1)
+
+
+@pytest.mark.parametrize("failures, cap", [(1, 60), (2, 120), (4, 480), (20, 7200)])
+def test_backoff_doubles_with_jitter_up_to_the_max_interval(sched, failures, cap):
+    random.seed(failures)
+    sched.state["failures"] = failures
+    delays = [sched.backoff_interval() for _ in range(100)]
+    assert all(cap / 2 <= delay <= cap for delay in delays)
+    assert max(delays) - min(delays) > 0
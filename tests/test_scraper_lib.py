@@ -0,0 +1,148 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from scraper_lib import (
+    DEFAULT_REVISIT_INTERVAL,
+    HostThrottle,
+    changed_listings,
+    detail_hash,
+    listing_hash,
+    next_detail_check,
+    select_revisits
+)
+
+NOW = datetime(2026, 10, 17, 9, 0)
+
+LISTING = {
+    "id": "t1",
+    "title": "Road Construction in Adama",
+    "url": "https://example.test/tenders/t1",
+    "bid_closing_date": "Nov 03, 2026 (10:00 AM)",
+    "bid_opening_date": "Nov 04, 2026 (10:30 AM)",
+    "published_on": "Oct 17, 2026"
+}
+
+DETAILS = {
+    "title": "Road Construction in Adama",
+    "description": "Asphalt resurfacing of the ring road.",
+    "filed_under": "Construction and Water Works",
+    "company": "Oromia Roads Authority",
+    "metadata": {"Region": "Oromia", "Bid Bond": "50,000"},
+    "extra_fields": {}
+}
+
+
+@pytest.mark.parametrize("days_left, expected", [
+    (0, timedelta(hours=6)),
+    (2, timedelta(hours=6)),
+    (3, timedelta(days=1)),
+    (7, timedelta(days=1)),
+    (8, timedelta(days=3)),
+    (30, timedelta(days=3)),
+    (31, DEFAULT_REVISIT_INTERVAL),
+])
+def test_revisits_get_closer_as_closing_nears(days_left, expected):
+    assert next_detail_check(NOW.date() + timedelta(days=days_left), NOW) == NOW + expected
+
+
+def test_closed_tenders_are_not_scheduled():
+    # Stored as a NULL detail_due_at, so refresh runs stop revisiting them.
+    assert next_detail_check(NOW.date() - timedelta(days=1), NOW) is None
+
+
+def test_unknown_closing_date_uses_the_default_interval():
+    assert next_detail_check(None, NOW) == NOW + DEFAULT_REVISIT_INTERVAL
+
+
+def test_listing_hash_covers_only_listing_fields():
+    assert listing_hash(LISTING) == listing_hash({**LISTING, "summary_html": "<b>cached</b>", "id": "t2"})
+    assert listing_hash(LISTING) != listing_hash({**LISTING, "bid_closing_date": "Nov 10, 2026 (10:00 AM)"})
+
+
+def test_detail_hash_ignores_key_order_and_empty_metadata():
+    reordered = {**DETAILS, "metadata": {"Bid Bond": "50,000", "Region": "Oromia"}}
+    assert detail_hash(reordered) == detail_hash(DETAILS)
+    # Rows stored before extra_fields existed hash like an empty mapping.
+    assert detail_hash({**DETAILS, "extra_fields": None}) == detail_hash(DETAILS)
+    assert detail_hash({**DETAILS, "categories": ["Vehicles"]}) == detail_hash(DETAILS)
+
+
+@pytest.mark.parametrize("field", ["title", "description", "filed_under", "company"])
+def test_detail_hash_changes_with_content(field):
+    # A new hash is what moves the old row into tender_details_history.
+    assert detail_hash({**DETAILS, field: "changed"}) != detail_hash(DETAILS)
+
+
+def test_detail_hash_changes_with_metadata():
+    assert detail_hash({**DETAILS, "metadata": {"Region": "Amhara"}}) != detail_hash(DETAILS)
+
+
+def listing(tender_id, **changes):
+    return {**LISTING, "id": tender_id, "url": f"https://example.test/tenders/{tender_id}", **changes}
+
+
+def test_refresh_only_revisits_changed_or_due_tenders():
+    listed = [
+        listing("unchanged"),
+        listing("edited", title="Road Construction in Adama (Re-advertised)"),
+        listing("due"),
+        listing("edited_and_due", bid_closing_date="Nov 10, 2026 (10:00 AM)"),
+        listing("new")
+    ]
+    known = {
+        "unchanged": (listing_hash(listing("unchanged")), False),
+        "edited": (listing_hash(listing("edited")), False),
+        "due": (listing_hash(listing("due")), True),
+        "edited_and_due": (listing_hash(listing("edited_and_due")), True)
+    }
+    changed = changed_listings(listed, known)
+    assert [tender["id"] for tender in changed] == ["edited", "edited_and_due"]
+    revisits = select_revisits(listed, known, changed)
+    assert [tender["id"] for tender in revisits] == ["edited", "edited_and_due", "due"]
+
+
+def test_failed_listing_update_still_revisits_due_tenders():
+    listed = [listing("edited", title="Changed"), listing("due")]
+    known = {
+        "edited": (listing_hash(listing("edited")), True),
+        "due": (listing_hash(listing("due")), True)
+    }
+    assert [tender["id"] for tender in select_revisits(listed, known, [])] == ["edited", "due"]
+
+
+
+def run_throttled(throttle, urls, hold=0.0):
+    starts = []
+    in_flight = {"now": 0, "max": 0}
+
+    async def request(url):
+        async with throttle.slot(url):
+            starts.append((url, asyncio.get_running_loop().time()))
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            await asyncio.sleep(hold)
+            in_flight["now"] -= 1
+
+    async def main():
+        await asyncio.gather(*(request(url) for url in urls))
+
+    asyncio.run(main())
+    return starts, in_flight["max"]
+
+
+def test_requests_to_one_host_start_a_delay_apart():
+    starts, _ = run_throttled(HostThrottle(max_per_host=4, delay=0.05), ["https://a.test/x"] * 4)
+    gaps = [later - earlier for (_, earlier), (_, later) in zip(starts, starts[1:])]
+    assert all(gap >= 0.045 for gap in gaps)
+
+
+def test_hosts_are_throttled_separately():
+    starts, _ = run_throttled(HostThrottle(max_per_host=1, delay=1.0), ["https://a.test/x", "https://b.test/y"])
+    assert abs(starts[1][1] - starts[0][1]) < 0.5
+
+
+def test_in_flight_requests_are_capped_per_host():
+    _, peak = run_throttled(HostThrottle(max_per_host=2, delay=0), ["https://a.test/x"] * 6, hold=0.02)
+    assert peak == 2
@@ -0,0 +1,90 @@
+import pytest
+
+from subscriptions import SubscriptionMatcher, parse_subscription, tender_fields, tokenize
+
+
+def subscription(chat_id, text):
+    kind, value, normalized = parse_subscription(text)
+    return chat_id, kind, value, normalized
+
+
+TENDER = {
+    "id": "t1",
+    "title": "Road Construction in Adama",
+    "detail_title": None,
+    "company": "Oromia Roads Authority",
+    "filed_under": "Construction and Water Works, Vehicles",
+    "description": "Asphalt resurfacing of the ring road.",
+    "region": "Oromia"
+}
+
+
+def test_tokenize_lowercases_and_drops_punctuation():
+    assert tokenize("Road-Construction, PHASE 2!") == ["road", "construction", "phase", "2"]
+    assert tokenize(None) == []
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("road construction", ("keyword", "road construction", "road construction")),
+    ("category: Vehicles", ("category", "Vehicles", "vehicles")),
+    ("REGION : Addis Ababa", ("region", "Addis Ababa", "addis ababa")),
+    ("note: spare parts", ("keyword", "note: spare parts", "note spare parts")),
+    ("  ", None),
+    ("category: !!", None),
+])
+def test_parse_subscription(text, expected):
+    assert parse_subscription(text) == expected
+
+
+def test_tender_fields_split_categories():
+    fields = tender_fields(TENDER)
+    assert fields["category"] == [{"construction", "and", "water", "works"}, {"vehicles"}]
+    assert fields["region"] == [{"oromia"}]
+    assert {"asphalt", "adama", "authority"} <= fields["keyword"][0]
+
+
+def test_keyword_matches_need_every_word():
+    matcher = SubscriptionMatcher([
+        subscription(1, "road construction"),
+        subscription(2, "road bridge"),
+        subscription(3, "asphalt")
+    ])
+    assert matcher.match(TENDER) == {1: {"road construction"}, 3: {"asphalt"}}
+
+
+def test_category_words_must_fall_in_one_category():
+    matcher = SubscriptionMatcher([
+        subscription(1, "category: water works"),
+        subscription(2, "category: water vehicles"),
+        subscription(3, "category: vehicles")
+    ])
+    assert matcher.match(TENDER) == {1: {"water works"}, 3: {"vehicles"}}
+
+
+def test_region_and_keyword_kinds_do_not_mix():
+    matcher = SubscriptionMatcher([
+        subscription(1, "region: Oromia"),
+        subscription(2, "region: Adama"),
+        subscription(3, "oromia")
+    ])
+    assert matcher.match(TENDER) == {1: {"Oromia"}, 3: {"oromia"}}
+
+
+def test_one_chat_collects_all_matching_values():
+    matcher = SubscriptionMatcher([
+        subscription(7, "asphalt"),
+        subscription(7, "region: Oromia"),
+        subscription(7, "tractors")
+    ])
+    assert matcher.match(TENDER) == {7: {"asphalt", "Oromia"}}
+
+
+def test_unknown_kinds_and_empty_subscriptions_are_skipped():
+    matcher = SubscriptionMatcher([(1, "company", "Roads", "roads"), (2, "keyword", "", "")])
+    assert matcher.size == 0
+    assert matcher.match(TENDER) == {}
+
+
+def test_missing_fields_match_nothing():
+    matcher = SubscriptionMatcher([subscription(1, "region: Oromia"), subscription(2, "category: vehicles")])
+    assert matcher.match({"id": "t2", "title": "Office furniture"}) == {}
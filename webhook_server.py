@@ -0,0 +1,158 @@
+import asyncio
+import hmac
+import json
+import logging
+import signal
+import time
+from collections import deque
+
+from aiohttp import web
+from telegram import Update
+
+from metrics import percentile
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+LATENCY_WINDOW = 1000
+DRAIN_TIMEOUT_SECONDS = 10.0
+
+
+class WebhookServer:
+    # Receives Telegram webhook POSTs on an embedded aiohttp server. Updates
+    # are acknowledged as soon as they are parsed and processed in background
+    # tasks, at most `concurrency` at a time. Every bot process can serve the
+    # same webhook behind a load balancer.
+    def __init__(self, application, path, secret_token, concurrency=16):
+        if not secret_token:
+            raise ValueError("A webhook secret token is required")
+        self.application = application
+        self.path = path
+        self.secret_token = secret_token
+        self.concurrency = max(1, concurrency)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._tasks = set()
+        self._runner = None
+        self.received = 0
+        self.processed = 0
+        self.errors = 0
+        self.rejected = 0
+        self.in_flight = 0
+        # Receipt to handler completion (includes waiting for a slot) and
+        # handler time alone, for the last LATENCY_WINDOW updates.
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.processing_times = deque(maxlen=LATENCY_WINDOW)
+
+    def build_app(self):
+        app = web.Application()
+        app.router.add_post(self.path, self.handle_update)
+        app.router.add_get("/healthz", self.handle_health)
+        return app
+
+    async def handle_update(self, request):
+        token = request.headers.get(SECRET_HEADER, "")
+        if not hmac.compare_digest(token.encode(), self.secret_token.encode()):
+            self.rejected += 1
+            return web.Response(status=403)
+        try:
+            update = Update.de_json(await request.json(), self.application.bot)
+        except (json.JSONDecodeError, UnicodeDecodeError, TypeError, KeyError, ValueError) as exc:
+            logging.warning("Rejected malformed webhook payload: %s", exc)
+            update = None
+        if update is None:
+            self.rejected += 1
+            return web.Response(status=400)
+        self.received += 1
+        task = asyncio.create_task(self._process(update, time.perf_counter()))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.Response()
+
+    async def _process(self, update, received_at):
+        async with self._semaphore:
+            self.in_flight += 1
+            started = time.perf_counter()
+            try:
+                await self.application.process_update(update)
+            except Exception:
+                self.errors += 1
+                logging.exception("Update %s failed", update.update_id)
+            finally:
+                finished = time.perf_counter()
+                self.in_flight -= 1
+                self.processed += 1
+                self.processing_times.append(finished - started)
+                self.latencies.append(finished - received_at)
+
+    def stats(self):
+        def summary(values):
+            values = list(values)
+            return {
+                f"p{round(quantile * 100)}": round(percentile(values, quantile) * 1000, 2)
+                for quantile in (0.5, 0.95, 0.99)
+            }
+
+        return {
+            "received": self.received,
+            "processed": self.processed,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "in_flight": self.in_flight,
+            "waiting": len(self._tasks) - self.in_flight,
+            "concurrency": self.concurrency,
+            "latency_ms": summary(self.latencies),
+            "processing_ms": summary(self.processing_times)
+        }
+
+    async def handle_health(self, request):
+        running = self.application.running
+        return web.json_response(
+            {"status": "ok" if running else "stopped", **self.stats()},
+            status=200 if running else 503
+        )
+
+    async def start(self, listen="0.0.0.0", port=8443):
+        self._runner = web.AppRunner(self.build_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, listen, port).start()
+        logging.info("Webhook server listening on http://%s:%s%s", listen, port, self.path)
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        if self._tasks:
+            # Let accepted updates finish before the application shuts down.
+            await asyncio.wait(set(self._tasks), timeout=DRAIN_TIMEOUT_SECONDS)
+
+
+async def serve_webhook(application, listen, port, path, secret_token, webhook_url=None, concurrency=16):
+    # Replaces Application.run_polling(): runs the same lifecycle hooks, then
+    # serves updates until SIGINT/SIGTERM. With webhook_url, the webhook is
+    # registered with Telegram; without it (local testing, or registered
+    # elsewhere) updates can be POSTed straight to the server.
+    server = WebhookServer(application, path, secret_token, concurrency)
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    await application.initialize()
+    if application.post_init:
+        await application.post_init(application)
+    await application.start()
+    try:
+        await server.start(listen, port)
+        if webhook_url:
+            await application.bot.set_webhook(
+                url=webhook_url.rstrip("/") + path,
+                secret_token=secret_token,
+                allowed_updates=Update.ALL_TYPES,
+                max_connections=server.concurrency
+            )
+            logging.info("Webhook registered at %s%s", webhook_url.rstrip("/"), path)
+        await stop_event.wait()
+    finally:
+        await server.stop()
+        await application.stop()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+        await application.shutdown()